@@ -1,21 +1,94 @@
-from flask import Flask
+from flask import Flask, current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
+from sqlalchemy.orm import make_transient_to_detached
 import os
+import threading
+import time
 
 # Initialize extensions
 db = SQLAlchemy()
 login_manager = LoginManager()
 csrf = CSRFProtect()
 
-def create_app():
+def create_app(start_workers=True):
     app = Flask(__name__)
     
     # Configuration
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///browser_test.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # SQLite eşzamanlılığı: kilitte bekleme süresi (saniye), bağlantı havuzu ve kilitli yazma tekrarları
+    app.config['SQLITE_BUSY_TIMEOUT'] = float(os.environ.get('SQLITE_BUSY_TIMEOUT') or 30)
+    app.config['SQLITE_POOL_SIZE'] = int(os.environ.get('SQLITE_POOL_SIZE') or 10)
+    app.config['DB_WRITE_RETRIES'] = int(os.environ.get('DB_WRITE_RETRIES') or 5)
+    app.config['DB_WRITE_RETRY_DELAY'] = float(os.environ.get('DB_WRITE_RETRY_DELAY') or 0.1)
+    from app.sqlite import configure_sqlite, engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app)
+    
+    # Test kuyruğu: aynı anda çalışacak test sayısı ve kuyruk kontrol aralığı (saniye)
+    app.config['TEST_WORKERS'] = int(os.environ.get('TEST_WORKERS') or 2)
+    app.config['TEST_QUEUE_POLL_INTERVAL'] = float(os.environ.get('TEST_QUEUE_POLL_INTERVAL') or 5)
+    # False ise web süreci test çalıştırmaz; testleri ayrı worker.py süreçleri alır
+    app.config['WEB_RUNS_TESTS'] = os.environ.get('WEB_RUNS_TESTS', 'True').lower() == 'true'
+    # Worker kiralaması: heartbeat aralığı ve yenilenmeyen kiranın düşme süresi (saniye)
+    app.config['WORKER_ID'] = os.environ.get('WORKER_ID')
+    app.config['TEST_HEARTBEAT_INTERVAL'] = float(os.environ.get('TEST_HEARTBEAT_INTERVAL') or 15)
+    app.config['TEST_LEASE_SECONDS'] = float(os.environ.get('TEST_LEASE_SECONDS') or 60)
+    # Çalıştırma modu: 'loop' (web sürecindeki event loop) veya 'process' (ayrı worker süreçleri)
+    app.config['EXECUTION_MODE'] = os.environ.get('EXECUTION_MODE') or 'loop'
+    app.config['PROCESS_WORKERS'] = int(os.environ.get('PROCESS_WORKERS') or os.cpu_count() or 2)
+    app.config['PROCESS_MAX_RUNS'] = int(os.environ.get('PROCESS_MAX_RUNS') or 20)
+    # Başarılı çalışmalardan kaydedilen aksiyon izini LLM'siz tekrar oynat
+    app.config['ACTION_REPLAY'] = os.environ.get('ACTION_REPLAY', 'False').lower() == 'true'
+    # Numaralı adımlı prompt'ları paralel alt görevlere böl (ortak giriş önsözüyle)
+    app.config['SPLIT_PROMPT_STEPS'] = os.environ.get('SPLIT_PROMPT_STEPS', 'False').lower() == 'true'
+    app.config['SUBTASK_CONCURRENCY'] = int(os.environ.get('SUBTASK_CONCURRENCY') or 4)
+    app.config['SUBTASK_MAX_STEPS'] = int(os.environ.get('SUBTASK_MAX_STEPS') or 30)
+    # Başarılı girişten sonraki tarayıcı oturumunu proje bazında şifreli sakla ve yeniden kullan
+    app.config['SESSION_SNAPSHOTS'] = os.environ.get('SESSION_SNAPSHOTS', 'False').lower() == 'true'
+    app.config['SESSION_SNAPSHOT_TTL_HOURS'] = float(os.environ.get('SESSION_SNAPSHOT_TTL_HOURS') or 12)
+    app.config['SESSION_SNAPSHOT_KEY'] = os.environ.get('SESSION_SNAPSHOT_KEY')
+    # Periyodik izleme takvimleri (web ve worker.py süreçlerinde runner ile birlikte çalışır)
+    app.config['SCHEDULER_ENABLED'] = os.environ.get('SCHEDULER_ENABLED', 'True').lower() == 'true'
+    app.config['SCHEDULER_POLL_INTERVAL'] = float(os.environ.get('SCHEDULER_POLL_INTERVAL') or 30)
+    app.config['SCHEDULER_MISFIRE_GRACE'] = float(os.environ.get('SCHEDULER_MISFIRE_GRACE') or 300)
+    # Başka süreçte verilen durdurma talebinin veritabanından kontrol aralığı (saniye)
+    app.config['STOP_CHECK_INTERVAL'] = float(os.environ.get('STOP_CHECK_INTERVAL') or 5)
+    # Hazır Chromium havuzu (0 = kapalı, her test kendi tarayıcısını açar)
+    app.config['BROWSER_POOL_SIZE'] = int(os.environ.get('BROWSER_POOL_SIZE') or 0)
+    app.config['BROWSER_POOL_CONTEXTS_PER_PROCESS'] = int(os.environ.get('BROWSER_POOL_CONTEXTS_PER_PROCESS') or 2)
+    app.config['BROWSER_POOL_MAX_RUNS'] = int(os.environ.get('BROWSER_POOL_MAX_RUNS') or 50)
+    app.config['BROWSER_POOL_MAX_RSS_MB'] = int(os.environ.get('BROWSER_POOL_MAX_RSS_MB') or 1500)
+    app.config['BROWSER_POOL_HEALTH_INTERVAL'] = float(os.environ.get('BROWSER_POOL_HEALTH_INTERVAL') or 30)
+    # Havuz doluyken yeni testin boş context için bekleyeceği en uzun süre (saniye)
+    app.config['BROWSER_POOL_LEASE_TIMEOUT'] = float(os.environ.get('BROWSER_POOL_LEASE_TIMEOUT') or 300)
+    app.config['BROWSER_POOL_HEADLESS'] = os.environ.get('HEADLESS', 'False').lower() == 'true'
+    app.config['CHROME_PATH'] = os.environ.get('CHROME_PATH')
+    # Suite çalıştırmalarında varsayılan paralel test sayısı (0 = yalnızca TEST_WORKERS sınırı)
+    app.config['SUITE_MAX_PARALLEL'] = int(os.environ.get('SUITE_MAX_PARALLEL') or 0)
+    # Canlı test akışında (SSE) bağlantıyı açık tutan heartbeat aralığı (saniye)
+    app.config['SSE_HEARTBEAT_INTERVAL'] = float(os.environ.get('SSE_HEARTBEAT_INTERVAL') or 15)
+    # Olayları bu sürece gelmeyen (ayrı worker.py süreçlerinde çalışan) testlerin akışı için ortak veritabanı yoklama aralığı
+    app.config['SSE_POLL_INTERVAL'] = float(os.environ.get('SSE_POLL_INTERVAL') or 2)
+    # Ekran görüntüleri, agent geçmişi ve indirilen dosyaların saklandığı içerik adresli depo
+    app.config['ARTIFACT_DIR'] = os.environ.get('ARTIFACT_DIR') or os.path.join(app.instance_path, 'artifacts')
+    # Bu süre (saniye) içinde yazılan veya tekrar kullanılan ek içerikleri, referansı kalmasa da silinmez
+    app.config['ARTIFACT_RELEASE_GRACE'] = float(os.environ.get('ARTIFACT_RELEASE_GRACE') or 600)
+    # Bu günden eski test sonuçlarının ayrıntıları sıkıştırılmış arşiv dosyalarına taşınır (0 = kapalı)
+    app.config['RETENTION_DAYS'] = int(os.environ.get('RETENTION_DAYS') or 0)
+    app.config['RETENTION_INTERVAL_HOURS'] = float(os.environ.get('RETENTION_INTERVAL_HOURS') or 24)
+    app.config['ARCHIVE_DIR'] = os.environ.get('ARCHIVE_DIR') or os.path.join(app.instance_path, 'archive')
+    # Toplu silmede bu sayıdan fazla sonuç arka plan işine bırakılır; iş her transaction'da BULK_CHUNK_SIZE kayıt siler
+    app.config['BULK_SYNC_LIMIT'] = int(os.environ.get('BULK_SYNC_LIMIT') or 1000)
+    app.config['BULK_CHUNK_SIZE'] = int(os.environ.get('BULK_CHUNK_SIZE') or 500)
+    # Prompt sayfasındaki adım fazı yüzdelikleri bu kadar son çalışmadan hesaplanır
+    app.config['PHASE_STATS_RUNS'] = int(os.environ.get('PHASE_STATS_RUNS') or 50)
+    # Bu sayıdan fazla SQL sorgusu çalıştıran istekleri logla (0 = kapalı)
+    app.config['QUERY_COUNT_WARN'] = int(os.environ.get('QUERY_COUNT_WARN') or 0)
+    # Oturumdaki kullanıcının kaydı bu süre (saniye) bellekten okunur (0 = her istekte sorgu)
+    app.config['USER_CACHE_TTL'] = float(os.environ.get('USER_CACHE_TTL') or 60)
     
     # Initialize extensions with app
     db.init_app(app)
@@ -38,8 +111,26 @@ def create_app():
     app.register_blueprint(project_bp, url_prefix='/projects')
     app.register_blueprint(test_bp, url_prefix='/tests')
     
+    # Test kuyruğu, tarayıcı havuzu ve zamanlayıcı (WEB_RUNS_TESTS açıksa aşağıda uygulamayla birlikte başlar)
+    from app.runner import TestRunner
+    from app.browser_pool import BrowserPool
+    from app.scheduler import TestScheduler
+    from app.artifacts import ArtifactStore
+    from app.bulk import BulkJobRunner
+    from app.events import StreamPoller
+    TestRunner(app)
+    BrowserPool(app)
+    TestScheduler(app)
+    ArtifactStore(app)
+    BulkJobRunner(app)
+    StreamPoller(app)
+    
+    from app import querycount
+    querycount.init_app(app)
+    
     # Create database tables
     with app.app_context():
+        configure_sqlite(app)
         db.create_all()
         
         # Create default admin user
@@ -54,9 +145,44 @@ def create_app():
             db.session.commit()
             print("Default admin user created!")
     
+    # gunicorn/waitress altında da ve yeniden başlatmadan sonra yeni test gelmese de kuyruktaki
+    # testler alınır. Tek seferlik betikler, worker.py ve süreç havuzu worker'ları start_workers=False verir
+    if start_workers and app.config['WEB_RUNS_TESTS']:
+        start_background_workers(app)
+    # Toplu işlemler (silme) web sürecinde çalışır; yeniden başlatmada yarıda kalanlar sürdürülür
+    if start_workers:
+        app.extensions['bulk_jobs'].start()
+    
     return app
 
+
+def start_background_workers(app):
+    """Tarayıcı havuzunu, test runner'ı ve zamanlayıcıyı başlat (tekrar çağrılması zararsızdır)"""
+    app.extensions['browser_pool'].start()
+    app.extensions['test_runner'].start()
+    app.extensions['test_scheduler'].start()
+
+# load_user her istekte çalışır; kullanıcı kaydının kolonları kısa süre bellekte tutulur
+_user_cache = {}
+_user_cache_lock = threading.Lock()
+
 @login_manager.user_loader
 def load_user(user_id):
     from app.models import User
-    return User.query.get(int(user_id))
\ No newline at end of file
+    user_id = int(user_id)
+    ttl = current_app.config.get('USER_CACHE_TTL', 60)
+    
+    with _user_cache_lock:
+        cached = _user_cache.get(user_id)
+    if cached and cached[0] > time.monotonic():
+        # Sorgu çalıştırmadan bu isteğin oturumuna bağla
+        user = User(**cached[1])
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
+    user = db.session.get(User, user_id)
+    if user is not None and ttl > 0:
+        columns = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+        with _user_cache_lock:
+            _user_cache[user_id] = (time.monotonic() + ttl, columns)
+    return user
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""Test çalışmalarının ekleri: ekran görüntüleri, agent geçmişi ve indirilen dosyalar.
+
+İçerik diskte SHA-256 özetine göre saklanır (``<kök>/ab/cd/<özet>``); aynı
+ekran görüntüsü yüzlerce çalışmada tekrar etse de tek kopya tutulur. Metin
+türündeki içerik gzip ile sıkıştırılır. Veritabanında (Artifact) yalnızca
+özet, ad ve boyut gibi küçük referanslar bulunur; içerik sonuç sayfasından
+ayrı bir endpoint ile akış olarak okunur.
+"""
+
+from app import db
+from app.models import Artifact
+import base64
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import time
+
+# Bu türler zaten sıkıştırılmış olduğundan olduğu gibi saklanır
+COMPRESSED_TYPES = ('image/', 'video/', 'application/zip', 'application/gzip', 'application/pdf',
+                    'application/vnd.openxmlformats')
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ArtifactStore:
+    """İçerik adresli, sıkıştırmalı ve tekilleştirmeli dosya deposu"""
+
+    def __init__(self, app=None):
+        self.root = None
+        self.release_grace = 600
+        # put() ile release() aynı süreçte birbirinin arasına girmesin
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.root = app.config['ARTIFACT_DIR']
+        self.release_grace = app.config.get('ARTIFACT_RELEASE_GRACE', 600)
+        app.extensions['artifact_store'] = self
+
+    def path_for(self, sha256, compressed):
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256 + ('.gz' if compressed else ''))
+
+    def put(self, data, content_type):
+        """İçeriği sakla (zaten varsa yazmadan); (sha256, compressed) döner
+
+        Var olan dosyanın değiştirilme zamanı yenilenir; Artifact kaydı henüz
+        yazılmamış bu içerik release() tarafından bekleme süresi boyunca silinmez.
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        compressed = not content_type.startswith(COMPRESSED_TYPES)
+        path = self.path_for(sha256, compressed)
+        with self._lock:
+            try:
+                os.utime(path)
+                return sha256, compressed
+            except FileNotFoundError:
+                pass
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Yarım yazılmış dosya okunmasın diye geçici dosyaya yazılıp taşınır
+            temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=6) if compressed else data)
+            os.replace(temp_path, path)
+        return sha256, compressed
+
+    def iter_content(self, artifact):
+        """Ekin (gerekirse açılmış) içeriğini parça parça döndür"""
+        path = self.path_for(artifact.sha256, artifact.compressed)
+        opener = gzip.open if artifact.compressed else open
+        with opener(path, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    def store_agent_outputs(self, agent, prefix=''):
+        """Agent'ın ekran görüntülerini, geçmişini ve indirdiği dosyaları sakla.
+
+        Artifact alanlarını içeren sözlük listesi döner (veritabanına yazmak çağıranın işi).
+        """
+        stored = []
+        for kind, name, step, data, content_type in collect_agent_outputs(agent):
+            sha256, compressed = self.put(data, content_type)
+            stored.append({
+                'kind': kind,
+                'name': prefix + name,
+                'step': step,
+                'sha256': sha256,
+                'content_type': content_type,
+                'size': len(data),
+                'compressed': compressed,
+            })
+        return stored
+
+    def release(self, hashes):
+        """Artık hiçbir Artifact kaydının göstermediği içerikleri diskten sil (app context içinde)
+
+        Son ``release_grace`` saniye içinde put() ile yazılan veya tekrar kullanılan
+        dosyalar atlanır: başka bir çalışma bu içeriğe tekilleştirmiş, ancak Artifact
+        kaydını henüz yazmamış olabilir.
+        """
+        if not hashes:
+            return 0
+        referenced = {row.sha256 for row in db.session.query(Artifact.sha256).filter(
+            Artifact.sha256.in_(hashes)
+        ).distinct()}
+        removed = 0
+        with self._lock:
+            cutoff = time.time() - self.release_grace
+            for sha256 in set(hashes) - referenced:
+                for compressed in (True, False):
+                    path = self.path_for(sha256, compressed)
+                    try:
+                        if os.path.getmtime(path) > cutoff:
+                            continue
+                        os.remove(path)
+                    except FileNotFoundError:
+                        continue
+                    removed += 1
+        return removed
+
+
+def collect_agent_outputs(agent):
+    """Agent'tan saklanacak içerikler: [(kind, name, step, bytes, content_type)]"""
+    outputs = []
+    history = getattr(agent, 'history', None)
+    items = getattr(history, 'history', None) or []
+
+    for step, item in enumerate(items, start=1):
+        data = _screenshot_bytes(getattr(item, 'state', None))
+        if data:
+            outputs.append(('screenshot', f'adim-{step:03d}.png', step, data, 'image/png'))
+
+    if items:
+        outputs.append(('history', 'agent-history.json', None, _history_json(history), 'application/json'))
+
+    browser_session = getattr(agent, 'browser_session', None)
+    for path in getattr(browser_session, 'downloaded_files', None) or []:
+        if not os.path.isfile(path):
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        name = os.path.basename(path)
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        outputs.append(('download', name, None, data, content_type))
+    return outputs
+
+
+def _screenshot_bytes(state):
+    # browser-use sürümüne göre ekran görüntüsü base64 metin veya dosya yolu olarak gelir
+    path = getattr(state, 'screenshot_path', None)
+    if path and os.path.isfile(path):
+        with open(path, 'rb') as f:
+            return f.read()
+    screenshot = getattr(state, 'screenshot', None)
+    if not screenshot:
+        return None
+    try:
+        return base64.b64decode(screenshot)
+    except (ValueError, TypeError):
+        return None
+
+
+def _history_json(history):
+    """Ekran görüntüleri çıkarılmış agent geçmişi (görüntüler ayrı ek olarak saklanır)"""
+    model_dump = getattr(history, 'model_dump', None)
+    if not callable(model_dump):
+        return json.dumps(str(history), ensure_ascii=False).encode('utf-8')
+    return json.dumps(_strip_screenshots(model_dump()), ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _strip_screenshots(value):
+    if isinstance(value, dict):
+        return {key: _strip_screenshots(item) for key, item in value.items() if key != 'screenshot'}
+    if isinstance(value, list):
+        return [_strip_screenshots(item) for item in value]
+    return value
+
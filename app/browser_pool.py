@@ -0,0 +1,367 @@
+from urllib.request import urlopen
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # RSS ölçümü için opsiyonel
+    psutil = None
+
+
+def cdp_call(ws_url, method, params=None, timeout=10, target_id=None):
+    """Tarayıcı seviyesindeki CDP websocket'ine tek bir komut gönder (target_id verilirse o sekmede)"""
+    from websockets.sync.client import connect
+
+    with connect(ws_url, open_timeout=timeout, max_size=None) as ws:
+        def send(message_id, method, params, session_id=None):
+            message = {'id': message_id, 'method': method, 'params': params or {}}
+            if session_id is not None:
+                message['sessionId'] = session_id
+            ws.send(json.dumps(message))
+            while True:
+                reply = json.loads(ws.recv(timeout=timeout))
+                if reply.get('id') != message_id:
+                    continue  # Olay mesajlarını atla
+                if 'error' in reply:
+                    raise RuntimeError(f"CDP {method} hatası: {reply['error']}")
+                return reply.get('result', {})
+
+        session_id = None
+        if target_id is not None:
+            session_id = send(1, 'Target.attachToTarget', {'targetId': target_id, 'flatten': True})['sessionId']
+        return send(2, method, params, session_id)
+
+
+def find_chrome_executable():
+    for name in ('chromium', 'chromium-browser', 'google-chrome', 'google-chrome-stable', 'chrome'):
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+class BrowserProcess:
+    """CDP portu açık, önceden başlatılmış tek bir Chromium süreci"""
+
+    def __init__(self, executable, headless, extra_args=None):
+        self.executable = executable
+        self.headless = headless
+        self.extra_args = extra_args or []
+        self.process = None
+        self.user_data_dir = None
+        self.ws_url = None
+        self.http_url = None
+        self.runs = 0
+        self.active_leases = 0
+        self.retiring = False
+
+    def start(self, timeout=30):
+        self.user_data_dir = tempfile.mkdtemp(prefix='browser-pool-')
+        args = [
+            self.executable,
+            '--remote-debugging-port=0',
+            f'--user-data-dir={self.user_data_dir}',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--disable-background-networking',
+        ]
+        if self.headless:
+            args.append('--headless=new')
+        args.extend(self.extra_args)
+        args.append('about:blank')
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # Chromium seçtiği portu user-data-dir içindeki DevToolsActivePort dosyasına yazar
+        port_file = os.path.join(self.user_data_dir, 'DevToolsActivePort')
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Chromium başlatılamadı (çıkış kodu {self.process.returncode})")
+            if os.path.exists(port_file):
+                with open(port_file) as f:
+                    lines = f.read().split()
+                if len(lines) >= 2:
+                    self.http_url = f'http://127.0.0.1:{lines[0]}'
+                    self.ws_url = f'ws://127.0.0.1:{lines[0]}{lines[1]}'
+                    return
+            time.sleep(0.1)
+        self.stop()
+        raise RuntimeError("Chromium CDP portu zamanında açılmadı")
+
+    def healthy(self):
+        if self.process is None or self.process.poll() is not None:
+            return False
+        try:
+            with urlopen(f'{self.http_url}/json/version', timeout=5) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    def rss_mb(self):
+        """Süreç ağacının toplam bellek kullanımı (MB); ölçülemezse 0"""
+        if self.process is None:
+            return 0
+        if psutil is not None:
+            try:
+                root = psutil.Process(self.process.pid)
+                processes = [root] + root.children(recursive=True)
+                return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+            except psutil.Error:
+                return 0
+        # psutil yoksa sadece ana sürecin RSS değeri (Linux)
+        try:
+            with open(f'/proc/{self.process.pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return 0
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+class BrowserLease:
+    """Bir test çalışmasına ayrılmış izole (incognito) tarayıcı context'i"""
+
+    def __init__(self, process, browser_context_id, target_id):
+        self.process = process
+        self.browser_context_id = browser_context_id
+        self.target_id = target_id
+
+    @property
+    def cdp_url(self):
+        return self.process.ws_url
+
+    def load_storage_state(self, storage_state):
+        """Kayıtlı oturumun cookie ve localStorage değerlerini bu context'e yükle"""
+        cookies = [_cookie_param(cookie) for cookie in storage_state.get('cookies') or []]
+        if cookies:
+            cdp_call(self.cdp_url, 'Storage.setCookies', {
+                'cookies': cookies,
+                'browserContextId': self.browser_context_id
+            })
+        for origin in storage_state.get('origins') or []:
+            for item in origin.get('localStorage') or []:
+                cdp_call(self.cdp_url, 'DOMStorage.setDOMStorageItem', {
+                    'storageId': {'securityOrigin': origin['origin'], 'isLocalStorage': True},
+                    'key': item['name'],
+                    'value': item['value']
+                }, target_id=self.target_id)
+
+    def storage_state(self):
+        """Context'in cookie'leri ve açık sayfanın localStorage'ı (Playwright storage_state biçiminde)"""
+        cookies = cdp_call(self.cdp_url, 'Storage.getCookies', {
+            'browserContextId': self.browser_context_id
+        }).get('cookies', [])
+        page = cdp_call(self.cdp_url, 'Runtime.evaluate', {
+            'expression': 'JSON.stringify({origin: location.origin, items: Object.entries(localStorage)})',
+            'returnByValue': True
+        }, target_id=self.target_id).get('result', {}).get('value')
+        origins = []
+        if page:
+            page = json.loads(page)
+            if page['items'] and page['origin'] != 'null':
+                origins.append({
+                    'origin': page['origin'],
+                    'localStorage': [{'name': name, 'value': value} for name, value in page['items']]
+                })
+        return {'cookies': [_storage_cookie(cookie) for cookie in cookies], 'origins': origins}
+
+
+def _cookie_param(cookie):
+    # Playwright cookie'si -> CDP CookieParam (oturum cookie'lerinde expires -1 gelir)
+    param = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')
+             if cookie.get(key) is not None}
+    if cookie.get('expires', -1) >= 0:
+        param['expires'] = cookie['expires']
+    return param
+
+
+def _storage_cookie(cookie):
+    # CDP Cookie -> Playwright cookie'si
+    return {
+        'name': cookie['name'],
+        'value': cookie['value'],
+        'domain': cookie['domain'],
+        'path': cookie['path'],
+        'expires': -1 if cookie.get('session') else cookie.get('expires', -1),
+        'httpOnly': cookie.get('httpOnly', False),
+        'secure': cookie.get('secure', False),
+        'sameSite': cookie.get('sameSite', 'Lax'),
+    }
+
+
+async def attach_session(browser_session, lease):
+    """browser-use oturumunu kiralanan context'in sekmesine bağla.
+
+    Tarayıcı seviyesindeki websocket'e bağlanan oturum aksi halde varsayılan
+    context'te (diğer kiralarla ortak cookie ve sekmelerle) çalışır.
+    """
+    focus = getattr(browser_session, 'get_or_create_cdp_session', None)
+    if focus is None:
+        raise RuntimeError("browser-use sürümü kiralanan sekmeye bağlanmayı desteklemiyor")
+    start = getattr(browser_session, 'start', None)
+    if start is not None:
+        await start()
+    await focus(target_id=lease.target_id, focus=True)
+
+
+class BrowserPool:
+    """Önceden başlatılmış Chromium süreçleri havuzu.
+
+    Her test, süreçlerden birinde yeni bir browser context (incognito profil)
+    kiralar; cookie ve storage izolasyonu yeni tarayıcı açmakla aynıdır, ancak
+    başlangıç maliyeti sadece context oluşturmak kadardır. Süreçler N testten
+    sonra veya bellek sınırı aşıldığında yenilenir.
+    """
+
+    def __init__(self, app=None):
+        self.size = 0
+        self._processes = []
+        self._condition = threading.Condition()
+        self._started = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.size = app.config.get('BROWSER_POOL_SIZE', 0)
+        self.contexts_per_process = max(1, app.config.get('BROWSER_POOL_CONTEXTS_PER_PROCESS', 2))
+        self.max_runs = app.config.get('BROWSER_POOL_MAX_RUNS', 50)
+        self.max_rss_mb = app.config.get('BROWSER_POOL_MAX_RSS_MB', 1500)
+        self.health_interval = app.config.get('BROWSER_POOL_HEALTH_INTERVAL', 30)
+        self.lease_timeout = app.config.get('BROWSER_POOL_LEASE_TIMEOUT', 300)
+        self.headless = app.config.get('BROWSER_POOL_HEADLESS', True)
+        self.executable = app.config.get('CHROME_PATH') or find_chrome_executable()
+        app.extensions['browser_pool'] = self
+
+    @property
+    def enabled(self):
+        return self.size > 0 and self.executable is not None
+
+    def start(self):
+        if not self.enabled:
+            return
+        with self._condition:
+            if self._started:
+                return
+            self._started = True
+            for _ in range(self.size):
+                self._processes.append(self._launch())
+
+        threading.Thread(target=self._health_loop, name='browser-pool-health', daemon=True).start()
+        print(f"Tarayıcı havuzu başlatıldı: {self.size} süreç x {self.contexts_per_process} context")
+
+    def _launch(self):
+        process = BrowserProcess(self.executable, self.headless)
+        process.start()
+        return process
+
+    def lease(self):
+        """Boşta kapasitesi olan süreçte yeni bir izole context aç"""
+        self.start()
+        deadline = time.time() + self.lease_timeout
+        with self._condition:
+            while True:
+                candidates = [
+                    p for p in self._processes
+                    if not p.retiring and p.active_leases < self.contexts_per_process
+                ]
+                if candidates:
+                    process = min(candidates, key=lambda p: p.active_leases)
+                    process.active_leases += 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise RuntimeError("Tarayıcı havuzunda boş yer bulunamadı")
+                self._condition.wait(remaining)
+
+        try:
+            context = cdp_call(process.ws_url, 'Target.createBrowserContext', {'disposeOnDetach': False})
+            target = cdp_call(process.ws_url, 'Target.createTarget', {
+                'url': 'about:blank',
+                'browserContextId': context['browserContextId']
+            })
+        except Exception:
+            with self._condition:
+                process.active_leases -= 1
+                process.retiring = True  # Yanıt vermeyen süreç yenilenecek
+                self._condition.notify_all()
+            raise
+        return BrowserLease(process, context['browserContextId'], target['targetId'])
+
+    def release(self, lease):
+        """Context'i (cookie, storage, sekmeler) yok et ve yeri boşalt"""
+        process = lease.process
+        try:
+            cdp_call(process.ws_url, 'Target.disposeBrowserContext', {
+                'browserContextId': lease.browser_context_id
+            })
+        except Exception as e:
+            print(f"Browser context kapatma hatası: {e}")
+            process.retiring = True
+
+        with self._condition:
+            process.active_leases -= 1
+            process.runs += 1
+            if process.runs >= self.max_runs or (self.max_rss_mb and process.rss_mb() > self.max_rss_mb):
+                process.retiring = True
+            self._condition.notify_all()
+        self._recycle_idle()
+
+    def _recycle_idle(self):
+        """Emekliye ayrılan ve boşta kalan süreçleri yenileriyle değiştir.
+
+        Chromium başlatmak saniyeler sürebildiğinden kilit dışında yapılır;
+        bu sırada diğer süreçlerden kiralama ve bırakma devam eder.
+        """
+        with self._condition:
+            idle = [p for p in self._processes if p.retiring and p.active_leases == 0]
+            self._processes = [p for p in self._processes if p not in idle]
+        for process in idle:
+            process.stop()
+            try:
+                replacement = self._launch()
+            except Exception as e:
+                print(f"Chromium yeniden başlatılamadı: {e}")
+                replacement = process  # Bir sonraki yenilemede tekrar denenir
+            with self._condition:
+                if self._started:
+                    self._processes.append(replacement)
+                    self._condition.notify_all()
+                    continue
+            replacement.stop()  # Bu arada havuz kapatıldı
+
+    def _health_loop(self):
+        while True:
+            time.sleep(self.health_interval)
+            with self._condition:
+                processes = [p for p in self._processes if not p.retiring]
+            # Sağlık kontrolü HTTP isteği yapar; kiralamaları bekletmemek için kilit dışında
+            unhealthy = [p for p in processes if not p.healthy()]
+            if unhealthy:
+                print(f"Sağlıksız {len(unhealthy)} Chromium süreci yenilenecek")
+                with self._condition:
+                    for process in unhealthy:
+                        process.retiring = True
+            self._recycle_idle()
+
+    def shutdown(self):
+        with self._condition:
+            for process in self._processes:
+                process.stop()
+            self._processes = []
+            self._started = False
@@ -0,0 +1,236 @@
+"""Test sonuçları üzerinde toplu silme ve yeniden çalıştırma.
+
+Seçili birkaç kayıt üzerindeki işlemler tek bir küme (set-based) sorgusuyla
+istek içinde yapılır. Filtreye uyan tüm sonuçların veya bir projenin
+geçmişinin silinmesi gibi büyük işlemler BulkJob olarak kaydedilir ve
+ayrı bir thread'de ``BULK_CHUNK_SIZE`` kayıtlık transaction'larla yürütülür;
+böylece istek zaman aşımına uğramaz, veritabanı uzun süre kilitlenmez ve
+ilerleme sayfadan izlenebilir.
+"""
+
+from app import db
+from app.models import (ActionTrace, Artifact, BulkJob, Project, SessionSnapshot, TestPrompt, TestResult,
+                        TestSchedule, TestStep, TestSuiteRun)
+from app.sqlite import run_with_retry
+from app.stats import record_project_change, record_transitions, transition_rows
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import json
+import threading
+
+# Sonuç filtrelerinde kullanılabilen TestResult alanları
+RESULT_FILTERS = ('project_id', 'prompt_id', 'status')
+
+PROJECT_RUNNING_MESSAGE = 'Projede çalışan testler var; testler bittikten veya durdurulduktan sonra tekrar deneyin.'
+
+
+def owned_results(user_id, filters=None, ids=None):
+    """Kullanıcının projelerindeki, filtreye ve (verildiyse) id listesine uyan sonuçlar"""
+    query = TestResult.query.filter(
+        TestResult.user_id == user_id,
+        TestResult.project_id.in_(db.select(Project.id).where(Project.user_id == user_id))
+    )
+    for name, value in (filters or {}).items():
+        if name in RESULT_FILTERS and value:
+            query = query.filter(getattr(TestResult, name) == value)
+    if ids is not None:
+        query = query.filter(TestResult.id.in_(ids))
+    return query
+
+
+def delete_results(results_query):
+    """Sorgudaki test sonuçlarını log adımları ve ekleriyle toplu sil.
+
+    Silinen eklerin içerik özetlerini döndürür; commit'ten sonra release_artifacts'e verilmelidir.
+    """
+    record_transitions(transition_rows(results_query), None)
+    result_ids = results_query.with_entities(TestResult.id).scalar_subquery()
+    artifacts = Artifact.query.filter(Artifact.test_result_id.in_(result_ids))
+    artifact_hashes = {row.sha256 for row in artifacts.with_entities(Artifact.sha256).distinct()}
+    artifacts.delete(synchronize_session=False)
+    TestStep.query.filter(TestStep.test_result_id.in_(result_ids)).delete(synchronize_session=False)
+    results_query.delete(synchronize_session=False)
+    return artifact_hashes
+
+
+def finished_results(results_query):
+    """Silinebilecek sonuçlar: çalışan testler hariç (runner onların sonucunu ve log adımlarını yazmaya devam eder)"""
+    return results_query.filter(TestResult.status != 'running')
+
+
+def has_running_results(results_query):
+    return results_query.filter(TestResult.status == 'running').first() is not None
+
+
+def release_artifacts(app, artifact_hashes):
+    """Başka çalışmalarca kullanılmayan ek içeriklerini diskten sil"""
+    try:
+        app.extensions['artifact_store'].release(artifact_hashes)
+    except OSError as e:
+        print(f"Ek dosyaları silinemedi: {e}")
+
+
+def delete_project_records(project):
+    """Sonuçları silinmiş projeyi prompt'ları ve ilişkili kayıtlarıyla sil (commit çağırana ait)"""
+    prompt_ids = db.select(TestPrompt.id).where(TestPrompt.project_id == project.id)
+    TestSchedule.query.filter(TestSchedule.prompt_id.in_(prompt_ids)).delete(synchronize_session=False)
+    ActionTrace.query.filter_by(project_id=project.id).delete()
+    SessionSnapshot.query.filter_by(project_id=project.id).delete()
+    TestSuiteRun.query.filter_by(project_id=project.id).delete()
+    TestPrompt.query.filter_by(project_id=project.id).delete()
+    record_project_change(project.user_id, -1)
+    db.session.delete(project)
+
+
+def rerun_results(user_id, ids):
+    """Seçili sonuçların prompt'larını aynı URL ile tek INSERT ... SELECT sorgusuyla yeniden kuyruğa ekle.
+
+    Yeni test sonuçlarının id'lerini döndürür.
+    """
+    source = owned_results(user_id, ids=ids).with_entities(
+        TestResult.project_id,
+        TestResult.prompt_id,
+        db.literal(user_id),
+        db.literal('pending'),
+        TestResult.project_url,
+        db.literal(datetime.utcnow())
+    ).order_by(TestResult.id)
+    inserted = db.session.execute(db.insert(TestResult).from_select(
+        ['project_id', 'prompt_id', 'user_id', 'status', 'project_url', 'created_at'], source
+    ).returning(TestResult.id))
+    test_result_ids = inserted.scalars().all()
+    db.session.commit()
+    return test_result_ids
+
+
+def recent_jobs(user_id, minutes=10):
+    """Kullanıcının süren veya son dakikalarda ilerleme kaydetmiş toplu işlemleri"""
+    since = datetime.utcnow() - timedelta(minutes=minutes)
+    return BulkJob.query.filter(
+        BulkJob.user_id == user_id,
+        BulkJob.updated_at >= since
+    ).order_by(BulkJob.id.desc()).all()
+
+
+class BulkJobRunner:
+    """BulkJob kayıtlarını tek bir arka plan thread'inde sırayla çalıştırır.
+
+    Silme işlemleri tekrarlanabilir olduğundan yarıda kalan (süreç yeniden
+    başlatılan) bir iş aynı filtreyle yeniden başlatılarak tamamlanabilir.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.chunk_size = 500
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.chunk_size = max(1, app.config.get('BULK_CHUNK_SIZE', 500))
+        app.extensions['bulk_jobs'] = self
+
+    def create(self, user_id, action, params, description):
+        """İşi kaydet ve kuyruğa al (istek içinden çağrılır); BulkJob döner"""
+        job = BulkJob(user_id=user_id, action=action, params=json.dumps(params), description=description)
+        db.session.add(job)
+        db.session.commit()
+        self.submit(job.id)
+        return job
+
+    def start(self):
+        """Süreç yeniden başlatıldığında yarıda kalan işleri kaldığı yerden sürdür"""
+        with self.app.app_context():
+            interrupted = db.session.query(BulkJob.id, BulkJob.updated_at).filter(
+                BulkJob.status.in_(('pending', 'running'))
+            ).all()
+            resumed = []
+            for job in interrupted:
+                # Aynı anda başlayan diğer süreçler (ör. gunicorn worker'ları) aynı işi almaz
+                if BulkJob.query.filter(
+                    BulkJob.id == job.id,
+                    BulkJob.status.in_(('pending', 'running')),
+                    BulkJob.updated_at == job.updated_at
+                ).update({'status': 'pending', 'updated_at': datetime.utcnow()}, synchronize_session=False):
+                    resumed.append(job.id)
+            db.session.commit()
+        for job_id in resumed:
+            self.submit(job_id)
+        if resumed:
+            print(f"Yarıda kalan {len(resumed)} toplu işlem yeniden başlatıldı")
+
+    def submit(self, job_id):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bulk-job')
+        self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            # Başka bir süreç işi zaten aldıysa rowcount 0 döner
+            claimed = BulkJob.query.filter_by(id=job_id, status='pending').update({
+                'status': 'running', 'updated_at': datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+            if not claimed:
+                return
+            job = db.session.get(BulkJob, job_id)
+            try:
+                if job.action == 'delete_results':
+                    self._delete_results(job)
+                elif job.action == 'delete_project':
+                    self._delete_project(job)
+                else:
+                    raise ValueError(f"Bilinmeyen toplu işlem: {job.action}")
+                status, message = 'completed', None
+            except Exception as e:
+                db.session.rollback()
+                print(f"Toplu işlem hatası (iş {job_id}): {e}")
+                status, message = 'failed', str(e)
+            BulkJob.query.filter_by(id=job_id).update({
+                'status': status, 'message': message, 'finished_at': datetime.utcnow(),
+                'updated_at': datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+
+    def _delete_in_chunks(self, job, results_query):
+        """Sorgudaki sonuçları chunk_size'lık transaction'larla sil, ilerlemeyi işe yaz"""
+        BulkJob.query.filter_by(id=job.id).update({
+            'total': results_query.count(), 'processed': 0
+        }, synchronize_session=False)
+        db.session.commit()
+        while True:
+            ids = [row.id for row in results_query.with_entities(TestResult.id).order_by(
+                TestResult.id
+            ).limit(self.chunk_size)]
+            if not ids:
+                break
+            artifact_hashes = run_with_retry(self.app, self._delete_chunk, job.id, ids)
+            release_artifacts(self.app, artifact_hashes)
+
+    def _delete_chunk(self, job_id, ids):
+        artifact_hashes = delete_results(TestResult.query.filter(TestResult.id.in_(ids)))
+        BulkJob.query.filter_by(id=job_id).update({
+            'processed': BulkJob.processed + len(ids), 'updated_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        return artifact_hashes
+
+    def _delete_results(self, job):
+        self._delete_in_chunks(job, finished_results(owned_results(job.user_id, job.params_dict)))
+
+    def _delete_project(self, job):
+        project = Project.query.filter_by(id=job.params_dict['project_id'], user_id=job.user_id).first()
+        if project is None:
+            return
+        results_query = TestResult.query.filter_by(project_id=project.id)
+        if has_running_results(results_query):
+            raise ValueError(PROJECT_RUNNING_MESSAGE)
+        self._delete_in_chunks(job, finished_results(results_query))
+        # Silme sürerken kuyruktan alınan bir test varsa proje silinmez
+        if results_query.first() is not None:
+            raise ValueError(PROJECT_RUNNING_MESSAGE)
+        delete_project_records(project)
+        db.session.commit()
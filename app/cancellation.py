@@ -0,0 +1,79 @@
+import threading
+
+
+class TestStopped(Exception):
+    """Test kullanıcı tarafından durdurulduğunda fırlatılır"""
+
+
+class CancelToken:
+    """Tek bir test çalışmasının iptal sinyali.
+
+    cancel() herhangi bir thread'den çağrılabilir; kayıtlı callback'ler
+    (örneğin asyncio görevini iptal eden) hemen çalıştırılır.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"İptal callback hatası: {e}")
+
+    def add_callback(self, callback):
+        """İptal anında çağrılacak fonksiyonu ekle (zaten iptal edildiyse hemen çağır)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise TestStopped()
+
+
+class CancellationRegistry:
+    """Bu süreçte çalışan testlerin iptal sinyalleri (test_result_id -> CancelToken)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+
+    def register(self, test_result_id):
+        with self._lock:
+            token = self._tokens.get(test_result_id)
+            if token is None:
+                token = CancelToken()
+                self._tokens[test_result_id] = token
+            return token
+
+    def unregister(self, test_result_id):
+        with self._lock:
+            self._tokens.pop(test_result_id, None)
+
+    def cancel(self, test_result_id):
+        """Test bu süreçte çalışıyorsa iptal et; bulunamazsa False döner"""
+        with self._lock:
+            token = self._tokens.get(test_result_id)
+        if token is None:
+            return False
+        token.cancel()
+        return True
+
+
+# Uygulama genelinde tek iptal kaydı
+cancellations = CancellationRegistry()
@@ -0,0 +1,239 @@
+from app import db
+from app.models import TestResult, TestStep
+from collections import deque
+import threading
+import time
+
+
+class EventBus:
+    """Süreç içi yayın/abone kanalı.
+
+    Bu süreçte (veya süreç havuzunda) çalışan testlerin olayları buraya
+    yayınlanır; SSE bağlantıları veritabanını yoklamadan bu olayları bekler.
+    Her test kanalı son olayları halka tamponda tutar, aboneler kendi
+    konumlarını izler (abone başına kuyruk veya thread yok). Ayrı worker.py
+    süreçlerinde çalışan testlerin olayları buraya gelmez; izlenen bu
+    kanalları süreç başına tek bir StreamPoller veritabanından doldurur.
+    """
+
+    def __init__(self, history_size=500, idle_timeout=600):
+        self.history_size = history_size
+        # Abonesi olmayan ve bu süre (saniye) olay almayan kanal bırakılır (yayıncısı final
+        # olayını göndermeden ölen testler)
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._forward_queue = None
+
+    def forward_to(self, queue):
+        """Olayları yerelde tutmak yerine kuyruğa ilet (worker süreçlerinde kullanılır)"""
+        self._forward_queue = queue
+
+    def _channel(self, test_result_id):
+        channel = self._channels.get(test_result_id)
+        if channel is None:
+            self._expire_idle()
+            channel = _Channel(self.history_size, self._lock)
+            self._channels[test_result_id] = channel
+        return channel
+
+    def _expire_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        for test_result_id, channel in list(self._channels.items()):
+            if channel.subscribers <= 0 and channel.last_activity < cutoff:
+                del self._channels[test_result_id]
+
+    def expire_idle(self):
+        """Abonesi olmayan, uzun süredir olay almayan kanalları bırak"""
+        with self._lock:
+            self._expire_idle()
+
+    def publish(self, test_result_id, data, event_id=None, final=False, local=True):
+        """Olayı yayınla; final=True testin bittiğini bildirir.
+
+        local=False, olayın bu süreçte çalışan testten değil veritabanı
+        yoklamasından geldiğini belirtir.
+        """
+        if self._forward_queue is not None:
+            self._forward_queue.put(('event', test_result_id, data, event_id, final))
+            return
+        with self._lock:
+            channel = self._channel(test_result_id)
+            channel.position += 1
+            channel.last_activity = time.monotonic()
+            if local:
+                channel.published = True
+                channel.last_published = channel.last_activity
+            if data is not None:
+                channel.status = data['status']
+                if data['new_logs']:
+                    channel.cursor = max(channel.cursor or 0, data['new_logs'][-1]['seq'])
+            channel.events.append((channel.position, event_id, data))
+            channel.closed = final
+            channel.condition.notify_all()
+            # Dinleyeni olmayan biten kanalları hemen bırak
+            if final and channel.subscribers == 0:
+                del self._channels[test_result_id]
+
+    def subscribe(self, test_result_id):
+        """Kanala abone ol ve başlangıç konumunu döndür"""
+        with self._lock:
+            channel = self._channel(test_result_id)
+            channel.subscribers += 1
+            channel.last_activity = time.monotonic()
+            return channel.position
+
+    def seen(self, test_result_id, cursor, status):
+        """Abonenin veritabanından okuduğu durum; yoklama buradan sonrasını getirir"""
+        with self._lock:
+            channel = self._channels.get(test_result_id)
+            if channel is None:
+                return
+            channel.cursor = max(channel.cursor or 0, cursor)
+            if channel.status is None:
+                channel.status = status
+
+    def unsubscribe(self, test_result_id):
+        with self._lock:
+            channel = self._channels.get(test_result_id)
+            if channel is None:
+                return
+            channel.subscribers -= 1
+            channel.last_activity = time.monotonic()
+            # Yalnızca aboneler için açılmış (bu süreçte yayıncısı olmayan) kanal da bırakılır;
+            # bitmiş veya başka süreçte çalışan testlerin kanalları birikmez
+            if channel.subscribers <= 0 and (channel.closed or not channel.published):
+                del self._channels[test_result_id]
+
+    def stale_channels(self, interval):
+        """Veritabanından yoklanması gereken kanallar: {test_result_id: (cursor, status)}
+
+        Abonesi olan, bitmemiş ve son interval saniyede bu süreçten olay
+        almamış (başka süreçte çalışan veya yayıncısı duran) kanallar.
+        """
+        cutoff = time.monotonic() - interval
+        with self._lock:
+            return {
+                test_result_id: (channel.cursor, channel.status)
+                for test_result_id, channel in self._channels.items()
+                if channel.subscribers > 0 and not channel.closed and channel.cursor is not None
+                and channel.last_published < cutoff
+            }
+
+    def wait(self, test_result_id, position, timeout):
+        """position'dan sonraki olayları döndür; yoksa timeout kadar bekle.
+
+        Dönen değer (yeni_konum, [(event_id, data), ...], kayıp_var_mı) şeklindedir.
+        Abone halka tamponun gerisinde kaldıysa kayıp_var_mı True olur ve eksik
+        olaylar veritabanından tamamlanmalıdır. data None ise test silinmiştir.
+        """
+        with self._lock:
+            channel = self._channels.get(test_result_id)
+            if channel is None:
+                return position, [], False
+            channel.condition.wait_for(lambda: channel.position > position, timeout)
+            events = [(event_id, data) for pos, event_id, data in channel.events if pos > position]
+            missed = bool(channel.events) and channel.events[0][0] > position + 1
+            return channel.position, events, missed
+
+
+class _Channel:
+    def __init__(self, history_size, lock):
+        self.events = deque(maxlen=history_size)
+        self.condition = threading.Condition(lock)
+        self.position = 0
+        self.subscribers = 0
+        self.published = False  # Bu süreçte yayın yapılmış mı (yerel yayıncı)
+        self.last_published = 0.0  # Son yerel yayının zamanı (time.monotonic)
+        self.last_activity = time.monotonic()
+        self.cursor = None  # Abonelere ulaşan son log seq'i (yoklama buradan devam eder)
+        self.status = None
+        self.closed = False
+
+
+class StreamPoller:
+    """Başka süreçlerde çalışan testlerin canlı akışını veritabanından besler.
+
+    Süreç başına tek thread, SSE_POLL_INTERVAL aralıkla izlenen tüm kanalları
+    iki sorguyla okur ve yeni logları olay kanalına yayınlar; izleyici sayısı
+    veritabanı yükünü artırmaz. İlk canlı akış açıldığında başlar.
+    """
+
+    def __init__(self, app=None, event_bus=None):
+        self.app = None
+        self.bus = event_bus or bus
+        self.interval = 2
+        self._lock = threading.Lock()
+        self._started = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('SSE_POLL_INTERVAL', 2)
+        app.extensions['stream_poller'] = self
+
+    def start(self):
+        """Yoklama thread'ini başlat (birden fazla çağrılabilir)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._run, name='stream-poller', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Canlı akış yoklama hatası: {e}")
+            self.bus.expire_idle()
+
+    def poll(self):
+        """İzlenen kanalların yeni loglarını ve durum değişikliklerini yayınla"""
+        watched = self.bus.stale_channels(self.interval)
+        if not watched:
+            return
+        with self.app.app_context():
+            rows = db.session.query(
+                TestResult.id, TestResult.status, TestResult.current_step, TestResult.total_steps
+            ).filter(TestResult.id.in_(watched)).all()
+            steps = TestStep.query.filter(
+                TestStep.test_result_id.in_(watched),
+                TestStep.seq > min(cursor for cursor, _ in watched.values())
+            ).order_by(TestStep.test_result_id, TestStep.seq).all()
+            new_logs = {}
+            for step in steps:
+                if step.seq > watched[step.test_result_id][0]:
+                    new_logs.setdefault(step.test_result_id, []).append(step.to_dict())
+            db.session.remove()
+
+        for row in rows:
+            logs = new_logs.get(row.id, [])
+            if not logs and row.status == watched[row.id][1]:
+                continue
+            self.bus.publish(row.id, {
+                'status': row.status,
+                'current_step': row.current_step,
+                'total_steps': row.total_steps,
+                'new_logs': logs
+            }, event_id=logs[-1]['seq'] if logs else None,
+                final=row.status in TestResult.FINISHED_STATUSES, local=False)
+        # Silinen testlerin akışları kapanır
+        for test_result_id in set(watched) - {row.id for row in rows}:
+            self.bus.publish(test_result_id, None, final=True, local=False)
+
+
+# Uygulama genelinde tek olay kanalı
+bus = EventBus()
+
+
+def publish_status(test_result, final=False):
+    """TestResult'ın güncel durumunu olay kanalına yayınla"""
+    bus.publish(test_result.id, {
+        'status': test_result.status,
+        'current_step': test_result.current_step,
+        'total_steps': test_result.total_steps,
+        'new_logs': []
+    }, event_id=test_result.current_step, final=final)
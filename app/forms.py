@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, TextAreaField, SelectField, SubmitField, URLField
-from wtforms.validators import DataRequired, URL, Length
+from wtforms import StringField, TextAreaField, SelectField, SubmitField, URLField, IntegerField, BooleanField
+from wtforms.validators import DataRequired, URL, Length, Optional, NumberRange, ValidationError
 
 class ProjectForm(FlaskForm):
     name = StringField('Proje Adı', validators=[DataRequired(), Length(min=1, max=200)])
@@ -12,6 +12,8 @@ class TestPromptForm(FlaskForm):
     name = StringField('Prompt Adı', validators=[DataRequired(), Length(min=1, max=200)])
     content = TextAreaField('Prompt İçeriği', validators=[DataRequired()], 
                            render_kw={"rows": 10, "placeholder": "Test senaryonuz için prompt içeriğini buraya yazın..."})
+    tags = StringField('Etiketler', validators=[Optional(), Length(max=200)],
+                       render_kw={'placeholder': 'smoke, regresyon'})
     submit = SubmitField('Kaydet')
 
 class RunTestForm(FlaskForm):
@@ -24,5 +26,42 @@ class RunSingleTestForm(FlaskForm):
                           render_kw={'placeholder': 'https://example.com'})
     submit = SubmitField('Testi Çalıştır')
 
+class SuiteRunForm(FlaskForm):
+    tag = SelectField('Prompt\'lar', choices=[], validate_choice=False)
+    max_parallel = IntegerField('Paralel Test Sayısı', validators=[Optional(), NumberRange(min=0, max=100)],
+                                render_kw={'placeholder': '0 = sınırsız (TEST_WORKERS kadar)'})
+    project_url = URLField('Proje URL', validators=[Optional(), URL()],
+                           render_kw={'placeholder': 'Boş bırakılırsa proje URL\'si kullanılır'})
+    submit = SubmitField('Suite\'i Çalıştır')
+
+class ScheduleForm(FlaskForm):
+    enabled = BooleanField('Takvim aktif', default=True)
+    interval_minutes = IntegerField('Aralık (dakika)', validators=[Optional(), NumberRange(min=1)])
+    cron_expression = StringField('Cron İfadesi (UTC)', validators=[Optional(), Length(max=100)],
+                                  render_kw={'placeholder': '*/15 8-18 * * 1-5'})
+    jitter_seconds = IntegerField('Rastgele Gecikme (saniye)', default=0, validators=[Optional(), NumberRange(min=0, max=3600)])
+    catchup = SelectField('Kaçırılan Çalışmalar', choices=[
+        ('once', 'Bir kez çalıştır'),
+        ('skip', 'Atla')
+    ], default='once')
+    project_url = URLField('Proje URL', validators=[Optional(), URL()],
+                           render_kw={'placeholder': 'Boş bırakılırsa proje URL\'si kullanılır'})
+    submit = SubmitField('Kaydet')
+    
+    def validate_cron_expression(self, field):
+        from app.scheduler import CronExpression
+        try:
+            CronExpression(field.data)
+        except ValueError as e:
+            raise ValidationError(str(e))
+    
+    def validate(self, extra_validators=None):
+        if not super().validate(extra_validators):
+            return False
+        if bool(self.cron_expression.data) == bool(self.interval_minutes.data):
+            self.cron_expression.errors.append('Aralık veya cron ifadesinden yalnızca birini girin.')
+            return False
+        return True
+
 class LoginForm(FlaskForm):
     submit = SubmitField('Windows Kullanıcısı ile Giriş Yap')
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""Agent'ın LLM çağrıları için disk üzerinde yanıt önbelleği (opsiyonel).
+
+Aynı görev, aynı model ve değişmemiş sayfa durumu için LLM'e tekrar gitmek
+yerine önceki yanıt kullanılır. Anahtar; model adı, mesajlar (sistem/görev
+prompt'u ve normalize edilmiş sayfa durumu) ve istenirse ekran görüntüsü
+hash'inden oluşur. Kayıtlar SQLite dosyasında tutulur, TTL ile eskir ve
+toplam boyut sınırı aşılınca en az kullanılanlar silinir (LRU).
+
+LLM_CACHE=True ile açılır; web testleri ve izleme scriptleri aynı dosyayı
+paylaşabilir.
+"""
+
+from dotenv import load_dotenv
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Her adımda değişen ve yanıtı etkilemeyen satırlar (tarih/saat, adım sayacı)
+VOLATILE_PATTERNS = [
+    re.compile(r'^.*current date and time.*$', re.IGNORECASE | re.MULTILINE),
+    re.compile(r'^\s*step \d+ of \d+.*$', re.IGNORECASE | re.MULTILINE),
+    re.compile(r'\b\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?\b'),
+]
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class LLMResponseCache:
+    """Boyut sınırlı (LRU) ve TTL'li SQLite yanıt deposu"""
+
+    def __init__(self, path, ttl_seconds, max_bytes):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed ON llm_cache (accessed_at)')
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, created_at FROM llm_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute('UPDATE llm_cache SET accessed_at = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, value, len(value.encode('utf-8')), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """Süresi dolanları, ardından boyut sınırı aşılıyorsa en eski erişilenleri sil (kilit altında)"""
+        self._conn.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - self.ttl_seconds,))
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM llm_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute('SELECT key, size FROM llm_cache ORDER BY accessed_at').fetchall()
+        expired_keys = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            expired_keys.append((key,))
+            total -= size
+        self._conn.executemany('DELETE FROM llm_cache WHERE key = ?', expired_keys)
+
+
+class CachedChatModel:
+    """Agent'ın LLM nesnesini saran önbellekli vekil.
+
+    Sadece ainvoke() araya girer; diğer tüm özellikler (model, provider vb.)
+    asıl LLM nesnesinden okunur.
+    """
+
+    def __init__(self, llm, cache, include_screenshot=False):
+        self._llm = llm
+        self._cache = cache
+        self._include_screenshot = include_screenshot
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats_text(self):
+        stats = self.stats()
+        return f"LLM önbelleği: {stats['hits']} isabet, {stats['misses']} ıska (oran {stats['hit_rate']:.0%})"
+
+    def cache_key(self, messages, output_format=None):
+        model = getattr(self._llm, 'model', None) or getattr(self._llm, 'model_name', None) or type(self._llm).__name__
+        payload = {
+            'model': str(model),
+            'provider': str(getattr(self._llm, 'provider', '')),
+            'messages': [self._message_digest(message) for message in messages],
+            'output_format': _schema_digest(output_format),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _message_digest(self, message):
+        role = getattr(message, 'role', None) or type(message).__name__
+        content = getattr(message, 'content', message)
+        if isinstance(content, str):
+            return [role, normalize_text(content)]
+
+        parts = []
+        for part in content or []:
+            text = getattr(part, 'text', None)
+            if text is not None:
+                parts.append(normalize_text(text))
+                continue
+            image_url = getattr(part, 'image_url', None)
+            if image_url is not None:
+                if self._include_screenshot:
+                    url = getattr(image_url, 'url', image_url)
+                    parts.append('image:' + hashlib.sha256(str(url).encode('utf-8')).hexdigest())
+                continue
+            parts.append(normalize_text(str(part)))
+        return [role, parts]
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        # Disk erişimi event loop'u (aynı loop'taki diğer testleri) bekletmesin
+        loop = asyncio.get_running_loop()
+        try:
+            key = self.cache_key(messages, output_format)
+            cached = await loop.run_in_executor(None, self._cache.get, key)
+        except Exception as e:
+            print(f"LLM önbellek okuma hatası: {e}")
+            key, cached = None, None
+
+        if cached is not None:
+            try:
+                response = _decode_response(cached, output_format)
+                self.hits += 1
+                return response
+            except Exception as e:
+                print(f"LLM önbellek kaydı çözülemedi: {e}")
+
+        self.misses += 1
+        if output_format is None:
+            response = await self._llm.ainvoke(messages, **kwargs)
+        else:
+            response = await self._llm.ainvoke(messages, output_format, **kwargs)
+
+        if key is not None:
+            try:
+                await loop.run_in_executor(None, self._cache.set, key, _encode_response(response))
+            except Exception as e:
+                print(f"LLM önbellek yazma hatası: {e}")
+        return response
+
+
+def normalize_text(text):
+    """Sayfa durumu metnindeki değişken kısımları ve boşluk farklarını temizle"""
+    for pattern in VOLATILE_PATTERNS:
+        text = pattern.sub('', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _schema_digest(output_format):
+    if output_format is None:
+        return None
+    schema = getattr(output_format, 'model_json_schema', None)
+    if schema is not None:
+        return hashlib.sha256(json.dumps(schema(), sort_keys=True).encode('utf-8')).hexdigest()
+    return getattr(output_format, '__name__', str(output_format))
+
+
+def _encode_response(response):
+    completion = getattr(response, 'completion', response)
+    if hasattr(completion, 'model_dump'):
+        completion = completion.model_dump(mode='json')
+    return json.dumps({'completion': completion})
+
+
+def _decode_response(value, output_format):
+    completion = json.loads(value)['completion']
+    if output_format is not None and hasattr(output_format, 'model_validate'):
+        completion = output_format.model_validate(completion)
+
+    # Önbellekten gelen yanıt token harcamaz
+    try:
+        from browser_use.llm.views import ChatInvokeCompletion
+    except ImportError:
+        return completion
+    return ChatInvokeCompletion(completion=completion, usage=None)
+
+
+def get_cache(path, ttl_seconds, max_bytes):
+    """Aynı dosya için süreç içinde tek bağlantı kullan"""
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = LLMResponseCache(path, ttl_seconds, max_bytes)
+            _caches[path] = cache
+        return cache
+
+
+def cache_agent_llm(agent):
+    """LLM_CACHE açıksa agent'ın LLM'ini önbellekli vekille değiştir.
+
+    Önbellek kapalıysa veya agent'ta LLM yoksa None döner; aksi halde
+    isabet/ıska istatistikleri okunabilen CachedChatModel döner.
+    """
+    load_dotenv()
+    if os.getenv('LLM_CACHE', 'False').lower() != 'true':
+        return None
+    llm = getattr(agent, 'llm', None)
+    if llm is None:
+        return None
+    if isinstance(llm, CachedChatModel):
+        return llm
+
+    cache = get_cache(
+        os.getenv('LLM_CACHE_PATH', 'llm_cache.db'),
+        ttl_seconds=float(os.getenv('LLM_CACHE_TTL_HOURS', 24)) * 3600,
+        max_bytes=int(float(os.getenv('LLM_CACHE_MAX_MB', 200)) * 1024 * 1024)
+    )
+    cached_llm = CachedChatModel(
+        llm, cache,
+        include_screenshot=os.getenv('LLM_CACHE_INCLUDE_SCREENSHOT', 'False').lower() == 'true'
+    )
+    agent.llm = cached_llm
+    return cached_llm
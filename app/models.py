@@ -1,6 +1,7 @@
 from app import db
 from flask_login import UserMixin
 from datetime import datetime
+import json
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -34,33 +35,280 @@ class TestPrompt(db.Model):
     name = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    tags = db.Column(db.String(200))  # Virgülle ayrılmış, küçük harf etiketler (ör. "smoke,regresyon")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    @property
+    def tag_list(self):
+        return self.tags.split(',') if self.tags else []
+    
+    @staticmethod
+    def normalize_tags(text):
+        """Kullanıcının girdiği etiketleri tekrarsız, küçük harf ve virgülle ayrılmış hale getir"""
+        tags = []
+        for tag in (text or '').split(','):
+            tag = tag.strip().lower()
+            if tag and tag not in tags:
+                tags.append(tag)
+        return ','.join(tags) or None
+    
     def __repr__(self):
         return f'<TestPrompt {self.name}>'
 
 class TestResult(db.Model):
+    # Tekrar çalışmayacak (sonuçlanmış) test durumları
+    FINISHED_STATUSES = ('completed', 'failed', 'stopped')
+    
+    # Geçmiş sayfası (created_at, id) üzerinden keyset sayfalama yapar; her filtre
+    # kombinasyonu sıralamayı da karşılayan bir indeksle çalışır
+    __table_args__ = (
+        db.Index('ix_test_result_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_test_result_user_status_created', 'user_id', 'status', 'created_at', 'id'),
+        db.Index('ix_test_result_project_created', 'project_id', 'created_at', 'id'),
+        db.Index('ix_test_result_prompt_created', 'prompt_id', 'created_at', 'id'),
+        db.Index('ix_test_result_status_id', 'status', 'id'),  # Kuyruktan sıradaki testi alma
+        db.Index('ix_test_result_suite', 'suite_run_id', 'status'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     prompt_id = db.Column(db.Integer, db.ForeignKey('test_prompt.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    status = db.Column(db.String(20), default='running')  # running, completed, failed, stopped
+    status = db.Column(db.String(20), default='pending')  # pending, running, completed, failed, stopped
     project_url = db.Column(db.String(500))  # Test edilecek web sitesinin URL'si
     result_text = db.Column(db.Text)
     error_message = db.Column(db.Text)
-    running_details = db.Column(db.Text)  # Gerçek zamanlı test adımları JSON formatında
+    running_details = db.Column(db.Text)  # Eski JSON log formatı (yeni loglar test_step tablosunda)
     stop_requested = db.Column(db.Boolean, default=False)  # Test durdurma talebi
     current_step = db.Column(db.Integer, default=0)  # Mevcut adım sayısı
     total_steps = db.Column(db.Integer, default=0)  # Toplam adım sayısı
+    step_results = db.Column(db.Text)  # JSON: alt görevlere bölünen çalışmalarda adım bazlı sonuçlar
+    schedule_id = db.Column(db.Integer)  # Zamanlayıcının oluşturduğu çalışmalarda TestSchedule id'si
+    suite_run_id = db.Column(db.Integer)  # Suite çalıştırmasıyla oluşturulan testlerde TestSuiteRun id'si
     execution_time = db.Column(db.Float)  # Test süresi (saniye)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)  # Worker'ın testi kuyruktan aldığı zaman
+    worker_id = db.Column(db.String(100))  # Testi çalıştıran worker (host:pid)
+    lease_expires_at = db.Column(db.DateTime)  # Heartbeat gelmezse test bu zamandan sonra kuyruğa döner
     completed_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime)  # Ayrıntılar arşiv dosyasına taşındıysa (app/retention.py)
+    archive_path = db.Column(db.String(255))  # ARCHIVE_DIR'e göre arşiv dosyası
+    archive_offset = db.Column(db.Integer)  # Kaydı içeren gzip üyesinin dosyadaki konumu
     
     # Relationships
     project = db.relationship('Project', backref='test_results')
     prompt = db.relationship('TestPrompt', backref='test_results')
     user = db.relationship('User', backref='test_results')
+    steps = db.relationship('TestStep', backref='test_result', lazy='dynamic',
+                            order_by='TestStep.seq', cascade='all, delete-orphan')
+    artifacts = db.relationship('Artifact', backref='test_result', lazy='dynamic',
+                                order_by='Artifact.id', cascade='all, delete-orphan')
+    
+    @property
+    def step_result_list(self):
+        """Alt görev sonuçları (step_results JSON'u) liste olarak"""
+        return json.loads(self.step_results) if self.step_results else []
+    
+    def mark_completed(self, completed_at=None):
+        """Bitiş zamanını ve test başladıysa execution_time'ı (kuyruktan alınmadan bitişe) yaz"""
+        self.completed_at = completed_at or datetime.utcnow()
+        if self.started_at:
+            self.execution_time = (self.completed_at - self.started_at).total_seconds()
+    
+    def __repr__(self):
+        return f'<TestResult {self.id} - {self.status}>'
+
+class TestStep(db.Model):
+    """Test çalışması sırasında üretilen log satırları (sadece ekleme yapılır)"""
+    __table_args__ = (
+        db.UniqueConstraint('test_result_id', 'seq', name='uq_test_step_result_seq'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    test_result_id = db.Column(db.Integer, db.ForeignKey('test_result.id'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)  # Test içindeki sıra numarası (1'den başlar)
+    timestamp = db.Column(db.String(8))  # HH:MM:SS
+    message = db.Column(db.Text, nullable=False)
+    timings = db.Column(db.Text)  # JSON: agent adımı satırlarında faz süreleri (app/step_timing.py)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @staticmethod
+    def parse_timings(value):
+        return json.loads(value) if value else None
+    
+    def to_dict(self):
+        data = {'seq': self.seq, 'timestamp': self.timestamp, 'message': self.message}
+        if self.timings:
+            data['timings'] = self.parse_timings(self.timings)
+        return data
+    
+    def __repr__(self):
+        return f'<TestStep {self.test_result_id}#{self.seq}>'
+
+class Artifact(db.Model):
+    """Test çalışmasının eki; içerik diskte SHA-256 özetiyle tek kopya saklanır (app/artifacts.py)"""
+    KINDS = ('screenshot', 'history', 'download')
+    
+    id = db.Column(db.Integer, primary_key=True)
+    test_result_id = db.Column(db.Integer, db.ForeignKey('test_result.id'), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # screenshot, history, download
+    name = db.Column(db.String(255), nullable=False)  # Kullanıcıya gösterilen / indirilen dosya adı
+    step = db.Column(db.Integer)  # Ekran görüntüsünün alındığı agent adımı
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    content_type = db.Column(db.String(100), nullable=False)
+    size = db.Column(db.Integer, nullable=False)  # Sıkıştırılmamış boyut (byte)
+    compressed = db.Column(db.Boolean, default=False)  # Diskte gzip ile mi saklanıyor
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Artifact {self.kind} {self.name}>'
+
+class ActionTrace(db.Model):
+    """Başarılı bir çalışmada agent'ın uyguladığı aksiyon dizisi (LLM'siz tekrar oynatma için)"""
+    __table_args__ = (
+        db.UniqueConstraint('prompt_id', 'project_url', name='uq_action_trace_prompt_url'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    prompt_id = db.Column(db.Integer, db.ForeignKey('test_prompt.id'), nullable=False)
+    project_url = db.Column(db.String(500), nullable=False)
+    prompt_hash = db.Column(db.String(64), nullable=False)  # Prompt değişirse iz geçersiz olur
+    trace = db.Column(db.Text, nullable=False)  # JSON: adımlar, aksiyonlar, element parmak izleri
+    step_count = db.Column(db.Integer, default=0)
+    source_result_id = db.Column(db.Integer)  # İzi üreten test çalışması
+    replay_count = db.Column(db.Integer, default=0)
+    last_replayed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ActionTrace prompt={self.prompt_id} steps={self.step_count}>'
+
+class SessionSnapshot(db.Model):
+    """Projenin oturum açılmış tarayıcı durumu (şifreli storage state)"""
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, unique=True)
+    storage_state = db.Column(db.Text, nullable=False)  # Fernet ile şifrelenmiş JSON (cookie, localStorage)
+    captured_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    source_result_id = db.Column(db.Integer)  # Oturumu yakalayan test çalışması
+    
+    def __repr__(self):
+        return f'<SessionSnapshot project={self.project_id}>'
+
+class TestSchedule(db.Model):
+    """Prompt'un periyodik izleme takvimi (sabit aralık veya cron ifadesi)"""
+    # skip = kaçırılan çalışmalar atlanır, once = kaçırılanlar için bir kez çalışır
+    CATCHUP_POLICIES = ('skip', 'once')
+    
+    id = db.Column(db.Integer, primary_key=True)
+    prompt_id = db.Column(db.Integer, db.ForeignKey('test_prompt.id'), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # Çalışmaların sahibi
+    project_url = db.Column(db.String(500))  # Boşsa projenin URL'si kullanılır
+    interval_minutes = db.Column(db.Integer)
+    cron_expression = db.Column(db.String(100))  # "dakika saat gün ay haftanın_günü" (UTC)
+    jitter_seconds = db.Column(db.Integer, default=0)  # Çalışmalar 0..jitter saniye rastgele geciktirilir
+    catchup = db.Column(db.String(10), default='once')
+    enabled = db.Column(db.Boolean, default=True)
+    next_slot_at = db.Column(db.DateTime)  # Takvimdeki sıradaki nominal zaman
+    next_run_at = db.Column(db.DateTime, index=True)  # Jitter eklenmiş gerçek çalışma zamanı
+    last_run_at = db.Column(db.DateTime)
+    last_result_id = db.Column(db.Integer)  # Çakışma kontrolü için son oluşturulan çalışma
+    skipped_runs = db.Column(db.Integer, default=0)  # Çakışma veya kaçırma nedeniyle atlanan çalışmalar
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    prompt = db.relationship('TestPrompt', backref=db.backref('schedule', uselist=False))
+    
+    def describe(self):
+        if self.cron_expression:
+            return f'cron: {self.cron_expression}'
+        return f'her {self.interval_minutes} dakikada bir'
+    
+    def __repr__(self):
+        return f'<TestSchedule prompt={self.prompt_id} {self.describe()}>'
+
+class UserStats(db.Model):
+    """Kullanıcı bazında dashboard sayaçları (proje ve test durum değişimlerinde güncellenir)"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total_projects = db.Column(db.Integer, default=0, nullable=False)
+    running_tests = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<UserStats user={self.user_id}>'
+
+class DailyTestStats(db.Model):
+    """Kullanıcının projelerindeki testlerin oluşturulma gününe göre sonuç sayıları"""
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', name='uq_daily_test_stats_user_day'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    completed = db.Column(db.Integer, default=0, nullable=False)
+    failed = db.Column(db.Integer, default=0, nullable=False)
+    stopped = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<DailyTestStats user={self.user_id} {self.day}>'
+
+class BulkJob(db.Model):
+    """Arka planda parça parça yürütülen toplu işlem (app/bulk.py)"""
+    ACTIONS = ('delete_results', 'delete_project')
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    action = db.Column(db.String(30), nullable=False)
+    params = db.Column(db.Text)  # JSON: filtreler veya proje id'si
+    description = db.Column(db.String(255))  # Kullanıcıya gösterilen açıklama
+    status = db.Column(db.String(20), default='pending')  # pending, running, completed, failed
+    total = db.Column(db.Integer, default=0)
+    processed = db.Column(db.Integer, default=0)
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    @property
+    def params_dict(self):
+        return json.loads(self.params) if self.params else {}
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'action': self.action,
+            'description': self.description,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'message': self.message,
+        }
+    
+    def __repr__(self):
+        return f'<BulkJob {self.id} {self.action} {self.status}>'
+
+class TestSuiteRun(db.Model):
+    """Projenin tüm (veya etiketli) prompt'larının birlikte çalıştırılması (app/suites.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    tag = db.Column(db.String(50))  # Boşsa projenin tüm prompt'ları
+    project_url = db.Column(db.String(500))  # Boşsa projenin URL'si kullanılır
+    max_parallel = db.Column(db.Integer, default=0)  # Suite'ten aynı anda çalışacak test sayısı (0 = sınırsız)
+    status = db.Column(db.String(20), default='running')  # running, completed (hepsi başarılı), failed
+    total = db.Column(db.Integer, default=0)
+    passed = db.Column(db.Integer, default=0)
+    failed = db.Column(db.Integer, default=0)
+    stopped = db.Column(db.Integer, default=0)
+    duration = db.Column(db.Float)  # Suite'in başından son testin bitişine kadar geçen süre (saniye)
+    serial_duration = db.Column(db.Float)  # Testlerin sürelerinin toplamı (sırayla çalışsaydı)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    
+    project = db.relationship('Project', backref=db.backref('suite_runs', lazy='dynamic'))
     
     def __repr__(self):
-        return f'<TestResult {self.id} - {self.status}>'
\ No newline at end of file
+        return f'<TestSuiteRun {self.id} project={self.project_id} {self.status}>'
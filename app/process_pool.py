@@ -0,0 +1,180 @@
+from app.cancellation import cancellations
+from app.events import bus
+import asyncio
+import atexit
+import multiprocessing
+import os
+import threading
+
+
+def worker_main(task_queue, control_queue, event_queue, max_runs):
+    """Worker sürecinin giriş noktası: kuyruktan gelen testleri sırayla çalıştırır.
+
+    Olaylar ebeveyn sürece event_queue üzerinden iletilir; max_runs testten
+    sonra süreç kendiliğinden çıkar ve ebeveyn yerine yenisini başlatır.
+    """
+    from app import create_app
+    from app.runner import load_run, mark_failed
+    from app.tasks import execute_test
+
+    # Bu süreç testleri ebeveynden alır; kendi runner'ını başlatmaz
+    app = create_app(start_workers=False)
+    bus.forward_to(event_queue)
+    threading.Thread(target=_control_loop, args=(control_queue,), name='worker-control', daemon=True).start()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    for _ in range(max_runs):
+        test_result_id = task_queue.get()
+        if test_result_id is None:
+            break
+        try:
+            project_url, prompt_content = load_run(app, test_result_id)
+            loop.run_until_complete(execute_test(app, test_result_id, project_url, prompt_content))
+        except Exception as e:
+            print(f"Worker süreci hatası (test {test_result_id}): {e}")
+            mark_failed(app, test_result_id, e)
+        event_queue.put(('done', os.getpid(), test_result_id))
+    loop.close()
+
+
+def _control_loop(control_queue):
+    """Ebeveynden gelen durdurma taleplerini bu süreçteki iptal kaydına aktar"""
+    for test_result_id in iter(control_queue.get, None):
+        cancellations.cancel(test_result_id)
+
+
+class WorkerProcess:
+    """Aynı anda tek test çalıştıran worker süreci ve ona ait kuyruklar"""
+
+    def __init__(self, context, event_queue, max_runs):
+        self.task_queue = context.Queue()
+        self.control_queue = context.Queue()
+        self.process = context.Process(
+            target=worker_main,
+            args=(self.task_queue, self.control_queue, event_queue, max_runs),
+            daemon=True
+        )
+        self.process.start()
+        self.runs = 0
+        self.current = None
+        self.future = None
+
+    def stop(self, timeout=10):
+        if self.process.is_alive():
+            self.task_queue.put(None)
+            self.control_queue.put(None)
+            self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class ProcessPool:
+    """Testleri ayrı worker süreçlerinde çalıştıran havuz (EXECUTION_MODE=process).
+
+    Bir testte çöken sürücü veya sızan tarayıcı kaynağı sadece kendi sürecini
+    etkiler; web süreci ve diğer testler çalışmaya devam eder. Süreçler
+    ``max_runs`` testten sonra bellek büyümesini sınırlamak için yenilenir.
+    Tüm durum değişiklikleri runner'ın event loop thread'inde yapılır.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.size = max(1, app.config.get('PROCESS_WORKERS') or os.cpu_count() or 2)
+        self.max_runs = max(1, app.config.get('PROCESS_MAX_RUNS', 20))
+        self.monitor_interval = 1
+        self.loop = None
+        self._context = multiprocessing.get_context('spawn')
+        self._event_queue = None
+        self._workers = []
+
+    def start(self, loop):
+        """Süreçleri başlat (runner'ın event loop thread'inden çağrılır)"""
+        self.loop = loop
+        self._event_queue = self._context.Queue()
+        self._workers = [self._spawn() for _ in range(self.size)]
+        threading.Thread(target=self._listen, name='process-pool-events', daemon=True).start()
+        loop.create_task(self._monitor())
+        atexit.register(self.shutdown)
+        print(f"Süreç havuzu başlatıldı: {self.size} worker süreci, süreç başına {self.max_runs} test")
+
+    def _spawn(self):
+        return WorkerProcess(self._context, self._event_queue, self.max_runs)
+
+    async def run(self, test_result_id):
+        """Testi boştaki bir worker sürecine gönder ve bitmesini bekle"""
+        worker = self._idle_worker()
+        worker.current = test_result_id
+        worker.future = self.loop.create_future()
+
+        # Web sürecindeki durdurma talebi worker sürecine iletilir
+        token = cancellations.register(test_result_id)
+        token.add_callback(lambda: worker.control_queue.put(test_result_id))
+        worker.task_queue.put(test_result_id)
+        try:
+            await worker.future
+        finally:
+            cancellations.unregister(test_result_id)
+
+    def _idle_worker(self):
+        # Runner semaforu boşta en az bir worker olmasını garanti eder
+        for index, worker in enumerate(self._workers):
+            if worker.current is not None:
+                continue
+            if worker.runs >= self.max_runs or not worker.process.is_alive():
+                worker.stop()
+                worker = self._workers[index] = self._spawn()
+            return worker
+        raise RuntimeError("Boşta worker süreci yok")
+
+    def _listen(self):
+        """Worker süreçlerinden gelen olayları ebeveyn süreçte yayınla"""
+        while True:
+            try:
+                message = self._event_queue.get()
+            except (EOFError, OSError):
+                return
+            if message[0] == 'event':
+                _, test_result_id, data, event_id, final = message
+                bus.publish(test_result_id, data, event_id=event_id, final=final)
+            elif message[0] == 'done':
+                self.loop.call_soon_threadsafe(self._finish, message[1], message[2])
+
+    def _finish(self, pid, test_result_id):
+        for worker in self._workers:
+            if worker.process.pid == pid and worker.current == test_result_id:
+                worker.runs += 1
+                self._release(worker)
+                return
+
+    def _release(self, worker):
+        worker.current = None
+        if worker.future is not None and not worker.future.done():
+            worker.future.set_result(None)
+        worker.future = None
+
+    async def _monitor(self):
+        """Test ortasında ölen süreçleri tespit et, testi başarısız say ve yenile"""
+        from app.runner import mark_failed
+        from app.sqlite import run_with_retry
+
+        while True:
+            await asyncio.sleep(self.monitor_interval)
+            for index, worker in enumerate(self._workers):
+                if worker.current is None or worker.process.is_alive():
+                    continue
+                test_result_id = worker.current
+                print(f"Worker süreci beklenmedik şekilde kapandı (test {test_result_id}, çıkış kodu {worker.process.exitcode})")
+                # Süreç testi kapatıp çıktıysa mark_failed bir şey değiştirmez
+                await self.loop.run_in_executor(
+                    None, run_with_retry, self.app, mark_failed, self.app, test_result_id,
+                    f"Worker süreci kapandı (çıkış kodu {worker.process.exitcode})",
+                    self.app.extensions['test_runner'].worker_id
+                )
+                self._release(worker)
+                self._workers[index] = self._spawn()
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.stop(timeout=5)
+        self._workers = []
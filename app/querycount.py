@@ -0,0 +1,82 @@
+"""Çalışan SQL sorgularını sayma.
+
+Listeleme sayfalarının satır sayısından bağımsız, sabit sayıda sorgu
+çalıştırması beklenir. ``assert_max_queries`` testlerde bu sınırı
+doğrular; ``QUERY_COUNT_WARN`` ayarlıysa sınırı aşan her istek loglanır.
+"""
+
+from contextlib import contextmanager
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import threading
+
+_local = threading.local()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Sayaç yoksa maliyeti tek bir attribute okumasıdır
+    for counter in getattr(_local, 'counters', ()):
+        counter.statements.append(statement)
+
+
+def _push():
+    counter = QueryCounter()
+    _local.__dict__.setdefault('counters', []).append(counter)
+    return counter
+
+
+def _pop(counter):
+    counters = getattr(_local, 'counters', [])
+    if counter in counters:
+        counters.remove(counter)
+
+
+@contextmanager
+def count_queries():
+    """Blok içinde (aynı thread'de) çalışan sorguları say"""
+    counter = _push()
+    try:
+        yield counter
+    finally:
+        _pop(counter)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Blok limit'ten fazla sorgu çalıştırırsa AssertionError ver (testlerde kullanılır)"""
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        statements = '\n'.join(counter.statements)
+        raise AssertionError(f"{counter.count} sorgu çalıştı, en fazla {limit} bekleniyordu:\n{statements}")
+
+
+def init_app(app):
+    """QUERY_COUNT_WARN > 0 ise bu sayıdan fazla sorgu çalıştıran istekleri logla"""
+    limit = app.config.get('QUERY_COUNT_WARN', 0)
+    if not limit:
+        return
+
+    @app.before_request
+    def start_query_count():
+        g.query_counter = _push()
+
+    @app.teardown_request
+    def finish_query_count(exc=None):
+        counter = g.pop('query_counter', None)
+        if counter is None:
+            return
+        _pop(counter)
+        if counter.count > limit:
+            print(f"Çok sorgu: {request.method} {request.path} {counter.count} sorgu çalıştırdı (sınır {limit})")
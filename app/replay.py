@@ -0,0 +1,183 @@
+"""Kaydedilmiş aksiyon izlerini LLM'e sormadan tekrar oynatma.
+
+Başarılı bir çalışmanın her adımı için sayfa URL'si, agent'ın seçtiği
+aksiyonlar ve etkileşilen elementin parmak izi (etiket, kararlı öznitelikler,
+xpath) saklanır. Tekrar oynatmada element index'leri güncel DOM'da parmak
+iziyle yeniden bulunur; URL tutmazsa, element bulunamazsa veya aksiyon hata
+verirse oynatma o adımda durur ve kontrol LLM agent'a devredilir.
+"""
+
+from app import db
+from app.models import ActionTrace
+from datetime import datetime
+from urllib.parse import urlparse
+import hashlib
+import json
+
+# Sayfa yenilense de değişmeyen, elementi tanımlamaya yarayan öznitelikler
+FINGERPRINT_ATTRIBUTES = (
+    'id', 'name', 'type', 'role', 'aria-label', 'placeholder',
+    'href', 'title', 'alt', 'for', 'data-testid', 'data-test', 'data-qa',
+)
+
+
+class ReplayOutcome:
+    """Tekrar oynatmanın sonucu: tamamlandı mı, kaç adım uygulandı, neden durdu"""
+
+    def __init__(self, completed, steps_done, result=None, reason=None):
+        self.completed = completed
+        self.steps_done = steps_done
+        self.result = result
+        self.reason = reason
+
+
+def prompt_hash(prompt_content):
+    return hashlib.sha256(prompt_content.encode('utf-8')).hexdigest()
+
+
+def element_fingerprint(node):
+    """Geçmişteki (DOMInteractedElement) veya güncel DOM düğümünün parmak izi"""
+    if node is None:
+        return None
+    attributes = getattr(node, 'attributes', None) or {}
+    tag = getattr(node, 'node_name', None) or getattr(node, 'tag_name', None) or ''
+    return {
+        'tag': tag.lower(),
+        'attributes': {
+            name: str(value) for name, value in attributes.items()
+            if name in FINGERPRINT_ATTRIBUTES and value not in (None, '')
+        },
+        'xpath': getattr(node, 'x_path', None) or getattr(node, 'xpath', None),
+    }
+
+
+def match_element(fingerprint, selector_map):
+    """Parmak izine en iyi uyan tek elementin index'ini döndür; belirsizse None"""
+    scores = {}
+    for index, node in selector_map.items():
+        candidate = element_fingerprint(node)
+        if candidate['tag'] != fingerprint['tag']:
+            continue
+        score = 0
+        for name, value in fingerprint['attributes'].items():
+            if candidate['attributes'].get(name) == value:
+                score += 2
+            elif name in candidate['attributes']:
+                score -= 2
+        if fingerprint['xpath'] and candidate['xpath'] == fingerprint['xpath']:
+            score += 3
+        if score > 0:
+            scores[index] = score
+
+    if not scores:
+        return None
+    best = max(scores.values())
+    matches = [index for index, score in scores.items() if score == best]
+    return matches[0] if len(matches) == 1 else None
+
+
+def same_page(current_url, expected_url):
+    """Sorgu parametreleri hariç aynı host ve yol mu"""
+    current, expected = urlparse(current_url or ''), urlparse(expected_url or '')
+    return (current.netloc, current.path.rstrip('/')) == (expected.netloc, expected.path.rstrip('/'))
+
+
+def extract_trace(history):
+    """Agent geçmişinden (AgentHistoryList) kompakt aksiyon izi çıkar"""
+    steps = []
+    for item in getattr(history, 'history', None) or []:
+        model_output = getattr(item, 'model_output', None)
+        if model_output is None or not model_output.action:
+            continue
+        elements = getattr(item.state, 'interacted_element', None) or []
+        actions = []
+        for position, action in enumerate(model_output.action):
+            element = elements[position] if position < len(elements) else None
+            actions.append({
+                'action': action.model_dump(exclude_none=True),
+                'element': element_fingerprint(element),
+            })
+        steps.append({'url': getattr(item.state, 'url', None), 'actions': actions})
+    return {'version': 1, 'steps': steps}
+
+
+async def replay_trace(agent, trace, log_step, token):
+    """İzi agent'ın tarayıcısında LLM'siz uygula; ilk sapmada ReplayOutcome ile dön"""
+    session = agent.browser_session
+    await session.start()
+
+    steps = trace['steps']
+    for number, step in enumerate(steps, start=1):
+        token.raise_if_cancelled()
+        try:
+            outcome = await _replay_step(agent, session, number, step)
+        except Exception as e:
+            outcome = ReplayOutcome(False, number - 1, reason=f"adım {number}: {e}")
+        if outcome is not None:
+            return outcome
+        log_step(f"🔁 Adım {number}/{len(steps)} tekrar oynatıldı")
+
+    return ReplayOutcome(True, len(steps))
+
+
+async def _replay_step(agent, session, number, step):
+    """Tek adımı uygula; oynatma burada bitiyorsa ReplayOutcome, devam edecekse None döner"""
+    steps_done = number - 1
+    state = await session.get_browser_state_summary(include_screenshot=False)
+
+    # Doğrulama: adım kaydedildiği sayfada mıyız
+    expected_url = step.get('url')
+    if expected_url and expected_url != 'about:blank' and not same_page(state.url, expected_url):
+        return ReplayOutcome(False, steps_done, reason=f"adım {number}: beklenen sayfa {expected_url}, mevcut {state.url}")
+
+    actions = []
+    for entry in step['actions']:
+        (name, params), = entry['action'].items()
+        if isinstance(params, dict) and 'index' in params:
+            fingerprint = entry.get('element')
+            index = match_element(fingerprint, state.dom_state.selector_map) if fingerprint else None
+            if index is None:
+                return ReplayOutcome(False, steps_done, reason=f"adım {number}: '{name}' elementi sayfada bulunamadı")
+            params = dict(params, index=index)
+        actions.append(agent.ActionModel(**{name: params}))
+
+    results = await agent.multi_act(actions)
+    for result in results:
+        if getattr(result, 'error', None):
+            return ReplayOutcome(False, steps_done, reason=f"adım {number}: {result.error}")
+        if getattr(result, 'is_done', False):
+            if getattr(result, 'success', True) is False:
+                return ReplayOutcome(False, steps_done, reason=f"adım {number}: görev başarısız bitti")
+            return ReplayOutcome(True, number, result=result.extracted_content)
+    return None
+
+
+def find_trace(prompt_id, project_url, prompt_content):
+    """Prompt'un güncel içeriğine ait izi döndür (app context içinde)"""
+    action_trace = ActionTrace.query.filter_by(prompt_id=prompt_id, project_url=project_url).first()
+    if action_trace is None or action_trace.prompt_hash != prompt_hash(prompt_content):
+        return None
+    return action_trace
+
+
+def save_trace(project_id, prompt_id, project_url, prompt_content, trace, source_result_id):
+    """İzi prompt+URL için kaydet veya güncelle (app context içinde)"""
+    action_trace = ActionTrace.query.filter_by(prompt_id=prompt_id, project_url=project_url).first()
+    if action_trace is None:
+        action_trace = ActionTrace(project_id=project_id, prompt_id=prompt_id, project_url=project_url)
+        db.session.add(action_trace)
+    action_trace.prompt_hash = prompt_hash(prompt_content)
+    action_trace.trace = json.dumps(trace, ensure_ascii=False)
+    action_trace.step_count = len(trace['steps'])
+    action_trace.source_result_id = source_result_id
+    action_trace.replay_count = 0
+    db.session.commit()
+
+
+def mark_replayed(action_trace_id):
+    """Tam tekrar oynatılan izin sayaçlarını güncelle (app context içinde)"""
+    ActionTrace.query.filter_by(id=action_trace_id).update({
+        'replay_count': ActionTrace.replay_count + 1,
+        'last_replayed_at': datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
@@ -0,0 +1,133 @@
+"""Eski test sonuçlarının sıkıştırılmış arşiv dosyalarına taşınması.
+
+``RETENTION_DAYS`` günden eski ve bitmiş testlerin log adımları ve uzun
+metinleri ``ARCHIVE_DIR/YYYY/MM/YYYY-MM-DD.jsonl.gz`` dosyalarına (testin
+oluşturulduğu güne göre) yazılır. ``test_result`` tablosunda yalnızca özet
+satır kalır; ayrıntılar sonuç sayfası açıldığında arşivden okunur.
+
+Her parti dosyanın sonuna ayrı bir gzip üyesi olarak eklenir ve üyenin
+başlangıç konumu satıra yazılır; okuma sırasında dosyanın tamamı değil
+yalnızca o üye açılır. Aynı partiyi iki süreç birlikte arşivlerse dosyada
+aynı kayıt iki kez bulunabilir; okuma ilk eşleşmeyi kullandığı için zararsızdır.
+"""
+
+from app import db
+from app.models import TestResult, TestStep
+from datetime import datetime, timedelta
+from functools import lru_cache
+import gzip
+import json
+import os
+
+# Arşivlenen satırda result_text ve error_message bu uzunluğa kısaltılır
+SUMMARY_LENGTH = 300
+
+
+def archive_old_results(app, days=None, batch_size=500):
+    """days günden eski bitmiş testleri arşivle; arşivlenen test sayısını döndür"""
+    days = app.config['RETENTION_DAYS'] if days is None else days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived = 0
+    with app.app_context():
+        while True:
+            batch = TestResult.query.filter(
+                TestResult.archived_at.is_(None),
+                TestResult.status.in_(TestResult.FINISHED_STATUSES),
+                TestResult.created_at < cutoff
+            ).order_by(TestResult.id).limit(batch_size).all()
+            if not batch:
+                break
+            archived += _archive_batch(app, batch)
+    return archived
+
+
+def _archive_batch(app, batch):
+    ids = [test_result.id for test_result in batch]
+    steps = {}
+    for step in TestStep.query.filter(TestStep.test_result_id.in_(ids)).order_by(
+        TestStep.test_result_id, TestStep.seq
+    ):
+        steps.setdefault(step.test_result_id, []).append(step.to_dict())
+
+    partitions = {}
+    for test_result in batch:
+        partitions.setdefault(test_result.created_at.date(), []).append(test_result)
+
+    # Önce arşiv dosyası diske yazılır, sonra satırlar özetlenir
+    now = datetime.utcnow()
+    archived = 0
+    for day, results in partitions.items():
+        archive_path = f'{day:%Y}/{day:%m}/{day:%Y-%m-%d}.jsonl.gz'
+        offset = _append_member(app, archive_path, [_record(r, steps.get(r.id, [])) for r in results])
+        for test_result in results:
+            archived += TestResult.query.filter_by(id=test_result.id, archived_at=None).update({
+                'archived_at': now,
+                'archive_path': archive_path,
+                'archive_offset': offset,
+                'result_text': _summary(test_result.result_text),
+                'error_message': _summary(test_result.error_message),
+                'running_details': None,
+                'step_results': None,
+            }, synchronize_session=False)
+    TestStep.query.filter(TestStep.test_result_id.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+    return archived
+
+
+def _record(test_result, steps):
+    return {
+        'id': test_result.id,
+        'project_id': test_result.project_id,
+        'prompt_id': test_result.prompt_id,
+        'status': test_result.status,
+        'created_at': test_result.created_at.isoformat(),
+        'completed_at': test_result.completed_at.isoformat() if test_result.completed_at else None,
+        'result_text': test_result.result_text,
+        'error_message': test_result.error_message,
+        'running_details': test_result.running_details,
+        'step_results': test_result.step_results,
+        'steps': steps,
+    }
+
+
+def _summary(text):
+    if text and len(text) > SUMMARY_LENGTH:
+        return text[:SUMMARY_LENGTH] + '…'
+    return text
+
+
+def _append_member(app, archive_path, records):
+    """Kayıtları dosyanın sonuna yeni bir gzip üyesi olarak ekle; üyenin başlangıç konumunu döndür"""
+    path = os.path.join(app.config['ARCHIVE_DIR'], archive_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+    with open(path, 'ab') as f:
+        offset = f.tell()
+        f.write(gzip.compress(payload.encode('utf-8')))
+        f.flush()
+        os.fsync(f.fileno())
+    return offset
+
+
+def load_archived(app, test_result):
+    """Arşivlenmiş testin ayrıntıları (result_text, error_message, step_results, steps); bulunamazsa None"""
+    if test_result.archived_at is None:
+        return None
+    path = os.path.join(app.config['ARCHIVE_DIR'], test_result.archive_path)
+    try:
+        return _read_record(path, test_result.archive_offset or 0, test_result.id)
+    except (OSError, EOFError, ValueError) as e:
+        print(f"Arşiv okunamadı ({test_result.archive_path}): {e}")
+        return None
+
+
+@lru_cache(maxsize=64)
+def _read_record(path, offset, test_result_id):
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        with gzip.GzipFile(fileobj=f) as archive:
+            for line in archive:
+                record = json.loads(line)
+                if record['id'] == test_result_id:
+                    return record
+    return None
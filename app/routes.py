@@ -1,16 +1,29 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, Response, stream_with_context, send_file, abort
 from flask_login import login_required, current_user, login_user, logout_user
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 from app import db
-from app.models import User, Project, TestPrompt, TestResult
-from app.forms import ProjectForm, TestPromptForm, RunTestForm, RunSingleTestForm, LoginForm
+from app.models import User, Project, TestPrompt, TestResult, TestStep, ActionTrace, TestSchedule, TestSuiteRun, Artifact, BulkJob
+from app.forms import ProjectForm, TestPromptForm, RunTestForm, RunSingleTestForm, SuiteRunForm, ScheduleForm, LoginForm
+from app.cancellation import cancellations
+from app.bulk import (PROJECT_RUNNING_MESSAGE, delete_project_records, delete_results, finished_results,
+                      has_running_results, owned_results, recent_jobs, release_artifacts, rerun_results)
+from app.events import bus, publish_status
+from app.runner import queue_position
+from app.retention import load_archived
+from app.scheduler import plan_schedule
+from app.suites import finish_suite, start_suite, stop_suite, suite_prompts, suite_report
+from app.step_timing import PHASE_COLORS, PHASE_LABELS, prompt_phase_stats, step_waterfall
+from app.stats import dashboard_counts, record_project_change, record_transition, record_transitions
 import os
-import getpass
-import threading
-import time
-import asyncio
 import json
 from datetime import datetime
 
+# Artımlı log API'sinin tek yanıtta döndürdüğü en fazla log sayısı
+LOG_PAGE_SIZE = 500
+
+# Test geçmişi sayfasındaki kayıt sayısı
+HISTORY_PAGE_SIZE = 50
+
 # Blueprints
 main_bp = Blueprint('main', __name__)
 auth_bp = Blueprint('auth', __name__)
@@ -29,34 +42,19 @@ def index():
 @main_bp.route('/dashboard')
 @login_required
 def dashboard():
-    # Kullanıcının proje sayısı
-    total_projects = Project.query.filter_by(user_id=current_user.id).count()
+    # Proje, çalışan test ve son 30 günün sonuç sayıları önceden tutulan sayaçlardan
+    counts = dashboard_counts(current_user.id)
     
-    # Son test sonuçları (5 adet)
-    recent_tests = TestResult.query.join(TestPrompt).join(Project).filter(
+    # Son test sonuçları (5 adet); prompt ve proje aynı sorguda
+    recent_tests = TestResult.query.join(TestResult.prompt).join(TestPrompt.project).options(
+        contains_eager(TestResult.prompt).contains_eager(TestPrompt.project)
+    ).filter(
         Project.user_id == current_user.id
     ).order_by(TestResult.created_at.desc()).limit(5).all()
     
-    # Başarılı test sayısı (son 30 gün)
-    from datetime import datetime, timedelta
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    successful_tests = TestResult.query.join(TestPrompt).join(Project).filter(
-        Project.user_id == current_user.id,
-        TestResult.status == 'completed',
-        TestResult.created_at >= thirty_days_ago
-    ).count()
-    
-    # Çalışan test sayısı
-    running_tests = TestResult.query.join(TestPrompt).join(Project).filter(
-        Project.user_id == current_user.id,
-        TestResult.status == 'running'
-    ).count()
-    
     return render_template('dashboard.html', 
-                         total_projects=total_projects,
                          recent_tests=recent_tests,
-                         successful_tests=successful_tests,
-                         running_tests=running_tests)
+                         **counts)
 
 # Giriş
 @auth_bp.route('/login', methods=['GET', 'POST'])
@@ -103,8 +101,8 @@ def logout():
 @project_bp.route('/projects')
 @login_required
 def list_projects():
-    projects = Project.query.filter_by(user_id=current_user.id).all()
-    return render_template('projects/list.html', projects=projects)
+    projects = Project.query.options(selectinload(Project.test_prompts)).filter_by(user_id=current_user.id).all()
+    return render_template('projects/list.html', projects=projects, bulk_jobs=recent_jobs(current_user.id))
 
 # Yeni proje
 @project_bp.route('/project/new', methods=['GET', 'POST'])
@@ -120,6 +118,7 @@ def new_project():
             user_id=current_user.id
         )
         db.session.add(project)
+        record_project_change(current_user.id, 1)
         db.session.commit()
         flash('Proje başarıyla oluşturuldu!', 'success')
         return redirect(url_for('project.list_projects'))
@@ -137,8 +136,9 @@ def project_detail(project_id):
         flash('Bu projeyi görme yetkiniz yok!', 'error')
         return redirect(url_for('project.list_projects'))
     
-    prompts = TestPrompt.query.filter_by(project_id=project_id).all()
-    return render_template('projects/prompts.html', project=project, prompts=prompts)
+    prompts = TestPrompt.query.options(selectinload(TestPrompt.schedule)).filter_by(project_id=project_id).all()
+    return render_template('projects/prompts.html', project=project, prompts=prompts,
+                           bulk_jobs=recent_jobs(current_user.id))
 
 # Proje düzenleme
 @project_bp.route('/project/<int:project_id>/edit', methods=['GET', 'POST'])
@@ -174,17 +174,52 @@ def delete_project(project_id):
         flash('Bu projeyi silme yetkiniz yok!', 'error')
         return redirect(url_for('project.list_projects'))
     
-    # İlişkili prompt'ları ve test sonuçlarını sil
-    prompts = TestPrompt.query.filter_by(project_id=project_id).all()
-    for prompt in prompts:
-        TestResult.query.filter_by(prompt_id=prompt.id).delete()
-    TestPrompt.query.filter_by(project_id=project_id).delete()
+    # Çalışan testlerin runner'ı sonuç ve log yazmaya devam eder; önce bitmeleri gerekir
+    results_query = TestResult.query.filter_by(project_id=project_id)
+    if has_running_results(results_query):
+        flash(PROJECT_RUNNING_MESSAGE, 'error')
+        return redirect(url_for('project.project_detail', project_id=project_id))
     
-    db.session.delete(project)
+    # Küçük projeler küme sorgularıyla hemen, büyük geçmişler arka planda parça parça silinir
+    result_count = results_query.count()
+    if result_count > current_app.config['BULK_SYNC_LIMIT']:
+        current_app.extensions['bulk_jobs'].create(
+            current_user.id, 'delete_project', {'project_id': project_id},
+            f'"{project.name}" projesi siliniyor ({result_count} test sonucu)'
+        )
+        flash('Proje arka planda siliniyor, ilerlemeyi bu sayfadan izleyebilirsiniz.', 'info')
+        return redirect(url_for('project.list_projects'))
+    
+    artifact_hashes = delete_results(finished_results(results_query))
+    # Bu arada kuyruktan alınan bir test varsa hiçbir şey silinmez
+    if results_query.first() is not None:
+        db.session.rollback()
+        flash(PROJECT_RUNNING_MESSAGE, 'error')
+        return redirect(url_for('project.project_detail', project_id=project_id))
+    delete_project_records(project)
     db.session.commit()
+    release_artifacts(current_app, artifact_hashes)
     flash('Proje başarıyla silindi!', 'success')
     return redirect(url_for('project.list_projects'))
 
+# Projenin tüm test geçmişini silme (prompt'lar ve ayarlar kalır)
+@project_bp.route('/project/<int:project_id>/history/delete', methods=['POST'])
+@login_required
+def delete_project_history(project_id):
+    project = Project.query.get_or_404(project_id)
+    
+    # Kullanıcı yetkisi kontrolü
+    if project.user_id != current_user.id:
+        flash('Bu projenin geçmişini silme yetkiniz yok!', 'error')
+        return redirect(url_for('project.list_projects'))
+    
+    current_app.extensions['bulk_jobs'].create(
+        current_user.id, 'delete_results', {'project_id': project_id},
+        f'"{project.name}" projesinin test geçmişi siliniyor'
+    )
+    flash('Test geçmişi arka planda siliniyor (çalışan testler korunur).', 'info')
+    return redirect(url_for('project.project_detail', project_id=project_id))
+
 # Test prompt'u oluşturma
 @test_bp.route('/project/<int:project_id>/prompt/new', methods=['GET', 'POST'])
 @login_required
@@ -202,6 +237,7 @@ def new_test_prompt(project_id):
         prompt = TestPrompt(
             name=form.name.data,
             content=form.content.data,
+            tags=TestPrompt.normalize_tags(form.tags.data),
             project_id=project_id
         )
         db.session.add(prompt)
@@ -228,6 +264,7 @@ def edit_test_prompt(prompt_id):
     if form.validate_on_submit():
         prompt.name = form.name.data
         prompt.content = form.content.data
+        prompt.tags = TestPrompt.normalize_tags(form.tags.data)
         db.session.commit()
         flash('Test promptu başarıyla güncellendi!', 'success')
         return redirect(url_for('project.project_detail', project_id=prompt.project_id))
@@ -246,11 +283,23 @@ def delete_test_prompt(prompt_id):
         flash('Bu test promptunu silme yetkiniz yok!', 'error')
         return redirect(url_for('project.list_projects'))
     
-    # İlişkili test sonuçlarını sil
-    TestResult.query.filter_by(prompt_id=prompt_id).delete()
+    # İlişkili test sonuçlarını sil (çalışan testi olan prompt silinmez)
+    running_message = 'Bu prompt ile çalışan testler var; testler bittikten veya durdurulduktan sonra tekrar deneyin.'
+    results_query = TestResult.query.filter_by(prompt_id=prompt_id)
+    if has_running_results(results_query):
+        flash(running_message, 'error')
+        return redirect(url_for('project.project_detail', project_id=project.id))
+    artifact_hashes = delete_results(finished_results(results_query))
+    if results_query.first() is not None:
+        db.session.rollback()
+        flash(running_message, 'error')
+        return redirect(url_for('project.project_detail', project_id=project.id))
+    ActionTrace.query.filter_by(prompt_id=prompt_id).delete()
+    TestSchedule.query.filter_by(prompt_id=prompt_id).delete()
     
     db.session.delete(prompt)
     db.session.commit()
+    release_artifacts(current_app, artifact_hashes)
     flash('Test promptu başarıyla silindi!', 'success')
     return redirect(url_for('project.project_detail', project_id=project.id))
 
@@ -280,56 +329,292 @@ def run_test(prompt_id):
         db.session.add(test_result)
         db.session.commit()
         
-        # Arka planda test çalıştır
-        thread = threading.Thread(
-            target=run_browser_test_async,
-            args=(current_app._get_current_object(), test_result.id, form.project_url.data, prompt.content),
-            daemon=True
-        )
-        thread.start()
+        # Testi kuyruğa al, boşta worker varsa hemen başlar
+        # (WEB_RUNS_TESTS kapalıysa kaydı ayrı worker.py süreçleri alır)
+        if current_app.config['WEB_RUNS_TESTS']:
+            current_app.extensions['test_runner'].submit(test_result.id)
         
-        flash('Test başlatıldı! Sonuçları takip edebilirsiniz.', 'success')
+        position = queue_position(test_result)
+        flash(f'Test kuyruğa alındı (sıra: {position}). Sonuçları takip edebilirsiniz.', 'success')
         return redirect(url_for('test.test_result', test_result_id=test_result.id))
     
     # Son test sonuçlarını getir
     recent_results = TestResult.query.filter_by(prompt_id=prompt_id).order_by(TestResult.created_at.desc()).limit(5).all()
     
-    return render_template('tests/run_single_test.html', form=form, prompt=prompt, project=project, recent_results=recent_results)
+    # Son çalışmalardaki agent adımlarının faz bazında süre yüzdelikleri
+    phase_stats = prompt_phase_stats(prompt_id, current_app.config['PHASE_STATS_RUNS'])
+    
+    return render_template('tests/run_single_test.html', form=form, prompt=prompt, project=project, recent_results=recent_results,
+                           phase_stats=phase_stats, phase_labels=PHASE_LABELS, phase_colors=PHASE_COLORS)
+
+# Projenin tüm (veya etiketli) prompt'larını suite olarak çalıştırma
+@test_bp.route('/project/<int:project_id>/suite', methods=['GET', 'POST'])
+@login_required
+def run_suite(project_id):
+    project = Project.query.get_or_404(project_id)
+    
+    # Kullanıcı yetkisi kontrolü
+    if project.user_id != current_user.id:
+        flash('Bu projeyi çalıştırma yetkiniz yok!', 'error')
+        return redirect(url_for('project.list_projects'))
+    
+    prompts = suite_prompts(project.id)
+    tags = sorted({tag for prompt in prompts for tag in prompt.tag_list})
+    form = SuiteRunForm()
+    form.tag.choices = [('', f'Tüm prompt\'lar ({len(prompts)})')] + [
+        (tag, f'#{tag} ({sum(tag in prompt.tag_list for prompt in prompts)})') for tag in tags
+    ]
+    if request.method == 'GET':
+        form.max_parallel.data = current_app.config['SUITE_MAX_PARALLEL']
+    
+    if form.validate_on_submit():
+        suite, test_result_ids = start_suite(
+            project, current_user.id, form.tag.data, form.max_parallel.data, form.project_url.data
+        )
+        if suite is None:
+            flash('Çalıştırılacak prompt bulunamadı.', 'error')
+            return redirect(url_for('test.run_suite', project_id=project.id))
+        
+        # Testler normal kuyruktan paralel çalışır (WEB_RUNS_TESTS kapalıysa worker.py süreçleri alır)
+        if current_app.config['WEB_RUNS_TESTS']:
+            runner = current_app.extensions['test_runner']
+            for test_result_id in test_result_ids:
+                runner.submit(test_result_id)
+        
+        flash(f'{len(test_result_ids)} test suite olarak kuyruğa alındı.', 'success')
+        return redirect(url_for('test.suite_result', suite_run_id=suite.id))
+    
+    suite_runs = project.suite_runs.order_by(TestSuiteRun.id.desc()).limit(10).all()
+    return render_template('tests/run_suite.html', form=form, project=project, prompts=prompts, suite_runs=suite_runs)
+
+def get_suite_or_404(suite_run_id):
+    """Suite çalıştırmasını projesiyle birlikte getir; yoksa 404"""
+    suite = TestSuiteRun.query.options(joinedload(TestSuiteRun.project)).filter_by(id=suite_run_id).first()
+    # Projesi silinmiş (bu düzeltmeden önce kalmış) suite kayıtları da bulunamadı sayılır
+    if suite is None or suite.project is None:
+        abort(404)
+    return suite
+
+# Suite raporu
+@test_bp.route('/suite/<int:suite_run_id>')
+@login_required
+def suite_result(suite_run_id):
+    suite = get_suite_or_404(suite_run_id)
+    
+    # Kullanıcı yetkisi kontrolü
+    if suite.project.user_id != current_user.id:
+        flash('Bu suite raporunu görme yetkiniz yok!', 'error')
+        return redirect(url_for('project.list_projects'))
+    
+    report = suite_report(suite)
+    # Runner'ın kapatamadığı (ör. kirası dolarak durdurulan) son test için raporu burada tamamla
+    if suite.status == 'running' and report['finished'] == len(report['results']):
+        finish_suite(suite.id)
+        db.session.refresh(suite)
+    
+    return render_template('tests/suite.html', suite=suite, project=suite.project, **report)
+
+# API endpoint - Suite ilerlemesi
+@test_bp.route('/api/suite/<int:suite_run_id>')
+@login_required
+def api_suite_result(suite_run_id):
+    suite = get_suite_or_404(suite_run_id)
+    
+    # Kullanıcı yetkisi kontrolü
+    if suite.project.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    counts = dict(db.session.query(TestResult.status, db.func.count()).filter_by(
+        suite_run_id=suite.id
+    ).group_by(TestResult.status).all())
+    return jsonify({
+        'id': suite.id,
+        'status': suite.status,
+        'total': suite.total,
+        'counts': counts,
+        'passed': suite.passed,
+        'failed': suite.failed,
+        'stopped': suite.stopped,
+        'duration': suite.duration,
+        'serial_duration': suite.serial_duration,
+        'completed_at': suite.completed_at.isoformat() if suite.completed_at else None,
+    })
+
+# Suite'i durdurma
+@test_bp.route('/suite/<int:suite_run_id>/stop', methods=['POST'])
+@login_required
+def stop_suite_run(suite_run_id):
+    suite = get_suite_or_404(suite_run_id)
+    
+    # Kullanıcı yetkisi kontrolü
+    if suite.project.user_id != current_user.id:
+        flash('Bu suite\'i durdurma yetkiniz yok!', 'error')
+        return redirect(url_for('project.list_projects'))
+    
+    stopped, stopping = stop_suite(suite)
+    flash(f'{stopped} test kuyruktan çıkarıldı, {stopping} çalışan test için durdurma talebi gönderildi.', 'info')
+    return redirect(url_for('test.suite_result', suite_run_id=suite.id))
+
+# Periyodik izleme takvimi
+@test_bp.route('/prompt/<int:prompt_id>/schedule', methods=['GET', 'POST'])
+@login_required
+def schedule_test(prompt_id):
+    prompt = TestPrompt.query.get_or_404(prompt_id)
+    project = Project.query.get_or_404(prompt.project_id)
+    
+    # Kullanıcı yetkisi kontrolü
+    if project.user_id != current_user.id:
+        flash('Bu testi zamanlama yetkiniz yok!', 'error')
+        return redirect(url_for('project.list_projects'))
+    
+    schedule = TestSchedule.query.filter_by(prompt_id=prompt_id).first()
+    form = ScheduleForm(obj=schedule)
+    
+    if form.validate_on_submit():
+        if schedule is None:
+            schedule = TestSchedule(prompt_id=prompt_id, user_id=current_user.id)
+            db.session.add(schedule)
+        schedule.enabled = form.enabled.data
+        schedule.interval_minutes = form.interval_minutes.data or None
+        schedule.cron_expression = (form.cron_expression.data or '').strip() or None
+        schedule.jitter_seconds = form.jitter_seconds.data or 0
+        schedule.catchup = form.catchup.data
+        schedule.project_url = form.project_url.data or None
+        # Takvim değişince sıradaki zaman şimdiden itibaren yeniden hesaplanır
+        plan_schedule(schedule)
+        db.session.commit()
+        flash(f'Takvim kaydedildi, sıradaki çalışma: {schedule.next_run_at.strftime("%d.%m.%Y %H:%M")} (UTC)', 'success')
+        return redirect(url_for('test.schedule_test', prompt_id=prompt_id))
+    
+    recent_results = TestResult.query.filter(
+        TestResult.schedule_id == schedule.id
+    ).order_by(TestResult.id.desc()).limit(10).all() if schedule else []
+    
+    return render_template('tests/schedule.html', form=form, prompt=prompt, project=project,
+                           schedule=schedule, recent_results=recent_results)
+
+@test_bp.route('/prompt/<int:prompt_id>/schedule/delete', methods=['POST'])
+@login_required
+def delete_schedule(prompt_id):
+    prompt = TestPrompt.query.get_or_404(prompt_id)
+    
+    # Kullanıcı yetkisi kontrolü
+    if prompt.project.user_id != current_user.id:
+        flash('Bu takvimi silme yetkiniz yok!', 'error')
+        return redirect(url_for('project.list_projects'))
+    
+    TestSchedule.query.filter_by(prompt_id=prompt_id).delete()
+    db.session.commit()
+    flash('Takvim silindi.', 'success')
+    return redirect(url_for('project.project_detail', project_id=prompt.project_id))
+
+def get_result_or_404(test_result_id):
+    """TestResult'u prompt'u ve projesiyle tek sorguda yükle: (test_result, prompt, project)"""
+    test_result = TestResult.query.join(TestResult.prompt).join(TestPrompt.project).options(
+        contains_eager(TestResult.prompt).contains_eager(TestPrompt.project)
+    ).filter(TestResult.id == test_result_id).first_or_404()
+    return test_result, test_result.prompt, test_result.prompt.project
 
 # Test sonucu sayfası
 @test_bp.route('/result/<int:test_result_id>')
 @login_required
 def test_result(test_result_id):
-    test_result = TestResult.query.get_or_404(test_result_id)
-    prompt = TestPrompt.query.get_or_404(test_result.prompt_id)
-    project = Project.query.get_or_404(prompt.project_id)
+    test_result, prompt, project = get_result_or_404(test_result_id)
     
     # Kullanıcı yetkisi kontrolü
     if project.user_id != current_user.id:
         flash('Bu test sonucunu görme yetkiniz yok!', 'error')
         return redirect(url_for('project.list_projects'))
     
-    return render_template('tests/result.html', test_result=test_result, prompt=prompt, project=project)
+    # Arşivlenmiş testin log adımları ve uzun metinleri arşiv dosyasından okunur
+    archived = load_archived(current_app, test_result)
+    if archived is not None:
+        details = {
+            'steps': archived['steps'],
+            'result_text': archived['result_text'],
+            'error_message': archived['error_message'],
+            'step_result_list': json.loads(archived['step_results']) if archived['step_results'] else [],
+        }
+    else:
+        details = {
+            'steps': test_result.steps.all(),
+            'result_text': test_result.result_text,
+            'error_message': test_result.error_message,
+            'step_result_list': test_result.step_result_list,
+        }
+    # Sayfada sadece ek referansları; içerik test_artifact endpoint'inden ayrı yüklenir
+    artifacts = test_result.artifacts.all()
+    
+    return render_template('tests/result.html', test_result=test_result, prompt=prompt, project=project,
+                           queue_position=queue_position(test_result), archived=archived is not None, **details,
+                           waterfall=step_waterfall(details['steps']), phase_labels=PHASE_LABELS, phase_colors=PHASE_COLORS,
+                           screenshots=[a for a in artifacts if a.kind == 'screenshot'],
+                           files=[a for a in artifacts if a.kind != 'screenshot'])
+
+# Test eki (ekran görüntüsü, agent geçmişi, indirilen dosya)
+@test_bp.route('/result/<int:test_result_id>/artifact/<int:artifact_id>')
+@login_required
+def test_artifact(test_result_id, artifact_id):
+    test_result, prompt, project = get_result_or_404(test_result_id)
+    
+    # Kullanıcı yetkisi kontrolü
+    if project.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    artifact = Artifact.query.filter_by(id=artifact_id, test_result_id=test_result_id).first_or_404()
+    store = current_app.extensions['artifact_store']
+    path = store.path_for(artifact.sha256, artifact.compressed)
+    if not os.path.exists(path):
+        abort(404)
+    
+    as_attachment = artifact.kind == 'download' or request.args.get('download', type=int) == 1
+    download_name = artifact.name.replace('/', '_')
+    # İçerik özetiyle adreslendiği için değişmez; tarayıcı önbelleğinde uzun süre tutulabilir
+    file_options = {'mimetype': artifact.content_type, 'as_attachment': as_attachment,
+                    'download_name': download_name, 'etag': artifact.sha256, 'max_age': 31536000}
+    if not artifact.compressed:
+        return send_file(path, **file_options)
+    
+    # gzip kabul eden istemciye dosya olduğu gibi, diğerlerine açılarak akış halinde gönderilir
+    if 'gzip' in request.accept_encodings:
+        response = send_file(path, **file_options)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(stream_with_context(store.iter_content(artifact)), mimetype=artifact.content_type)
+        response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                             filename=download_name)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 # Test sonucu API (AJAX için)
 @test_bp.route('/api/result/<int:test_result_id>')
 @login_required
 def api_test_result(test_result_id):
-    test_result = TestResult.query.get_or_404(test_result_id)
-    prompt = TestPrompt.query.get_or_404(test_result.prompt_id)
-    project = Project.query.get_or_404(prompt.project_id)
+    test_result, prompt, project = get_result_or_404(test_result_id)
     
     # Kullanıcı yetkisi kontrolü
     if project.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    # Running details'i parse et
-    running_details = []
-    if test_result.running_details:
-        try:
-            running_details = json.loads(test_result.running_details)
-        except json.JSONDecodeError:
-            running_details = []
+    # ?since=<seq> verilirse sadece o sıradan sonraki yeni loglar döner (artımlı polling)
+    since = request.args.get('since', type=int)
+    if since is not None:
+        new_logs = [
+            step.to_dict()
+            for step in test_result.steps.filter(TestStep.seq > since).limit(LOG_PAGE_SIZE)
+        ]
+        return jsonify({
+            'id': test_result.id,
+            'status': test_result.status,
+            'current_step': test_result.current_step,
+            'total_steps': test_result.total_steps,
+            'queue_position': queue_position(test_result),
+            'new_logs': new_logs,
+            'cursor': new_logs[-1]['seq'] if new_logs else since
+        })
+    
+    archived = load_archived(current_app, test_result) or {}
+    running_details = archived.get('steps') or [step.to_dict() for step in test_result.steps]
     
     return jsonify({
         'id': test_result.id,
@@ -337,29 +622,140 @@ def api_test_result(test_result_id):
         'current_step': test_result.current_step,
         'total_steps': test_result.total_steps,
         'running_details': running_details,
-        'result_text': test_result.result_text,
-        'error_message': test_result.error_message,
+        'cursor': running_details[-1]['seq'] if running_details else 0,
+        'result_text': archived.get('result_text', test_result.result_text),
+        'error_message': archived.get('error_message', test_result.error_message),
         'created_at': test_result.created_at.isoformat() if test_result.created_at else None,
         'completed_at': test_result.completed_at.isoformat() if test_result.completed_at else None,
-        'stop_requested': test_result.stop_requested
+        'stop_requested': test_result.stop_requested,
+        'queue_position': queue_position(test_result)
     })
 
+# Test canlı akışı (Server-Sent Events)
+@test_bp.route('/stream/<int:test_result_id>')
+@login_required
+def stream_test_result(test_result_id):
+    test_result, prompt, project = get_result_or_404(test_result_id)
+    
+    # Kullanıcı yetkisi kontrolü
+    if project.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    # Tarayıcı yeniden bağlanırken Last-Event-ID başlığını kendisi gönderir
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    if last_event_id is None:
+        last_event_id = request.args.get('last_event_id', 0, type=int)
+    heartbeat = current_app.config['SSE_HEARTBEAT_INTERVAL']
+    # Başka süreçte çalışan testlerin olaylarını tüm izleyiciler için tek thread veritabanından getirir
+    current_app.extensions['stream_poller'].start()
+    
+    def snapshot(cursor):
+        """Veritabanından güncel durumu ve cursor sonrası logları oku"""
+        current = db.session.query(
+            TestResult.status, TestResult.current_step, TestResult.total_steps
+        ).filter(TestResult.id == test_result_id).first()
+        new_logs = [
+            step.to_dict()
+            for step in TestStep.query.filter(
+                TestStep.test_result_id == test_result_id,
+                TestStep.seq > cursor
+            ).order_by(TestStep.seq)
+        ]
+        # Uzun süren akış boyunca veritabanı bağlantısını tutma
+        db.session.remove()
+        if current is None:
+            return None
+        return {
+            'status': current.status,
+            'current_step': current.current_step,
+            'total_steps': current.total_steps,
+            'new_logs': new_logs
+        }
+    
+    def sse(data, event_id):
+        return f"id: {event_id}\ndata: {json.dumps(data)}\n\n"
+    
+    def generate():
+        cursor = last_event_id
+        # Önce abone ol, sonra veritabanını oku; aradaki olaylar kaçmaz
+        position = bus.subscribe(test_result_id)
+        try:
+            yield "retry: 5000\n\n"
+            
+            data = snapshot(cursor)
+            if data is None:
+                return
+            status = data['status']
+            if data['new_logs']:
+                cursor = data['new_logs'][-1]['seq']
+            yield sse(data, cursor)
+            bus.seen(test_result_id, cursor, status)
+            
+            while status not in TestResult.FINISHED_STATUSES:
+                position, events, missed = bus.wait(test_result_id, position, heartbeat)
+                
+                if missed:
+                    # Halka tamponun gerisinde kalındı: eksikleri veritabanından tamamla
+                    data = snapshot(cursor)
+                    if data is None:
+                        return
+                    if data['new_logs'] or data['status'] != status:
+                        events = [(None, data)]
+                
+                if not events:
+                    yield ": heartbeat\n\n"
+                    continue
+                
+                for event_id, data in events:
+                    if data is None:
+                        return  # Test silindi
+                    new_logs = [log for log in data['new_logs'] if log['seq'] > cursor]
+                    if data['new_logs'] and not new_logs and data['status'] == status:
+                        continue  # Bu loglar zaten gönderildi
+                    if new_logs:
+                        cursor = new_logs[-1]['seq']
+                    status = data['status']
+                    yield sse(dict(data, new_logs=new_logs), cursor)
+        finally:
+            bus.unsubscribe(test_result_id)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # Test durdurma
 @test_bp.route('/api/result/<int:test_result_id>/stop', methods=['POST'])
 @login_required
 def api_stop_test(test_result_id):
-    test_result = TestResult.query.get_or_404(test_result_id)
-    prompt = TestPrompt.query.get_or_404(test_result.prompt_id)
-    project = Project.query.get_or_404(prompt.project_id)
+    test_result, prompt, project = get_result_or_404(test_result_id)
     
     # Kullanıcı yetkisi kontrolü
     if project.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
     
+    # Kuyrukta bekleyen test hiç başlamadan iptal edilir
+    if test_result.status == 'pending':
+        updated = TestResult.query.filter_by(id=test_result.id, status='pending').update(
+            {'status': 'stopped', 'stop_requested': True, 'completed_at': datetime.utcnow()},
+            synchronize_session=False
+        )
+        if updated:
+            record_transitions([(project.user_id, test_result.created_at, 'pending')], 'stopped')
+        db.session.commit()
+        db.session.refresh(test_result)
+        if updated:
+            publish_status(test_result, final=True)
+            if test_result.suite_run_id:
+                finish_suite(test_result.suite_run_id)
+            return jsonify({'success': True, 'message': 'Test kuyruktan çıkarıldı'})
+    
     # Sadece çalışan testleri durdur
-    if test_result.status in ['pending', 'running']:
+    if test_result.status == 'running':
+        # Bayrak başka süreçlerdeki worker'lar için; bu süreçteki test anında iptal edilir
         test_result.stop_requested = True
         db.session.commit()
+        cancellations.cancel(test_result.id)
         return jsonify({'success': True, 'message': 'Test durdurma talebi gönderildi'})
     else:
         return jsonify({'error': 'Test zaten tamamlanmış veya durdurulmuş'}), 400
@@ -368,246 +764,72 @@ def api_stop_test(test_result_id):
 @test_bp.route('/result/<int:test_result_id>/delete', methods=['POST'])
 @login_required
 def delete_test_result(test_result_id):
-    test_result = TestResult.query.get_or_404(test_result_id)
-    prompt = TestPrompt.query.get_or_404(test_result.prompt_id)
-    project = Project.query.get_or_404(prompt.project_id)
+    test_result, prompt, project = get_result_or_404(test_result_id)
     
     # Kullanıcı yetkisi kontrolü
     if project.user_id != current_user.id:
         flash('Bu test sonucunu silme yetkiniz yok!', 'error')
         return redirect(url_for('project.list_projects'))
     
+    if test_result.status == 'running':
+        flash('Çalışan test silinemez; önce durdurun.', 'error')
+        return redirect(url_for('test.test_result', test_result_id=test_result_id))
+    
+    artifact_hashes = {row.sha256 for row in test_result.artifacts.with_entities(Artifact.sha256)}
+    record_transition(test_result, None)
     db.session.delete(test_result)
     db.session.commit()
+    release_artifacts(current_app, artifact_hashes)
     flash('Test sonucu başarıyla silindi!', 'success')
     return redirect(url_for('project.project_detail', project_id=project.id))
 
-def run_browser_test_async(app, test_result_id, project_url, prompt_content):
-    """Arka planda browser test çalıştır - GERÇEK BROWSER AUTOMATION"""
-    import json
-    test_logs = []
-    
-    def log_step(message):
-        """Test adımını veritabanına kaydet"""
-        timestamp = datetime.utcnow().strftime('%H:%M:%S')
-        log_entry = {'timestamp': timestamp, 'message': message}
-        test_logs.append(log_entry)
-        
-        # Veritabanını güncelle
-        try:
-            with app.app_context():
-                test_result = TestResult.query.get(test_result_id)
-                if test_result:
-                    test_result.running_details = json.dumps(test_logs)
-                    test_result.current_step = len(test_logs)
-                    db.session.commit()
-        except Exception as e:
-            print(f"Log kaydetme hatası: {e}")
-        
-        print(f"[{timestamp}] {message}")
-    
-    def check_stop_requested():
-        """Durdurma talebi var mı kontrol et"""
-        try:
-            with app.app_context():
-                test_result = TestResult.query.get(test_result_id)
-                return test_result and test_result.stop_requested
-        except Exception as e:
-            print(f"Durdurma kontrolü hatası: {e}")
-            return False
+# Seçili sonuçları veya filtreye uyan tüm sonuçları toplu silme
+@test_bp.route('/results/delete', methods=['POST'])
+@login_required
+def bulk_delete_results():
+    result_ids = request.form.getlist('result_ids', type=int)
+    filters = history_filters(request.form)
     
-    try:
-        from browser_use import Agent
-        import os
-        from dotenv import load_dotenv
-        
-        # .env dosyasını yükle
-        load_dotenv()
-        
-        log_step("🚀 Test başlatılıyor...")
-        log_step("⚠️ GERÇEK BROWSER AÇILACAK VE OTOMASYON YAPILACAK!")
-        
-        # Güvenli tür dönüşümü için helper fonksiyon
-        def safe_int(value, default):
-            try:
-                return int(value) if value else default
-            except (ValueError, TypeError):
-                return default
-        
-        # Prompt içeriğini URL ile değiştir ve daha net hale getir
-        formatted_prompt = f"""
-Öncelikle şu web sitesini ziyaret et: {project_url}
+    if result_ids:
+        # Sayfadaki seçim küçük olduğundan tek transaction'da silinir
+        artifact_hashes = delete_results(finished_results(owned_results(current_user.id, ids=result_ids)))
+        db.session.commit()
+        release_artifacts(current_app, artifact_hashes)
+        flash('Seçilen test sonuçları silindi (çalışan testler hariç).', 'success')
+    elif request.form.get('scope') == 'filter':
+        description = 'Filtreye uyan test sonuçları siliniyor' if any(filters.values()) else 'Tüm test sonuçları siliniyor'
+        current_app.extensions['bulk_jobs'].create(current_user.id, 'delete_results', filters, description)
+        flash('Test sonuçları arka planda siliniyor, ilerleme aşağıda görünür.', 'info')
+    else:
+        flash('Silinecek test sonucu seçilmedi.', 'error')
+    return redirect(url_for('test.test_history', **{name: value for name, value in filters.items() if value}))
 
-Sonra aşağıdaki adımları takip et:
+# Seçili sonuçların prompt'larını yeniden çalıştırma
+@test_bp.route('/results/rerun', methods=['POST'])
+@login_required
+def bulk_rerun_results():
+    result_ids = request.form.getlist('result_ids', type=int)
+    filters = history_filters(request.form)
+    
+    test_result_ids = rerun_results(current_user.id, result_ids) if result_ids else []
+    if test_result_ids:
+        if current_app.config['WEB_RUNS_TESTS']:
+            runner = current_app.extensions['test_runner']
+            for test_result_id in test_result_ids:
+                runner.submit(test_result_id)
+        flash(f'{len(test_result_ids)} test yeniden kuyruğa alındı.', 'success')
+    else:
+        flash('Yeniden çalıştırılacak test sonucu seçilmedi.', 'error')
+    return redirect(url_for('test.test_history', **{name: value for name, value in filters.items() if value}))
 
-{prompt_content.replace('Belirtilen URL\'yi ziyaret et: {url}', '').replace('1. adım:', 'Adım 1:').replace('2. adım:', 'Adım 2:')}
-"""
-        
-        log_step(f"🌐 Hedef URL: {project_url}")
-        log_step("📋 Formatted prompt ilk 300 karakter:")
-        log_step(formatted_prompt[:300] + "...")
-        
-        # Test sonucunu güncelle
-        with app.app_context():
-            test_result = TestResult.query.get(test_result_id)
-            test_result.status = 'running'
-            test_result.total_steps = safe_int(os.getenv('MAX_STEPS'), 100)
-            db.session.commit()
-        
-        # Konfigürasyon değerleri
-        
-        config = {
-            'max_steps': safe_int(os.getenv('MAX_STEPS'), 100),
-            'headless': os.getenv('HEADLESS', 'False').lower() == 'true',
-            'window_width': safe_int(os.getenv('WINDOW_WIDTH'), 1920),
-            'window_height': safe_int(os.getenv('WINDOW_HEIGHT'), 1080),
-            'implicit_wait': safe_int(os.getenv('IMPLICIT_WAIT'), 5),
-            'explicit_wait': safe_int(os.getenv('EXPLICIT_WAIT'), 10),
-            'llm_provider': os.getenv('LLM_PROVIDER', 'gemini'),
-            'llm_model': os.getenv('LLM_MODEL', 'gemini-flash-latest'),
-            'api_key': os.getenv('OPENAI_API_KEY'),
-            'gemini_api_key': os.getenv('GEMINI_API_KEY'),
-        }
-        
-        log_step(f"🤖 LLM Provider: {config['llm_provider']} ({config['llm_model']})")
-        log_step(f"📊 Max Steps: {config['max_steps']} (Type: {type(config['max_steps'])})")
-        log_step(f"👁️ Headless Mode: {config['headless']}")
-        log_step(f"🖥️ Window Size: {config['window_width']}x{config['window_height']}")
-        
-        # LLM konfigürasyonunu dinamik olarak oluştur
-        def get_llm_config(config):
-            provider = config['llm_provider'].lower()
-            model = config['llm_model']
-            
-            if provider == 'openai':
-                if not config['api_key']:
-                    log_step("⚠️ OPENAI_API_KEY bulunamadı, Browser-Use default kullanılacak")
-                    return None
-                return {
-                    "provider": "openai",
-                    "api_key": config['api_key'],
-                    "model": model
-                }
-            elif provider == 'gemini':
-                if not config['gemini_api_key']:
-                    log_step("⚠️ GEMINI_API_KEY bulunamadı, Browser-Use default Gemini kullanılacak")
-                    return None
-                return {
-                    "provider": "gemini",
-                    "api_key": config['gemini_api_key'],
-                    "model": model
-                }
-            elif provider == 'anthropic':
-                anthropic_key = os.getenv('ANTHROPIC_API_KEY')
-                if not anthropic_key:
-                    log_step("⚠️ ANTHROPIC_API_KEY bulunamadı, Browser-Use default kullanılacak")
-                    return None
-                return {
-                    "provider": "anthropic", 
-                    "api_key": anthropic_key,
-                    "model": model
-                }
-            else:
-                log_step(f"⚠️ Bilinmeyen provider '{provider}', Browser-Use default kullanılacak")
-                return None
-        
-        # Browser config - FORCED VISIBLE MODE
-        browser_config = {
-            "headless": False,  # Zorla görünür mod
-            "window_size": (config['window_width'], config['window_height']),
-            "page_load_strategy": "eager",
-            "implicit_wait": config['implicit_wait'],
-            "explicit_wait": config['explicit_wait'],
-            "disable_images": False,
-            "disable_javascript": False,
-            "chrome_options": [
-                "--start-maximized",
-                "--disable-web-security",
-                "--disable-features=VizDisplayCompositor"
-            ]
-        }
-        
-        log_step(f"⚙️ Browser Config: {browser_config}")
-        
-        # LLM konfigürasyonunu al
-        llm_config = get_llm_config(config)
-        
-        log_step("🔧 Browser agent yapılandırılıyor...")
-        
-        # Max steps değerini garantili integer yap
-        max_steps_int = int(config['max_steps']) if isinstance(config['max_steps'], (str, int)) else 100
-        log_step(f"🔢 Final max_steps: {max_steps_int} (Type: {type(max_steps_int)})")
-        
-        # Dinamik LLM konfigürasyonu ile Agent oluştur
-        if llm_config:
-            log_step(f"✅ Kullanılan LLM: {llm_config['provider']} - {llm_config['model']}")
-            agent = Agent(
-                task=formatted_prompt,
-                llm_config=llm_config,
-                max_steps=max_steps_int,
-                use_vision=True,
-                save_conversation_history=False,
-                browser_config=browser_config
-            )
-        else:
-            log_step("🔧 Browser-Use default LLM kullanılıyor (Gemini Flash Latest)")
-            agent = Agent(
-                task=formatted_prompt,
-                max_steps=max_steps_int,
-                use_vision=True,
-                save_conversation_history=False,
-                browser_config=browser_config
-            )
-        
-        log_step("🌐 Browser açılıyor ve test başlatılıyor...")
-        log_step("🤖 Browser-use AI Agent devreye giriyor...")
-        
-        # GERÇEK BROWSER AUTOMATION - Browser açılacak ve otomatik test yapılacak!
-        log_step("🚀 GERÇEK BROWSER AUTOMATION BAŞLIYOR - Browser açılıyor...")
-        log_step(f"⚠️ Bu aşamada tarayıcı penceresi açılacak! Headless: {config['headless']}")
-        log_step(f"🌐 Ziyaret edilecek URL: {project_url}")
-        log_step("📋 Agent task preview:")
-        log_step(formatted_prompt[:200] + "...")
-        
-        # Gerçek browser automation çalıştır
-        # Browser-use async çağrısı
-        log_step("🚀 Agent async çağrısı yapılıyor... BROWSER AÇILIYOR!")
-        
-        import asyncio
-        log_step("⏱️ Browser açılması bekleniyor...")
-        
-        # Async fonksiyonu sync olarak çalıştır
-        try:
-            result = asyncio.run(agent.run())
-        except Exception as async_error:
-            log_step(f"⚠️ Async hatası: {async_error}")
-            # Alternatif sync metod dene
-            result = agent.run_sync() if hasattr(agent, 'run_sync') else None
-        
-        log_step("🏁 Agent çağrısı tamamlandı!")
-        
-        log_step("✅ Browser automation tamamlandı!")
-        log_step(f"📊 Test sonucu: {str(result)[:300] if result else 'Başarıyla tamamlandı'}")
-        
-        # Sonucu kaydet
-        with app.app_context():
-            test_result = TestResult.query.get(test_result_id)
-            test_result.status = 'completed'
-            test_result.result_text = str(result) if result else 'Test completed successfully'
-            test_result.completed_at = datetime.utcnow()
-            db.session.commit()
-    
-    except Exception as e:
-        log_step(f"❌ Test hatası: {str(e)}")
-        print(f"Detaylı hata: {e}")
-        
-        # Hata durumunu kaydet
-        with app.app_context():
-            test_result = TestResult.query.get(test_result_id)
-            test_result.status = 'failed'
-            test_result.error_message = str(e)
-            test_result.completed_at = datetime.utcnow()
-            db.session.commit()
+# API endpoint - Toplu işlem ilerlemesi
+@test_bp.route('/api/jobs/<int:job_id>')
+@login_required
+def api_bulk_job(job_id):
+    job = db.session.get(BulkJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        return jsonify({'error': 'Toplu işlem bulunamadı'}), 404
+    return jsonify(job.to_dict())
 
 # Test Çalıştır Sayfası
 @test_bp.route('/run', methods=['GET', 'POST'])
@@ -616,8 +838,8 @@ def run_tests():
     """Test çalıştırma ana sayfası"""
     form = RunTestForm()
     
-    # Kullanıcının projelerini al
-    projects = Project.query.filter_by(user_id=current_user.id).all()
+    # Kullanıcının projelerini prompt'larıyla birlikte al (proje başına ayrı sorgu olmadan)
+    projects = Project.query.options(selectinload(Project.test_prompts)).filter_by(user_id=current_user.id).all()
     
     # Form için proje seçeneklerini doldur (tüm projeler)
     form.project_id.choices = [(0, 'Proje seçin...')] + [(p.id, p.name) for p in projects]
@@ -677,13 +899,60 @@ def run_tests():
 @test_bp.route('/history')
 @login_required
 def test_history():
-    """Test geçmişi sayfası"""
-    # Kullanıcının test sonuçlarını al (en son 50 test)
-    test_results = TestResult.query.join(TestPrompt).join(Project).filter(
+    """Test geçmişi sayfası (created_at, id) üzerinden keyset sayfalama ile"""
+    filters = history_filters(request.args)
+    
+    query = TestResult.query.join(TestResult.project).options(
+        contains_eager(TestResult.project), joinedload(TestResult.prompt)
+    ).filter(
+        TestResult.user_id == current_user.id,
+        Project.user_id == current_user.id
+    )
+    for name, value in filters.items():
+        if value:
+            query = query.filter(getattr(TestResult, name) == value)
+    
+    # İmleç önceki sayfanın son kaydıdır; derin sayfalar da ilk sayfa kadar ucuzdur
+    cursor = parse_history_cursor(request.args.get('cursor'))
+    if cursor is not None:
+        query = query.filter(db.tuple_(TestResult.created_at, TestResult.id) < db.tuple_(*cursor))
+    
+    test_results = query.order_by(
+        TestResult.created_at.desc(), TestResult.id.desc()
+    ).limit(HISTORY_PAGE_SIZE + 1).all()
+    
+    next_cursor = None
+    if len(test_results) > HISTORY_PAGE_SIZE:
+        test_results = test_results[:HISTORY_PAGE_SIZE]
+        last = test_results[-1]
+        next_cursor = f'{last.created_at.isoformat()}_{last.id}'
+    
+    projects = Project.query.filter_by(user_id=current_user.id).order_by(Project.name).all()
+    prompts = TestPrompt.query.join(Project).filter(
         Project.user_id == current_user.id
-    ).order_by(TestResult.created_at.desc()).limit(50).all()
+    ).order_by(TestPrompt.name).all()
     
-    return render_template('tests/history.html', test_results=test_results)
+    return render_template('tests/history.html', test_results=test_results, next_cursor=next_cursor,
+                           is_first_page=cursor is None, filters=filters, projects=projects, prompts=prompts,
+                           bulk_jobs=recent_jobs(current_user.id))
+
+def history_filters(values):
+    """Geçmiş sayfasının filtreleri (sorgu parametrelerinden veya form alanlarından)"""
+    return {
+        'project_id': values.get('project_id', type=int),
+        'prompt_id': values.get('prompt_id', type=int),
+        'status': values.get('status') or None,
+    }
+
+def parse_history_cursor(value):
+    """'<created_at ISO>_<id>' biçimindeki imleci (created_at, id) olarak çöz; geçersizse None"""
+    if not value:
+        return None
+    created_at, _, result_id = value.rpartition('_')
+    try:
+        return datetime.fromisoformat(created_at), int(result_id)
+    except ValueError:
+        return None
 
 # AJAX endpoint - Proje için prompt'ları getir
 @test_bp.route('/api/project/<int:project_id>/prompts')
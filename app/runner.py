@@ -0,0 +1,295 @@
+from app import db
+from app.cancellation import cancellations
+from app.events import publish_status
+from app.models import Project, TestResult
+from app.sqlite import run_with_retry
+from app.stats import record_transition, record_transitions
+from app.suites import finish_suite_of, saturated_suites, suite_has_capacity
+from datetime import datetime, timedelta
+import asyncio
+import os
+import socket
+import threading
+
+
+class TestRunner:
+    """Bekleyen testleri sınırlı eşzamanlılıkla FIFO sırasında çalıştırır.
+
+    Kuyruk, veritabanındaki ``pending`` durumundaki TestResult kayıtlarıdır.
+    Sıradaki kayıt atomik bir UPDATE ile sahiplenilir; böylece web süreci
+    yeniden başlasa bile kuyruktaki testler kaybolmaz. Sahiplenilen test
+    süreli bir kira (lease) ile tutulur ve heartbeat ile yenilenir; kirası
+    dolan testler (çöken worker) tekrar kuyruğa alınır. Aynı veritabanına
+    bağlı birden fazla süreç (web, worker.py) güvenle birlikte çalışabilir.
+
+    Testler, tek bir executor thread'inin sahip olduğu kalıcı event loop
+    üzerinde görev (task) olarak çalışır; aynı anda en fazla ``max_workers``
+    test bir asyncio semaforu ile sınırlandırılır. ``EXECUTION_MODE=process``
+    olduğunda testler bu loop'tan ayrı worker süreçlerine gönderilir.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.max_workers = 2
+        self.poll_interval = 5
+        self.loop = None
+        self._thread = None
+        self._wakeup = None
+        self._lock = threading.Lock()
+        self._started = False
+        self.process_pool = None
+        self._running = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.max_workers = max(1, app.config.get('TEST_WORKERS', 2))
+        self.poll_interval = app.config.get('TEST_QUEUE_POLL_INTERVAL', 5)
+        self.worker_id = app.config.get('WORKER_ID') or f'{socket.gethostname()}:{os.getpid()}'
+        self.heartbeat_interval = app.config.get('TEST_HEARTBEAT_INTERVAL', 15)
+        self.lease_seconds = app.config.get('TEST_LEASE_SECONDS', 60)
+        if app.config.get('EXECUTION_MODE') == 'process':
+            from app.process_pool import ProcessPool
+            self.process_pool = ProcessPool(app)
+            self.max_workers = self.process_pool.size
+        app.extensions['test_runner'] = self
+
+    def start(self):
+        """Event loop thread'ini başlat (birden fazla çağrılabilir)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name='test-runner-loop', daemon=True)
+            self._thread.start()
+
+        with self.app.app_context():
+            pending = TestResult.query.filter_by(status='pending').count()
+        print(f"Test runner başlatıldı ({self.worker_id}): en fazla {self.max_workers} eşzamanlı test, kuyrukta {pending} test")
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self._wakeup = asyncio.Event()
+        if self.process_pool is not None:
+            self.process_pool.start(self.loop)
+        self.loop.create_task(self._dispatch())
+        self.loop.create_task(self._heartbeat())
+        self.loop.run_forever()
+
+    def submit(self, test_result_id):
+        """Kuyruğa yeni eklenen test için dağıtıcıyı uyandır (her thread'den çağrılabilir)"""
+        self.start()
+        self.loop.call_soon_threadsafe(self._notify)
+
+    def run_coroutine(self, coro):
+        """Runner'ın event loop'unda bir coroutine çalıştır; concurrent.futures.Future döner"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def _notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _dispatch(self):
+        semaphore = asyncio.Semaphore(self.max_workers)
+        while True:
+            # Önce yer aç, sonra sahiplen: boşta kapasite yokken kayıt kuyrukta kalır
+            await semaphore.acquire()
+            try:
+                test_result_id = await self.loop.run_in_executor(None, run_with_retry, self.app, self._claim_next)
+            except Exception as e:
+                print(f"Kuyruk okuma hatası: {e}")
+                test_result_id = None
+
+            if test_result_id is None:
+                semaphore.release()
+                # Yeni test gelene kadar bekle; diğer süreçlerin eklediği
+                # kayıtlar için belirli aralıklarla tekrar kontrol et
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            task = self.loop.create_task(self._execute(test_result_id))
+            task.add_done_callback(lambda _: semaphore.release())
+
+    def _claim_next(self):
+        """Sıradaki pending testi sahiplen ve id'sini döndür"""
+        with self.app.app_context():
+            self._requeue_expired()
+            while True:
+                candidate = db.session.query(TestResult.id, TestResult.created_at, Project.user_id).join(
+                    Project, TestResult.project_id == Project.id
+                ).filter(
+                    TestResult.status == 'pending',
+                    # Paralellik sınırı dolmuş suite'lerin testleri sırada bekler
+                    db.or_(TestResult.suite_run_id.is_(None), TestResult.suite_run_id.not_in(saturated_suites()))
+                ).order_by(TestResult.id).first()
+                if candidate is None:
+                    return None
+
+                # Aynı kaydı başka bir worker kapmışsa veya bu arada suite'in paralellik
+                # sınırı dolmuşsa rowcount 0 döner
+                now = datetime.utcnow()
+                claimed = TestResult.query.filter(
+                    TestResult.id == candidate.id,
+                    TestResult.status == 'pending',
+                    suite_has_capacity()
+                ).update({
+                    'status': 'running',
+                    'started_at': now,
+                    'worker_id': self.worker_id,
+                    'lease_expires_at': now + timedelta(seconds=self.lease_seconds)
+                }, synchronize_session=False)
+                if claimed:
+                    record_transitions([(candidate.user_id, candidate.created_at, 'pending')], 'running')
+                db.session.commit()
+                if claimed:
+                    return candidate.id
+
+    def _requeue_expired(self):
+        """Kirası dolmuş (worker'ı çökmüş) testleri kuyruğa geri al (app context içinde)
+
+        Kirası hiç yazılmamış running kayıtlar (kira öncesi sürümden kalanlar) da süresi dolmuş sayılır.
+        """
+        now = datetime.utcnow()
+        lease_expired = db.or_(TestResult.lease_expires_at.is_(None), TestResult.lease_expires_at < now)
+        expired = db.session.query(
+            TestResult.id, TestResult.created_at, TestResult.started_at, TestResult.stop_requested, Project.user_id
+        ).join(Project, TestResult.project_id == Project.id).filter(
+            TestResult.status == 'running',
+            lease_expired
+        ).all()
+        if not expired:
+            return
+
+        stopped = requeued = 0
+        for row in expired:
+            # Bu arada durdurulması istenen testler tekrar çalıştırılmaz
+            if row.stop_requested:
+                changes = {'status': 'stopped', 'completed_at': now, 'lease_expires_at': None}
+                if row.started_at:
+                    changes['execution_time'] = (now - row.started_at).total_seconds()
+            else:
+                changes = {'status': 'pending', 'worker_id': None, 'lease_expires_at': None}
+            # Kirası bu arada yenilenen veya başka süreçte kapanan test atlanır
+            updated = TestResult.query.filter(
+                TestResult.id == row.id,
+                TestResult.status == 'running',
+                lease_expired
+            ).update(changes, synchronize_session=False)
+            if updated:
+                record_transitions([(row.user_id, row.created_at, 'running')], changes['status'])
+                stopped += row.stop_requested
+                requeued += not row.stop_requested
+        db.session.commit()
+        if stopped or requeued:
+            print(f"Kirası dolan testler: {requeued} tanesi kuyruğa alındı, {stopped} tanesi durduruldu")
+
+    def requeue_owned(self):
+        """Bu worker'ın yarım kalan testlerini kuyruğa geri bırak (kapanışta çağrılır)"""
+        with self.app.app_context():
+            owned = db.session.query(TestResult.id, TestResult.created_at, Project.user_id).join(
+                Project, TestResult.project_id == Project.id
+            ).filter(TestResult.status == 'running', TestResult.worker_id == self.worker_id).all()
+            requeued = []
+            for row in owned:
+                if TestResult.query.filter_by(id=row.id, status='running', worker_id=self.worker_id).update(
+                    {'status': 'pending', 'worker_id': None, 'lease_expires_at': None},
+                    synchronize_session=False
+                ):
+                    requeued.append((row.user_id, row.created_at, 'running'))
+            record_transitions(requeued, 'pending')
+            db.session.commit()
+        return len(requeued)
+
+    async def _heartbeat(self):
+        """Bu worker'ın çalıştırdığı testlerin kirasını düzenli olarak yenile"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self._running:
+                continue
+            try:
+                lost = await self.loop.run_in_executor(
+                    None, run_with_retry, self.app, self._renew_leases, set(self._running)
+                )
+            except Exception as e:
+                print(f"Heartbeat hatası: {e}")
+                continue
+            for test_result_id in lost:
+                # Kira başka worker'a geçti; bu kopya durdurulur, sonuç yazmaz
+                print(f"Test {test_result_id} kirası kaybedildi, yerel çalışma durduruluyor")
+                cancellations.cancel(test_result_id)
+
+    def _renew_leases(self, test_result_ids):
+        """Kiraları uzat; artık bu worker'a ait olmayan test id'lerini döndür"""
+        with self.app.app_context():
+            lease_expires_at = datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+            owned = TestResult.query.filter(
+                TestResult.id.in_(test_result_ids),
+                TestResult.status == 'running',
+                TestResult.worker_id == self.worker_id
+            )
+            owned_ids = {row.id for row in owned.with_entities(TestResult.id)}
+            owned.update({'lease_expires_at': lease_expires_at}, synchronize_session=False)
+            db.session.commit()
+            return test_result_ids - owned_ids
+
+    async def _execute(self, test_result_id):
+        self._running.add(test_result_id)
+        try:
+            if self.process_pool is not None:
+                await self.process_pool.run(test_result_id)
+                return
+
+            from app.tasks import execute_test
+
+            project_url, prompt_content = await self.loop.run_in_executor(None, load_run, self.app, test_result_id)
+            await execute_test(self.app, test_result_id, project_url, prompt_content)
+        except Exception as e:
+            print(f"Worker hatası (test {test_result_id}): {e}")
+            await self.loop.run_in_executor(
+                None, run_with_retry, self.app, mark_failed, self.app, test_result_id, e, self.worker_id
+            )
+        finally:
+            self._running.discard(test_result_id)
+            # Suite'in son testiyse raporu yaz; sınırı dolan suite'in sıradaki testi için kuyruğa bak
+            try:
+                await self.loop.run_in_executor(None, run_with_retry, self.app, finish_suite_of, self.app, test_result_id)
+            except Exception as e:
+                print(f"Suite raporu yazılamadı (test {test_result_id}): {e}")
+            self._notify()
+
+
+def load_run(app, test_result_id):
+    """Çalıştırılacak testin URL'sini ve prompt içeriğini döndür"""
+    with app.app_context():
+        test_result = TestResult.query.get(test_result_id)
+        return test_result.project_url or test_result.project.url, test_result.prompt.content
+
+
+def mark_failed(app, test_result_id, error, worker_id=None):
+    """Hâlâ running görünen (ve worker_id verildiyse ona ait) testi başarısız olarak kapat"""
+    with app.app_context():
+        test_result = TestResult.query.get(test_result_id)
+        if test_result and test_result.status == 'running' and worker_id in (None, test_result.worker_id):
+            record_transition(test_result, 'failed')
+            test_result.status = 'failed'
+            test_result.error_message = str(error)
+            test_result.mark_completed()
+            db.session.commit()
+            publish_status(test_result, final=True)
+
+
+def queue_position(test_result):
+    """Pending bir testin kuyruktaki sırasını döndür (1'den başlar)"""
+    if test_result.status != 'pending':
+        return None
+    return TestResult.query.filter(
+        TestResult.status == 'pending',
+        TestResult.id < test_result.id
+    ).count() + 1
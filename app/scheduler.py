@@ -0,0 +1,241 @@
+from app import db
+from app.models import TestResult, TestSchedule
+from datetime import datetime, timedelta
+import random
+import threading
+
+# Cron alanlarının (dakika, saat, ayın günü, ay, haftanın günü) geçerli aralıkları
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+class CronExpression:
+    """Beş alanlı cron ifadesi (*, */n, a-b, a-b/n ve virgüllü listeler).
+
+    Haftanın günü 0 veya 7 = Pazar. Ayın günü ve haftanın günü birlikte
+    kısıtlanmışsa cron'daki gibi ikisinden birinin tutması yeterlidir.
+    """
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError("Cron ifadesi 5 alandan oluşmalı: dakika saat gün ay haftanın_günü")
+        fields = [_parse_field(part, low, high) for part, (low, high) in zip(parts, CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+        self.expression = expression
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        in_month = day.day in self.days
+        in_week = (day.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, moment):
+        """moment'tan sonraki ilk eşleşen dakika"""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        # Şubat 29 gibi seyrek eşleşmeler için 5 yıla kadar bakılır
+        for _ in range(366 * 5):
+            if self._day_matches(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"Cron ifadesi hiçbir zamanla eşleşmiyor: {self.expression}")
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for item in text.split(','):
+        value_range, _, step = item.partition('/')
+        if value_range == '*':
+            start, end = low, high
+        elif '-' in value_range:
+            start, end = (int(value) for value in value_range.split('-', 1))
+        else:
+            start = end = int(value_range)
+        step = int(step) if step else 1
+        if not (low <= start <= end <= high) or step < 1:
+            raise ValueError(f"Geçersiz cron alanı: {item} ({low}-{high} aralığında olmalı)")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def next_slot(schedule, after):
+    """Takvimde after'dan sonraki nominal çalışma zamanı"""
+    if schedule.cron_expression:
+        return CronExpression(schedule.cron_expression).next_after(after)
+    return after + timedelta(minutes=schedule.interval_minutes)
+
+
+def plan_schedule(schedule, now=None):
+    """Takvim kaydedildiğinde veya açıldığında sıradaki çalışma zamanını hesapla"""
+    now = now or datetime.utcnow()
+    schedule.next_slot_at = next_slot(schedule, now)
+    schedule.next_run_at = _with_jitter(schedule, schedule.next_slot_at)
+
+
+def _with_jitter(schedule, slot):
+    # Aynı dakikaya denk gelen çok sayıda izleme aynı anda kuyruğa düşmesin
+    return slot + timedelta(seconds=random.uniform(0, schedule.jitter_seconds or 0))
+
+
+class TestScheduler:
+    """Zamanı gelen TestSchedule kayıtları için normal TestResult kuyruğa ekler.
+
+    Tek bir thread tüm takvimleri ``next_run_at`` indeksiyle tarar; bir
+    takvim için sıradaki zaman koşullu UPDATE ile ilerletildiği için aynı
+    veritabanına bağlı birden fazla süreç (web, worker.py) aynı çalışmayı iki
+    kez oluşturmaz. Çalışmalar nominal takvime göre ilerler (gecikme birikmez);
+    önceki çalışma hâlâ kuyruktaysa veya sürüyorsa yeni çalışma atlanır.
+    ``RETENTION_DAYS`` ayarlıysa eski sonuçların arşivlenmesi de bu thread'de
+    ``RETENTION_INTERVAL_HOURS`` aralıkla yapılır.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.poll_interval = 30
+        self.misfire_grace = 300
+        self.batch_size = 200
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._next_retention = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.poll_interval = app.config.get('SCHEDULER_POLL_INTERVAL', 30)
+        self.misfire_grace = app.config.get('SCHEDULER_MISFIRE_GRACE', 300)
+        app.extensions['test_scheduler'] = self
+
+    def start(self):
+        """Zamanlayıcı thread'ini başlat (birden fazla çağrılabilir)"""
+        with self._lock:
+            if self._thread is not None or not self.app.config.get('SCHEDULER_ENABLED', True):
+                return
+            self._thread = threading.Thread(target=self._run, name='test-scheduler', daemon=True)
+            self._thread.start()
+        print(f"Zamanlayıcı başlatıldı: {self.poll_interval} sn aralıkla kontrol")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                created = self.tick()
+            except Exception as e:
+                print(f"Zamanlayıcı hatası: {e}")
+                created = []
+            runner = self.app.extensions['test_runner']
+            for test_result_id in created:
+                runner.submit(test_result_id)
+            self._run_retention()
+            self._stop.wait(self.poll_interval)
+
+    def _run_retention(self):
+        """Zamanı geldiyse eski test sonuçlarını arşivle"""
+        if not self.app.config.get('RETENTION_DAYS'):
+            return
+        now = datetime.utcnow()
+        if self._next_retention is not None and now < self._next_retention:
+            return
+        self._next_retention = now + timedelta(hours=self.app.config.get('RETENTION_INTERVAL_HOURS', 24))
+        from app.retention import archive_old_results
+        try:
+            archived = archive_old_results(self.app)
+        except Exception as e:
+            print(f"Arşivleme hatası: {e}")
+            return
+        if archived:
+            print(f"Arşivleme: {archived} eski test sonucu arşiv dosyalarına taşındı")
+
+    def tick(self, now=None):
+        """Zamanı gelen takvimleri işle; oluşturulan TestResult id'lerini döndür"""
+        now = now or datetime.utcnow()
+        created = []
+        overlapped = 0
+        with self.app.app_context():
+            while True:
+                due = TestSchedule.query.filter(
+                    TestSchedule.enabled == True,
+                    TestSchedule.next_run_at <= now
+                ).order_by(TestSchedule.next_run_at).limit(self.batch_size).all()
+                if not due:
+                    break
+
+                # Çakışma kontrolü için son çalışmaların durumu tek sorguda
+                last_ids = [schedule.last_result_id for schedule in due if schedule.last_result_id]
+                active = {row.id for row in db.session.query(TestResult.id).filter(
+                    TestResult.id.in_(last_ids),
+                    TestResult.status.in_(('pending', 'running'))
+                )} if last_ids else set()
+
+                for schedule in due:
+                    overlapping = schedule.last_result_id in active
+                    test_result_id = self._fire(schedule, now, overlapping)
+                    if test_result_id is not None:
+                        created.append(test_result_id)
+                    overlapped += overlapping
+                if len(due) < self.batch_size:
+                    break
+        if overlapped:
+            print(f"Zamanlayıcı: önceki çalışması süren {overlapped} takvim bu tur atlandı")
+        return created
+
+    def _fire(self, schedule, now, overlapping):
+        """Takvimi bir sonraki zamana ilerlet ve gerekiyorsa çalışma oluştur"""
+        slot = schedule.next_slot_at or schedule.next_run_at
+        missed_slots = 0
+        upcoming = next_slot(schedule, slot)
+        while upcoming <= now:
+            missed_slots += 1
+            upcoming = next_slot(schedule, upcoming)
+
+        # Süreç kapalıyken kaçırılan zamanlar catchup politikasına göre ele alınır
+        missed = missed_slots > 0 or (now - schedule.next_run_at).total_seconds() > self.misfire_grace
+        run = not overlapping and not (missed and schedule.catchup == 'skip')
+
+        changes = {
+            'next_slot_at': upcoming,
+            'next_run_at': _with_jitter(schedule, upcoming),
+        }
+        skipped = missed_slots + (0 if run else 1)
+        if skipped:
+            changes['skipped_runs'] = TestSchedule.skipped_runs + skipped
+
+        # Aynı zamanı başka bir süreç işlediyse rowcount 0 döner
+        claimed = TestSchedule.query.filter_by(id=schedule.id, next_run_at=schedule.next_run_at).update(
+            changes, synchronize_session=False
+        )
+        if not claimed:
+            db.session.rollback()
+            return None
+
+        test_result = None
+        if run:
+            prompt = schedule.prompt
+            test_result = TestResult(
+                project_id=prompt.project_id,
+                prompt_id=prompt.id,
+                user_id=schedule.user_id,
+                status='pending',
+                project_url=schedule.project_url or prompt.project.url,
+                schedule_id=schedule.id
+            )
+            db.session.add(test_result)
+            db.session.flush()
+            TestSchedule.query.filter_by(id=schedule.id).update(
+                {'last_run_at': now, 'last_result_id': test_result.id}, synchronize_session=False
+            )
+        db.session.commit()
+        return test_result.id if test_result else None
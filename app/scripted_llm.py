@@ -0,0 +1,159 @@
+"""Deterministik, ağsız LLM sağlayıcısı (LLM_PROVIDER=scripted).
+
+Benchmark ve yerel denemeler için gerçek model yerine önceden yazılmış bir
+senaryoyu adım adım oynatır. Senaryo ``LLM_SCRIPT`` ile verilir (JSON metni
+veya JSON dosyasının yolu); her eleman agent'ın bir adımıdır:
+
+    [{"open": "{url}"}, {"click": "Ürünler"}, {"input": {"target": "E-posta", "text": "a@b.com"}},
+     {"done": "Ürünler sayfası açıldı"}]
+
+``click`` ve ``input`` hedefleri sayfa durumundaki etkileşimli öğelerin
+metninde aranır; bulunan öğenin indeksi kullanılır, bulunamazsa çalışma
+başarısız ``done`` ile biter. ``{url}`` görevdeki ilk URL ile değiştirilir.
+``SCRIPTED_LLM_DELAY`` her yanıttan önce beklenen süredir (model gecikmesi).
+"""
+
+import asyncio
+import json
+import os
+import re
+
+DEFAULT_SCRIPT = [{'open': '{url}'}, {'done': 'Senaryo tamamlandı'}]
+
+# browser-use sürümlerine göre aynı eylemin farklı adları
+ACTION_NAMES = {
+    'open': ('go_to_url', 'navigate'),
+    'click': ('click_element_by_index', 'click'),
+    'input': ('input_text', 'input'),
+    'done': ('done',),
+}
+
+ELEMENT_MARKER = re.compile(r'\[(\d+)\]<')
+URL_PATTERN = re.compile(r'https?://[^\s\'"<>]+')
+
+
+def load_script(value):
+    """LLM_SCRIPT değerini (JSON metni veya dosya yolu) adım listesine çevir"""
+    if not value:
+        return list(DEFAULT_SCRIPT)
+    if not value.lstrip().startswith('['):
+        with open(value, encoding='utf-8') as f:
+            value = f.read()
+    return json.loads(value)
+
+
+class ScriptedChatModel:
+    """browser-use sohbet modeli arayüzünü (ainvoke) taklit eden senaryo oynatıcı.
+
+    Her agent kendi örneğini kullanır; adım sayacı örnekte tutulur.
+    """
+
+    provider = 'scripted'
+    model = 'scripted'
+    # browser-use API anahtarı doğrulamasını atlar
+    _verified_api_keys = True
+
+    def __init__(self, script=None, delay=0.0):
+        self.script = list(script if script is not None else DEFAULT_SCRIPT)
+        self.delay = delay
+        self.step = 0
+        self.url = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(load_script(os.getenv('LLM_SCRIPT')), float(os.getenv('SCRIPTED_LLM_DELAY') or 0))
+
+    @property
+    def name(self):
+        return self.model
+
+    @property
+    def model_name(self):
+        return self.model
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        texts = [_message_text(message) for message in messages]
+        if self.url is None:
+            match = next((URL_PATTERN.search(text) for text in texts if URL_PATTERN.search(text)), None)
+            self.url = match.group(0).rstrip('.,)') if match else ''
+
+        # Agent çıktısı beklenmeyen çağrılar (özet, değerlendirme vb.) senaryoyu ilerletmez
+        schema = _schema_text(output_format)
+        if output_format is None or '"action"' not in schema:
+            return _completion('Tamam' if output_format is None else _validate(output_format, {}))
+
+        state = next((text for text in reversed(texts) if ELEMENT_MARKER.search(text)), '')
+        action, goal = self._next_action(state, schema)
+        return _completion(_validate(output_format, {
+            'thinking': goal,
+            'evaluation_previous_goal': 'Önceki adım uygulandı',
+            'memory': f'Senaryo adımı {self.step}/{len(self.script)}',
+            'next_goal': goal,
+            'action': [action],
+        }))
+
+    def _next_action(self, state, schema):
+        if self.step >= len(self.script):
+            return _action('done', schema, text='Senaryo tamamlandı', success=True), 'Bitir'
+        step = self.script[self.step]
+        self.step += 1
+        kind, value = next(iter(step.items()))
+
+        if kind == 'open':
+            url = value.replace('{url}', self.url or '')
+            return _action('open', schema, url=url, new_tab=False), f'{url} aç'
+        if kind == 'done':
+            return _action('done', schema, text=value, success=True), 'Bitir'
+
+        target = value['target'] if kind == 'input' else value
+        index = find_element(state, target)
+        if index is None:
+            return _action('done', schema, text=f'Öğe bulunamadı: {target}', success=False), f'{target} bulunamadı'
+        if kind == 'input':
+            return _action('input', schema, index=index, text=value['text']), f'{target} alanına yaz'
+        return _action('click', schema, index=index), f'{target} tıkla'
+
+
+def find_element(state, text):
+    """Sayfa durumunda metni içeren etkileşimli öğenin indeksi (metinden önceki en yakın [n]<)"""
+    lowered = state.lower()
+    position = lowered.find(text.lower())
+    while position != -1:
+        markers = list(ELEMENT_MARKER.finditer(state, max(0, position - 300), position))
+        if markers:
+            return int(markers[-1].group(1))
+        position = lowered.find(text.lower(), position + 1)
+    return None
+
+
+def _action(kind, schema, **params):
+    names = ACTION_NAMES[kind]
+    name = next((name for name in names if f'"{name}"' in schema), names[0])
+    return {name: params}
+
+
+def _message_text(message):
+    content = getattr(message, 'content', message)
+    if isinstance(content, str):
+        return content
+    return '\n'.join(getattr(part, 'text', '') or '' for part in content or [])
+
+
+def _schema_text(output_format):
+    schema = getattr(output_format, 'model_json_schema', None)
+    return json.dumps(schema()) if callable(schema) else ''
+
+
+def _validate(output_format, data):
+    model_validate = getattr(output_format, 'model_validate', None)
+    return model_validate(data) if callable(model_validate) else data
+
+
+def _completion(completion):
+    try:
+        from browser_use.llm.views import ChatInvokeCompletion
+    except ImportError:
+        return completion
+    return ChatInvokeCompletion(completion=completion, usage=None)
@@ -0,0 +1,118 @@
+"""Proje bazında oturum açılmış tarayıcı durumunun (cookie, localStorage) saklanması.
+
+Başarılı bir girişten sonra tarayıcının storage state'i şifrelenerek
+veritabanına yazılır. Sonraki çalışmalar bu durumla başlar ve giriş
+adımlarını atlar; oturumun süresi dolmuşsa kayıt silinir ve test giriş
+adımlarıyla yeniden çalıştırılır.
+"""
+
+from app import db
+from app.models import SessionSnapshot
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+import asyncio
+import base64
+import hashlib
+import json
+import re
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # Şifreleme yoksa oturum kaydı devre dışı kalır
+    Fernet = None
+    InvalidToken = Exception
+
+# Agent'ın giriş sayfasıyla karşılaştığını bildirmek için kullandığı işaret
+SESSION_EXPIRED_MARKER = 'OTURUM_SURESI_DOLDU'
+
+SESSION_EXPIRED_INSTRUCTION = (
+    f"Tarayıcı oturumu önceden açılmış durumda, giriş adımlarını atla. "
+    f"Eğer giriş (login) sayfası görünürse hiçbir şey yapma, sonuç olarak "
+    f"'{SESSION_EXPIRED_MARKER}' yaz ve görevi başarısız olarak bitir."
+)
+
+LOGIN_URL_PATTERN = re.compile(r'(login|signin|sign-in|giris|oauth2?/authorize|/auth/)', re.IGNORECASE)
+
+
+def snapshots_enabled(app):
+    if not app.config.get('SESSION_SNAPSHOTS'):
+        return False
+    if Fernet is None:
+        print("Oturum kaydı için 'cryptography' paketi gerekli; SESSION_SNAPSHOTS yok sayıldı")
+        return False
+    return True
+
+
+def _fernet(app):
+    # Ayrı anahtar verilmemişse SECRET_KEY'den türetilir
+    secret = app.config.get('SESSION_SNAPSHOT_KEY') or app.config['SECRET_KEY']
+    return Fernet(base64.urlsafe_b64encode(hashlib.sha256(secret.encode('utf-8')).digest()))
+
+
+def load_snapshot(app, project_id):
+    """Geçerli oturum durumunu döndür; yoksa, süresi dolmuşsa veya çözülemiyorsa None"""
+    snapshot = SessionSnapshot.query.filter_by(project_id=project_id).first()
+    if snapshot is None:
+        return None
+    if snapshot.expires_at <= datetime.utcnow():
+        invalidate_snapshot(project_id)
+        return None
+    try:
+        return json.loads(_fernet(app).decrypt(snapshot.storage_state.encode('ascii')))
+    except (InvalidToken, ValueError) as e:
+        print(f"Oturum kaydı çözülemedi, siliniyor: {e}")
+        invalidate_snapshot(project_id)
+        return None
+
+
+def save_snapshot(app, project_id, storage_state, source_result_id):
+    """Oturum durumunu şifreleyip projeye kaydet (öncekinin yerine)"""
+    token = _fernet(app).encrypt(json.dumps(storage_state).encode('utf-8')).decode('ascii')
+    now = datetime.utcnow()
+    snapshot = SessionSnapshot.query.filter_by(project_id=project_id).first()
+    if snapshot is None:
+        snapshot = SessionSnapshot(project_id=project_id)
+        db.session.add(snapshot)
+    snapshot.storage_state = token
+    snapshot.captured_at = now
+    snapshot.expires_at = now + timedelta(hours=app.config.get('SESSION_SNAPSHOT_TTL_HOURS', 12))
+    snapshot.source_result_id = source_result_id
+    db.session.commit()
+
+
+def invalidate_snapshot(project_id):
+    SessionSnapshot.query.filter_by(project_id=project_id).delete()
+    db.session.commit()
+
+
+def looks_like_login_page(url):
+    parsed = urlparse(url or '')
+    return bool(LOGIN_URL_PATTERN.search(f'{parsed.netloc}{parsed.path}?{parsed.query}'))
+
+
+def session_expired(result):
+    """Agent sonucu oturumun düştüğünü bildiriyor mu"""
+    final_result = getattr(result, 'final_result', None)
+    text = final_result() if callable(final_result) else result
+    return SESSION_EXPIRED_MARKER in str(text or '')
+
+
+async def export_storage_state(browser_session, lease=None):
+    """Tarayıcı oturumunun cookie ve localStorage durumunu al; alınamazsa None
+
+    Havuzdan kiralanan tarayıcıda durum, kiralanan context'ten okunur.
+    """
+    if lease is not None:
+        state = await asyncio.get_running_loop().run_in_executor(None, lease.storage_state)
+        return state if state.get('cookies') else None
+    for name in ('export_storage_state', 'get_storage_state'):
+        method = getattr(browser_session, name, None)
+        if method is None:
+            continue
+        state = await method()
+        if isinstance(state, str):
+            with open(state, encoding='utf-8') as f:
+                state = json.load(f)
+        if state and state.get('cookies'):
+            return state
+    return None
@@ -0,0 +1,78 @@
+"""SQLite'ın web istekleri ve test runner thread'leri tarafından eşzamanlı kullanımı.
+
+WAL modunda okuyucular yazarı beklemez; yazarlar ise birbirini
+``busy_timeout`` süresince bekler. WAL'da okuma transaction'ı yazmaya
+yükselirken SQLite beklemeden "database is locked" döndürebildiği için
+runner yazmaları ``run_with_retry`` ile kısa beklemelerle tekrar denenir.
+"""
+
+from app import db
+from flask import has_app_context
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+import random
+import time
+
+
+def is_sqlite(app):
+    return app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite')
+
+
+def engine_options(app):
+    """SQLALCHEMY_ENGINE_OPTIONS için thread'lere uygun bağlantı ayarları"""
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not is_sqlite(app) or uri in ('sqlite://', 'sqlite:///:memory:'):
+        return {}
+    return {
+        'connect_args': {
+            'timeout': app.config['SQLITE_BUSY_TIMEOUT'],
+            'check_same_thread': False,
+        },
+        'pool_size': app.config['SQLITE_POOL_SIZE'],
+        'max_overflow': app.config['SQLITE_POOL_SIZE'] * 2,
+        'pool_timeout': app.config['SQLITE_BUSY_TIMEOUT'],
+    }
+
+
+def configure_sqlite(app):
+    """Her yeni bağlantıda WAL, synchronous=NORMAL ve busy_timeout ayarla (app context içinde)"""
+    if not is_sqlite(app):
+        return
+    busy_timeout_ms = int(app.config['SQLITE_BUSY_TIMEOUT'] * 1000)
+
+    @event.listens_for(db.engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute(f'PRAGMA busy_timeout={busy_timeout_ms}')
+        finally:
+            cursor.close()
+
+
+def is_lock_error(error):
+    message = str(getattr(error, 'orig', error)).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def run_with_retry(app, fn, *args, **kwargs):
+    """Veritabanı kilitli olduğu için başarısız olan yazmayı artan beklemelerle tekrarla.
+
+    fn kendi transaction'ını baştan kurup commit etmelidir; başarısız deneme
+    geri alınır ve fn yeniden çağrılır.
+    """
+    attempts = max(1, app.config.get('DB_WRITE_RETRIES', 5))
+    delay = app.config.get('DB_WRITE_RETRY_DELAY', 0.1)
+    for attempt in range(attempts):
+        try:
+            return fn(*args, **kwargs)
+        except OperationalError as e:
+            if not is_lock_error(e) or attempt == attempts - 1:
+                raise
+            if has_app_context():
+                db.session.rollback()
+            # Aynı anda kilitlenen yazarlar aynı anda tekrar denemesin
+            wait = delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+            print(f"Veritabanı kilitli, {wait:.2f} sn sonra tekrar denenecek ({attempt + 1}/{attempts})")
+            time.sleep(wait)
@@ -0,0 +1,130 @@
+"""Dashboard sayaçlarının bakımı.
+
+Sayaçlar projenin sahibi olan kullanıcıya göre tutulur: toplam proje ve
+çalışan test sayısı UserStats'ta, günlük başarılı/başarısız/durdurulan test
+sayıları (testin oluşturulduğu güne göre) DailyTestStats'ta. Durum değiştiren
+her yazma, sayaç güncellemesini aynı transaction içinde yapar; böylece
+dashboard TestResult tablosunu taramadan birkaç satırlık okumayla çizilir.
+"""
+
+from app import db
+from app.models import DailyTestStats, Project, TestResult, UserStats
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+
+
+def transition_rows(results_query):
+    """Durumu değişecek testlerin (sahip, oluşturulma zamanı, eski durum) listesi"""
+    return results_query.join(Project, TestResult.project_id == Project.id).with_entities(
+        Project.user_id, TestResult.created_at, TestResult.status
+    ).all()
+
+
+def record_transitions(rows, new_status):
+    """transition_rows çıktısındaki testlerin new_status'e geçişini sayaçlara yansıt.
+
+    new_status None ise testler siliniyordur. Commit çağıran tarafa aittir.
+    """
+    running = Counter()
+    daily = Counter()
+    for user_id, created_at, old_status in rows:
+        if old_status == new_status:
+            continue
+        if old_status == 'running':
+            running[user_id] -= 1
+        if new_status == 'running':
+            running[user_id] += 1
+        day = (created_at or datetime.utcnow()).date()
+        if old_status in TestResult.FINISHED_STATUSES:
+            daily[(user_id, day, old_status)] -= 1
+        if new_status in TestResult.FINISHED_STATUSES:
+            daily[(user_id, day, new_status)] += 1
+
+    for user_id, delta in running.items():
+        if delta:
+            _bump(UserStats, {'user_id': user_id}, 'running_tests', delta)
+    for (user_id, day, status), delta in daily.items():
+        if delta:
+            _bump(DailyTestStats, {'user_id': user_id, 'day': day}, status, delta)
+
+
+def record_transition(test_result, new_status):
+    """Tek bir testin (ORM nesnesi, durumu henüz değişmemiş) geçişini kaydet"""
+    record_transitions(
+        [(test_result.project.user_id, test_result.created_at, test_result.status)], new_status
+    )
+
+
+def record_project_change(user_id, delta):
+    _bump(UserStats, {'user_id': user_id}, 'total_projects', delta)
+
+
+def _bump(model, key, column, delta):
+    """Sayacı artır; satır yoksa oluştur (eşzamanlı eklemede artırmaya döner)"""
+    updated = model.query.filter_by(**key).update(
+        {column: getattr(model, column) + delta}, synchronize_session=False
+    )
+    if updated:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(model(**key, **{column: delta}))
+    except IntegrityError:
+        model.query.filter_by(**key).update(
+            {column: getattr(model, column) + delta}, synchronize_session=False
+        )
+
+
+def dashboard_counts(user_id, days=30):
+    """Dashboard kartları için sayaçlar (en fazla days+1 satır okunur)"""
+    stats = db.session.get(UserStats, user_id)
+    since = (datetime.utcnow() - timedelta(days=days)).date()
+    completed, failed = db.session.query(
+        db.func.coalesce(db.func.sum(DailyTestStats.completed), 0),
+        db.func.coalesce(db.func.sum(DailyTestStats.failed), 0)
+    ).filter(
+        DailyTestStats.user_id == user_id,
+        DailyTestStats.day >= since
+    ).one()
+    return {
+        'total_projects': stats.total_projects if stats else 0,
+        'running_tests': stats.running_tests if stats else 0,
+        'successful_tests': completed,
+        'failed_tests': failed,
+    }
+
+
+def rebuild_stats():
+    """Tüm sayaçları mevcut kayıtlardan yeniden hesapla (geçişte veya tutarsızlıkta)"""
+    DailyTestStats.query.delete()
+    UserStats.query.delete()
+
+    users = {}
+    for user_id, total in db.session.query(Project.user_id, db.func.count(Project.id)).group_by(Project.user_id):
+        users[user_id] = UserStats(user_id=user_id, total_projects=total, running_tests=0)
+    running = db.session.query(Project.user_id, db.func.count(TestResult.id)).join(
+        Project, TestResult.project_id == Project.id
+    ).filter(TestResult.status == 'running').group_by(Project.user_id)
+    for user_id, total in running:
+        users.setdefault(user_id, UserStats(user_id=user_id, total_projects=0)).running_tests = total
+    db.session.add_all(users.values())
+
+    daily = {}
+    finished = db.session.query(
+        Project.user_id, db.func.date(TestResult.created_at), TestResult.status, db.func.count(TestResult.id)
+    ).join(Project, TestResult.project_id == Project.id).filter(
+        TestResult.status.in_(TestResult.FINISHED_STATUSES)
+    ).group_by(Project.user_id, db.func.date(TestResult.created_at), TestResult.status)
+    for user_id, day, status, total in finished:
+        if day is None:
+            continue
+        if isinstance(day, str):
+            day = datetime.strptime(day, '%Y-%m-%d').date()
+        row = daily.setdefault((user_id, day), DailyTestStats(
+            user_id=user_id, day=day, completed=0, failed=0, stopped=0
+        ))
+        setattr(row, status, total)
+    db.session.add_all(daily.values())
+    db.session.commit()
+    return len(users), len(daily)
@@ -0,0 +1,196 @@
+"""Agent adımlarının faz bazında süre ölçümü.
+
+Her agent adımı şu fazlara bölünür:
+
+- ``llm``: modelin yanıt vermesi (önbellek kontrolü dahil)
+- ``dom``: sayfa durumunun (DOM ağacı, etkileşimli öğeler) çıkarılması
+- ``screenshot``: ekran görüntüsü alınması
+- ``action``: aksiyonların uygulanması ve tetiklenen sayfa yüklemeleri
+- ``db``: adım sonu hook'larımız (log, oturum kaydı gibi veritabanı işleri)
+- ``other``: adımın geri kalanı (browser-use'un kendi işleri)
+
+StepTimer, agent'ın ilgili metotlarını örnek üzerinde sarar; browser-use
+kodu değişmez, bulunamayan metotlar ölçülmez. İç içe çağrılarda (örneğin
+sayfa durumu içinde alınan ekran görüntüsü) süre yalnızca en içteki faza
+yazılır. Adım süreleri, adımın ``👣`` log satırıyla birlikte
+``test_step.timings`` sütununda JSON olarak saklanır.
+"""
+
+from app import db
+from app.models import TestResult, TestStep
+from contextlib import contextmanager
+import functools
+import time
+
+PHASES = ('llm', 'dom', 'screenshot', 'action', 'db', 'other')
+
+PHASE_LABELS = {
+    'llm': 'LLM',
+    'dom': 'DOM çıkarma',
+    'screenshot': 'Ekran görüntüsü',
+    'action': 'Aksiyon / sayfa yükleme',
+    'db': 'Log / DB',
+    'other': 'Diğer',
+}
+
+# Waterfall'da fazların renkleri (Bootstrap arka plan sınıfları)
+PHASE_COLORS = {
+    'llm': 'bg-primary',
+    'dom': 'bg-info',
+    'screenshot': 'bg-warning',
+    'action': 'bg-success',
+    'db': 'bg-danger',
+    'other': 'bg-secondary',
+}
+
+# Sarılan metotlar: (nesnenin agent üzerindeki yolu, metot adı, faz)
+WRAPPED_METHODS = [
+    ('llm', 'ainvoke', 'llm'),
+    ('browser_session', 'get_browser_state_summary', 'dom'),
+    ('browser_session', 'take_screenshot', 'screenshot'),
+    (None, 'multi_act', 'action'),
+]
+
+
+class StepTimer:
+    """Bir agent'ın adımlarını faz bazında ölçer.
+
+    origin, çalışmanın başlangıcıdır (time.monotonic); alt görevlerin agent'ları
+    aynı origin'i paylaşır, böylece waterfall'da paralel adımlar yan yana görünür.
+    """
+
+    def __init__(self, origin=None):
+        self.origin = time.monotonic() if origin is None else origin
+        self.step_started = None
+        self.durations = {}
+        self._stack = []
+
+    def attach(self, agent):
+        """Agent'ın LLM, tarayıcı ve aksiyon metotlarını ölçülen sürümleriyle değiştir"""
+        for owner_name, method_name, phase in WRAPPED_METHODS:
+            owner = agent if owner_name is None else getattr(agent, owner_name, None)
+            method = getattr(owner, method_name, None) if owner is not None else None
+            if method is None or getattr(method, '_step_timer', None) is self:
+                continue
+            wrapper = self._wrap(method, phase)
+            try:
+                # browser_session pydantic modeli olabilir; alan doğrulamasını atla
+                object.__setattr__(owner, method_name, wrapper)
+            except (AttributeError, TypeError) as e:
+                print(f"Adım süresi ölçümü eklenemedi ({method_name}): {e}")
+        return self
+
+    def _wrap(self, method, phase):
+        @functools.wraps(method)
+        async def timed(*args, **kwargs):
+            with self.phase(phase):
+                return await method(*args, **kwargs)
+        timed._step_timer = self
+        return timed
+
+    @contextmanager
+    def phase(self, name):
+        """Bloğun süresini faza yaz; dış fazdan iç fazın süresi düşülür"""
+        started = time.monotonic()
+        self._stack.append([name, 0.0])
+        try:
+            yield
+        finally:
+            _, nested = self._stack.pop()
+            elapsed = time.monotonic() - started
+            if self.step_started is not None:
+                self.durations[name] = self.durations.get(name, 0.0) + elapsed - nested
+            if self._stack:
+                self._stack[-1][1] += elapsed
+
+    def start_step(self):
+        """Yeni adımın başlangıcı (on_step_start hook'undan çağrılır)"""
+        self.step_started = time.monotonic()
+        self.durations = {}
+
+    def finish_step(self):
+        """Biten adımın süreleri: {'offset', 'total', faz: saniye}; adım başlamadıysa None"""
+        if self.step_started is None:
+            return None
+        now = time.monotonic()
+        total = now - self.step_started
+        timings = {'offset': round(self.step_started - self.origin, 3), 'total': round(total, 3)}
+        for phase in PHASES[:-1]:
+            if self.durations.get(phase):
+                timings[phase] = round(self.durations[phase], 3)
+        timings['other'] = round(max(0.0, total - sum(self.durations.values())), 3)
+        self.step_started = None
+        self.durations = {}
+        return timings
+
+
+def step_waterfall(steps):
+    """Sonuç sayfası için süre ölçülmüş adımlar ve toplam süre.
+
+    steps TestStep nesneleri veya arşivden gelen sözlükler olabilir.
+    """
+    rows = []
+    for step in steps:
+        data = step.to_dict() if hasattr(step, 'to_dict') else step
+        timings = data.get('timings')
+        if not timings:
+            continue
+        rows.append({
+            'seq': data['seq'],
+            'message': data['message'],
+            'offset': timings['offset'],
+            'total': timings['total'],
+            'phases': [(phase, timings[phase]) for phase in PHASES if timings.get(phase)],
+        })
+    span = max((row['offset'] + row['total'] for row in rows), default=0)
+    return {'rows': rows, 'span': span}
+
+
+def percentile(values, p):
+    """En yakın sıra yöntemiyle yüzdelik (sıralı olmayan liste kabul eder)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+
+def prompt_phase_stats(prompt_id, runs=50):
+    """Prompt'un son çalışmalarındaki agent adımlarının faz yüzdelikleri.
+
+    Her faz için adım başına p50/p95 ve toplam süredeki payı; hiç ölçülmüş
+    adım yoksa None döner.
+    """
+    recent_ids = db.select(TestResult.id).where(
+        TestResult.prompt_id == prompt_id
+    ).order_by(TestResult.id.desc()).limit(runs)
+    rows = db.session.query(TestStep.timings).filter(
+        TestStep.test_result_id.in_(recent_ids),
+        TestStep.timings.isnot(None)
+    ).all()
+    if not rows:
+        return None
+    steps = [TestStep.parse_timings(row.timings) for row in rows]
+    execution_times = [row.execution_time for row in db.session.query(TestResult.execution_time).filter(
+        TestResult.id.in_(recent_ids),
+        TestResult.execution_time.isnot(None)
+    )]
+    grand_total = sum(step['total'] for step in steps) or 1
+    phases = []
+    for phase in PHASES:
+        values = [step.get(phase, 0.0) for step in steps]
+        phases.append({
+            'phase': phase,
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'share': sum(values) / grand_total,
+        })
+    totals = [step['total'] for step in steps]
+    return {
+        'steps': len(steps),
+        'phases': phases,
+        'step_p50': percentile(totals, 50),
+        'step_p95': percentile(totals, 95),
+        'execution_p50': percentile(execution_times, 50),
+        'execution_p95': percentile(execution_times, 95),
+        'runs': len(execution_times),
+    }
@@ -0,0 +1,84 @@
+"""Numaralı adımlardan oluşan prompt'ları bağımsız alt görevlere bölme.
+
+" 1. adım: ..." biçimindeki prompt'larda baştaki giriş (login) adımları
+ortak önsöz kabul edilir; kalan her adım önsöz + o adımdan oluşan ayrı bir
+alt görev olur. Alt görevler ayrı tarayıcı context'lerinde paralel çalışır,
+sonuçları tek TestResult altında toplanır.
+"""
+
+import re
+
+STEP_PATTERN = re.compile(r'^\s*(\d+)\s*\.\s*adım\s*:\s*', re.IGNORECASE | re.MULTILINE)
+
+# Bu kelimeleri içeren baştaki adımlar her alt görevde tekrarlanan giriş önsözüdür
+LOGIN_KEYWORDS = ('giriş', 'login', 'oturum aç', 'şifre', 'parola', 'password', 'sign in')
+
+
+class PromptPlan:
+    """Ortak önsöz ve bağımsız adımlara ayrılmış prompt"""
+
+    def __init__(self, preamble, prologue, steps):
+        self.preamble = preamble  # İlk adımdan önceki metin (örn. URL ziyareti)
+        self.prologue = prologue  # [(numara, metin)] her alt görevde önce uygulanır
+        self.steps = steps  # [(numara, metin)] paralel çalışacak adımlar
+
+    def subtask_text(self, number, text, include_prologue=True):
+        """Tek alt görevin adım metni (önsöz adımları + kendi adımı)"""
+        lines = [f'Adım {n}: {t}' for n, t in self.prologue] if include_prologue else []
+        lines.append(f'Adım {number}: {text}')
+        lines.append(f'Sadece yukarıdaki adımları uygula; Adım {number} tamamlanınca görevi bitir.')
+        return '\n'.join(lines)
+
+
+def parse_steps(content):
+    """Prompt'u (önsöz metni, [(numara, adım metni)]) olarak ayrıştır"""
+    matches = list(STEP_PATTERN.finditer(content))
+    if not matches:
+        return content.strip(), []
+
+    numbered = []
+    for position, match in enumerate(matches):
+        end = matches[position + 1].start() if position + 1 < len(matches) else len(content)
+        numbered.append((int(match.group(1)), content[match.end():end].strip()))
+    return content[:matches[0].start()].strip(), numbered
+
+
+def is_login_step(text):
+    return any(keyword in text.lower() for keyword in LOGIN_KEYWORDS)
+
+
+def split_prompt(content):
+    """Prompt'u alt görevlere böl; en az iki bağımsız adım yoksa None döner"""
+    preamble, numbered = parse_steps(content)
+
+    prologue = []
+    while numbered and is_login_step(numbered[0][1]):
+        prologue.append(numbered.pop(0))
+
+    if len(numbered) < 2:
+        return None
+    return PromptPlan(preamble, prologue, numbered)
+
+
+def strip_login_steps(content):
+    """Baştaki giriş adımlarını çıkar (oturum zaten açıkken kullanılır)"""
+    preamble, numbered = parse_steps(content)
+    while numbered and is_login_step(numbered[0][1]):
+        numbered.pop(0)
+    if not numbered:
+        return content
+    steps = '\n'.join(f' {number}. adım: {text}' for number, text in numbered)
+    return f'{preamble}\n{steps}' if preamble else steps
+
+
+def summarize_step_results(step_results):
+    """Alt görev sonuçlarından TestResult için özet metin ve başarısız adım listesi"""
+    lines = []
+    failed = []
+    for step in step_results:
+        icon = {'completed': '✅', 'failed': '❌', 'stopped': '⏹️'}.get(step['status'], '•')
+        detail = step.get('error') or step.get('result') or ''
+        lines.append(f"{icon} Adım {step['number']}: {detail[:200]}")
+        if step['status'] != 'completed':
+            failed.append(step['number'])
+    return '\n'.join(lines), failed
@@ -0,0 +1,173 @@
+"""Suite çalıştırma: bir projenin tüm (veya etiketli) prompt'larını birlikte kuyruğa alma.
+
+Suite, her prompt için bir ``pending`` TestResult oluşturur ve bunları
+``suite_run_id`` ile TestSuiteRun kaydına bağlar. Testler normal kuyruktan
+``TEST_WORKERS`` kadar paralel çalışır; suite'in ``max_parallel`` değeri
+verildiyse runner o suite'ten aynı anda daha fazla test almaz. Son test
+bittiğinde runner ``finish_suite`` ile başarılı/başarısız sayılarını ve
+süreleri suite kaydına yazar.
+"""
+
+from app import db
+from app.cancellation import cancellations
+from app.models import TestPrompt, TestResult, TestSuiteRun
+from app.stats import record_transitions
+from collections import Counter
+from datetime import datetime
+from sqlalchemy.orm import aliased, joinedload
+
+
+def suite_prompts(project_id, tag=None):
+    """Suite'e girecek prompt'lar (tag verildiyse yalnızca o etiketi taşıyanlar)"""
+    prompts = TestPrompt.query.filter_by(project_id=project_id).order_by(TestPrompt.id).all()
+    if tag:
+        prompts = [prompt for prompt in prompts if tag in prompt.tag_list]
+    return prompts
+
+
+def start_suite(project, user_id, tag=None, max_parallel=0, project_url=None):
+    """Suite kaydını ve her prompt için pending testi tek transaction'da oluştur.
+
+    (TestSuiteRun, yeni test id'leri) döner; uygun prompt yoksa (None, []).
+    """
+    tag = (tag or '').strip().lower() or None
+    prompts = suite_prompts(project.id, tag)
+    if not prompts:
+        return None, []
+
+    suite = TestSuiteRun(
+        project_id=project.id,
+        user_id=user_id,
+        tag=tag,
+        project_url=project_url or None,
+        max_parallel=max_parallel or 0,
+        total=len(prompts)
+    )
+    db.session.add(suite)
+    db.session.flush()
+    test_result_ids = db.session.execute(db.insert(TestResult).returning(TestResult.id), [{
+        'project_id': project.id,
+        'prompt_id': prompt.id,
+        'user_id': user_id,
+        'status': 'pending',
+        'project_url': project_url or project.url,
+        'suite_run_id': suite.id,
+        'created_at': suite.created_at,
+    } for prompt in prompts]).scalars().all()
+    db.session.commit()
+    return suite, test_result_ids
+
+
+def saturated_suites():
+    """max_parallel sınırına ulaşmış suite'lerin id'leri (runner'ın aday seçiminde ön eleme için alt sorgu)"""
+    running = aliased(TestResult)
+    return db.select(running.suite_run_id).join(
+        TestSuiteRun, running.suite_run_id == TestSuiteRun.id
+    ).where(
+        running.status == 'running',
+        TestSuiteRun.max_parallel > 0
+    ).group_by(running.suite_run_id, TestSuiteRun.max_parallel).having(
+        db.func.count() >= TestSuiteRun.max_parallel
+    )
+
+
+def suite_has_capacity():
+    """Runner'ın claim UPDATE'ine eklenen koşul: test bir suite'e ait değil veya suite'in max_parallel sınırı dolmamış.
+
+    Çalışan testler UPDATE ile aynı cümlede sayıldığından iki worker aynı anda
+    sınırın ötesinde test sahiplenemez (saturated_suites sadece ön eleme yapar).
+    """
+    running = aliased(TestResult)
+    running_count = db.select(db.func.count()).where(
+        running.suite_run_id == TestResult.suite_run_id,
+        running.status == 'running'
+    ).correlate(TestResult).scalar_subquery()
+    max_parallel = db.func.coalesce(db.select(TestSuiteRun.max_parallel).where(
+        TestSuiteRun.id == TestResult.suite_run_id
+    ).correlate(TestResult).scalar_subquery(), 0)
+    return db.or_(TestResult.suite_run_id.is_(None), max_parallel == 0, running_count < max_parallel)
+
+
+def test_duration(test_result):
+    """Testin kuyruktan alınmasından bitişine kadar geçen süre (saniye); başlamadan bittiyse veya sürüyorsa None"""
+    if not test_result.started_at or not test_result.completed_at:
+        return None
+    return (test_result.completed_at - test_result.started_at).total_seconds()
+
+
+def finish_suite(suite_run_id):
+    """Bitmemiş testi kalmadıysa suite raporunu yaz ve kapat (app context içinde); kapatıldıysa True"""
+    suite = db.session.get(TestSuiteRun, suite_run_id)
+    if suite is None or suite.status != 'running':
+        return False
+    results = TestResult.query.filter_by(suite_run_id=suite_run_id).with_entities(
+        TestResult.status, TestResult.created_at, TestResult.started_at, TestResult.completed_at
+    ).all()
+    if any(result.status not in TestResult.FINISHED_STATUSES for result in results):
+        return False
+
+    counts = Counter(result.status for result in results)
+    completed_at = max((result.completed_at for result in results if result.completed_at), default=datetime.utcnow())
+    # Aynı suite'in son iki testi aynı anda biterse raporu yalnızca biri yazar
+    closed = TestSuiteRun.query.filter_by(id=suite_run_id, status='running').update({
+        'status': 'failed' if counts['failed'] or counts['stopped'] else 'completed',
+        'passed': counts['completed'],
+        'failed': counts['failed'],
+        'stopped': counts['stopped'],
+        'duration': (completed_at - suite.created_at).total_seconds(),
+        'serial_duration': sum(test_duration(result) or 0 for result in results),
+        'completed_at': completed_at,
+    }, synchronize_session=False)
+    db.session.commit()
+    if closed:
+        print(f"Suite #{suite_run_id} tamamlandı: {counts['completed']}/{len(results)} başarılı")
+    return bool(closed)
+
+
+def finish_suite_of(app, test_result_id):
+    """Biten test bir suite'e aitse suite'in tamamlanıp tamamlanmadığını kontrol et"""
+    with app.app_context():
+        suite_run_id = db.session.query(TestResult.suite_run_id).filter_by(id=test_result_id).scalar()
+        if suite_run_id is not None:
+            finish_suite(suite_run_id)
+
+
+def stop_suite(suite):
+    """Suite'in kuyruktaki testlerini iptal et, çalışanlar için durdurma talebi gönder"""
+    now = datetime.utcnow()
+    stopped = []
+    for row in TestResult.query.filter_by(suite_run_id=suite.id, status='pending').with_entities(
+        TestResult.id, TestResult.created_at
+    ).all():
+        # Bu arada runner'ın aldığı test aşağıda running olarak durdurulur
+        if TestResult.query.filter_by(id=row.id, status='pending').update(
+            {'status': 'stopped', 'stop_requested': True, 'completed_at': now}, synchronize_session=False
+        ):
+            stopped.append((suite.project.user_id, row.created_at, 'pending'))
+    record_transitions(stopped, 'stopped')
+    running = TestResult.query.filter_by(suite_run_id=suite.id, status='running')
+    running_ids = [row.id for row in running.with_entities(TestResult.id)]
+    running.update({'stop_requested': True}, synchronize_session=False)
+    db.session.commit()
+    for test_result_id in running_ids:
+        cancellations.cancel(test_result_id)
+    finish_suite(suite.id)
+    return len(stopped), len(running_ids)
+
+
+def suite_report(suite):
+    """Suite sayfası için testler (prompt'larıyla), durum sayıları ve süre özetleri"""
+    results = TestResult.query.options(joinedload(TestResult.prompt)).filter_by(
+        suite_run_id=suite.id
+    ).order_by(TestResult.id).all()
+    counts = Counter(result.status for result in results)
+    durations = {result.id: test_duration(result) for result in results}
+    finished = [duration for duration in durations.values() if duration is not None]
+    return {
+        'results': results,
+        'durations': durations,
+        'counts': counts,
+        'finished': sum(counts[status] for status in TestResult.FINISHED_STATUSES),
+        'average_duration': sum(finished) / len(finished) if finished else None,
+        'slowest': max(results, key=lambda result: durations[result.id] or 0) if finished else None,
+    }
@@ -0,0 +1,743 @@
+from app import db
+from app.browser_pool import attach_session
+from app.cancellation import TestStopped, cancellations
+from app.events import bus, publish_status
+from app.llm_cache import cache_agent_llm
+from app.replay import extract_trace, find_trace, mark_replayed, replay_trace, same_page, save_trace
+from app.scripted_llm import ScriptedChatModel
+from app.sessions import (SESSION_EXPIRED_INSTRUCTION, export_storage_state, invalidate_snapshot,
+                          load_snapshot, looks_like_login_page, save_snapshot, session_expired,
+                          snapshots_enabled)
+from app.subtasks import split_prompt, strip_login_steps, summarize_step_results
+from app.models import Artifact, TestResult, TestStep
+from app.sqlite import run_with_retry
+from app.stats import record_transition
+from app.step_timing import StepTimer
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import asyncio
+import json
+import threading
+import time
+
+# Tüm veritabanı yazmaları sırayla bu tek thread üzerinden yapılır: event loop
+# SQLite yazmalarını beklemez ve her testin log sırası korunur
+db_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+
+# Yazılmayı bekleyen log adımları; eşzamanlı testlerin adımları tek transaction'da yazılır
+_pending_steps = []
+_pending_lock = threading.Lock()
+_flush_scheduled = False
+
+# Her agent adımının sonunda yazılan log satırının öneki (benchmark ilk adım süresini buradan ölçer)
+AGENT_STEP_MARKER = '👣'
+
+
+def queue_step(app, step):
+    """Log adımını yazma kuyruğuna ekle; bekleyen bir yazma yoksa db_writer'a gönder"""
+    global _flush_scheduled
+    with _pending_lock:
+        _pending_steps.append((app, step))
+        if _flush_scheduled:
+            return
+        _flush_scheduled = True
+    db_writer.submit(flush_steps)
+
+
+def flush_steps():
+    """Bekleyen tüm log adımlarını yaz (db_writer thread'inde çalışır)"""
+    global _flush_scheduled
+    with _pending_lock:
+        pending = list(_pending_steps)
+        _pending_steps.clear()
+        _flush_scheduled = False
+
+    by_app = {}
+    for app, step in pending:
+        by_app.setdefault(app, []).append(step)
+    for app, steps in by_app.items():
+        try:
+            run_with_retry(app, write_steps, app, steps)
+        except Exception as e:
+            # Bir testin hatalı satırı (ör. kira devrinde çakışan seq) diğer testlerin loglarını düşürmesin
+            print(f"Log kaydetme hatası ({len(steps)} adım), testler ayrı ayrı yazılacak: {e}")
+            write_steps_separately(app, steps)
+
+
+def write_steps_separately(app, steps):
+    """Adımları test başına, o da olmazsa satır başına ayrı transaction'larla yaz; yazılamayanları logla"""
+    by_result = {}
+    for step in steps:
+        by_result.setdefault(step['test_result_id'], []).append(step)
+    for test_result_id, result_steps in by_result.items():
+        try:
+            run_with_retry(app, write_steps, app, result_steps)
+            continue
+        except Exception:
+            pass
+        for step in result_steps:
+            try:
+                run_with_retry(app, write_steps, app, [step])
+            except Exception as e:
+                print(f"Log adımı yazılamadı (test {test_result_id}, seq {step['seq']}): "
+                      f"{step['message'][:80]!r} - {e}")
+
+
+def result_summary(result):
+    """TestResult.result_text için agent'ın son çıktısı (geçmişin tamamı ek olarak saklanır)"""
+    final_result = getattr(result, 'final_result', None)
+    text = final_result() if callable(final_result) else result
+    return str(text) if text else 'Test completed successfully'
+
+
+def write_steps(app, steps):
+    current_steps = {}
+    for step in steps:
+        current_steps[step['test_result_id']] = max(step['seq'], current_steps.get(step['test_result_id'], 0))
+    with app.app_context():
+        db.session.execute(db.insert(TestStep), steps)
+        for test_result_id, seq in current_steps.items():
+            TestResult.query.filter_by(id=test_result_id).update(
+                {'current_step': seq}, synchronize_session=False
+            )
+        db.session.commit()
+
+
+async def close_agent_browser(agent, pooled=False):
+    """Agent'ın açtığı tarayıcıyı kapat (havuzdaki tarayıcıdan sadece bağlantıyı kes)"""
+    try:
+        browser_session = getattr(agent, 'browser_session', None)
+        if pooled and browser_session is not None and hasattr(browser_session, 'stop'):
+            await browser_session.stop()
+        elif browser_session is not None and hasattr(browser_session, 'kill'):
+            await browser_session.kill()
+        elif hasattr(agent, 'close'):
+            await agent.close()
+    except Exception as e:
+        print(f"Tarayıcı kapatma hatası: {e}")
+
+
+async def run_agent_cancellable(agent, max_steps, token, check_stop_requested, stop_check_interval,
+                                pooled=False, on_step_end=None, step_timer=None):
+    """Agent'ı çalıştır; iptal sinyali gelince devam eden LLM çağrısıyla birlikte durdur.
+
+    Aynı süreçteki durdurma talepleri token üzerinden anında gelir. Başka bir
+    süreçten gelen talepler için veritabanındaki stop_requested bayrağı
+    stop_check_interval saniyede bir kontrol edilir.
+    """
+    loop = asyncio.get_running_loop()
+    
+    async def on_step_start(agent):
+        if step_timer is not None:
+            step_timer.start_step()
+        # Adımlar arasında iptal kontrolü
+        if token.cancelled:
+            agent.stop()
+    
+    run_task = asyncio.ensure_future(agent.run(max_steps=max_steps, on_step_start=on_step_start, on_step_end=on_step_end))
+    token.add_callback(lambda: loop.call_soon_threadsafe(run_task.cancel))
+    
+    async def watch_stop_flag():
+        while not run_task.done():
+            await asyncio.sleep(stop_check_interval)
+            if await loop.run_in_executor(None, check_stop_requested):
+                token.cancel()
+    
+    watcher = asyncio.ensure_future(watch_stop_flag())
+    try:
+        return await run_task
+    except asyncio.CancelledError:
+        if token.cancelled:
+            raise TestStopped()
+        raise
+    finally:
+        watcher.cancel()
+        if token.cancelled:
+            await close_agent_browser(agent, pooled=pooled)
+
+
+async def execute_test(app, test_result_id, project_url, prompt_content):
+    """Arka planda browser test çalıştır - GERÇEK BROWSER AUTOMATION
+
+    Runner'ın kalıcı event loop'unda bir görev olarak çalışır; bloklayan
+    veritabanı ve tarayıcı havuzu çağrıları thread'lere devredilir.
+    """
+    loop = asyncio.get_running_loop()
+    # Waterfall'daki adım başlangıçları bu ana göre gösterilir
+    origin = time.monotonic()
+    # api_stop_test bu token'ı doğrudan iptal eder
+    token = cancellations.register(test_result_id)
+    browser_pool = app.extensions.get('browser_pool')
+    artifact_store = app.extensions.get('artifact_store')
+    lease = None
+    agent = None
+    use_snapshots = snapshots_enabled(app)
+    
+    def read_run_state():
+        with app.app_context():
+            last_seq = db.session.query(db.func.max(TestStep.seq)).filter(
+                TestStep.test_result_id == test_result_id
+            ).scalar() or 0
+            test_result = TestResult.query.get(test_result_id)
+            action_trace = None
+            if app.config.get('ACTION_REPLAY'):
+                action_trace = find_trace(test_result.prompt_id, project_url, prompt_content)
+            trace = (action_trace.id, json.loads(action_trace.trace)) if action_trace else None
+            storage_state = load_snapshot(app, test_result.project_id) if use_snapshots else None
+            return (last_seq, test_result.worker_id, test_result.project_id, test_result.prompt_id,
+                    trace, storage_state)
+    
+    # Yeniden kuyruğa alınan testlerde sıra numarası kaldığı yerden devam eder
+    last_seq, worker_id, project_id, prompt_id, trace, storage_state = await loop.run_in_executor(
+        db_writer, read_run_state
+    )
+    
+    def log_step(message, timings=None):
+        """Test adımını test_step tablosuna ekle (her adım sabit maliyetli tek INSERT)"""
+        nonlocal last_seq
+        now = datetime.utcnow()
+        timestamp = now.strftime('%H:%M:%S')
+        last_seq += 1
+        log_entry = {'seq': last_seq, 'timestamp': timestamp, 'message': message}
+        if timings:
+            log_entry['timings'] = timings
+        
+        # Veritabanını güncelle (db_writer thread'inde, event loop'u bekletmeden);
+        # created_at yazma anını değil logun üretildiği anı gösterir
+        queue_step(app, {
+            'test_result_id': test_result_id,
+            'seq': last_seq,
+            'timestamp': timestamp,
+            'message': message,
+            'timings': json.dumps(timings) if timings else None,
+            'created_at': now
+        })
+        
+        # SSE dinleyicilerine anında ilet
+        bus.publish(test_result_id, {
+            'status': 'running',
+            'current_step': last_seq,
+            'new_logs': [log_entry]
+        }, event_id=last_seq)
+        
+        print(f"[{timestamp}] {message}")
+    
+    def check_stop_requested():
+        """Veritabanında durdurma talebi var mı kontrol et (süreçler arası yedek)"""
+        try:
+            with app.app_context():
+                test_result = TestResult.query.get(test_result_id)
+                return test_result and test_result.stop_requested
+        except Exception as e:
+            print(f"Durdurma kontrolü hatası: {e}")
+            return False
+    
+    async def save_status(status, final=True, **fields):
+        """Test durumunu kaydet ve dinleyicilere bildir (önceki log yazmalarından sonra)"""
+        def write_status():
+            with app.app_context():
+                test_result = TestResult.query.get(test_result_id)
+                if test_result is None or test_result.worker_id != worker_id:
+                    # Kira başka bir worker'a geçti (veya kuyruğa dönen kayıt silindi); sonucu bu worker yazmaz
+                    print(f"Test {test_result_id} artık bu worker'a ait değil, durum yazılmadı")
+                    return
+                record_transition(test_result, status)
+                test_result.status = status
+                for name, value in fields.items():
+                    setattr(test_result, name, value)
+                if final:
+                    test_result.mark_completed()
+                db.session.commit()
+                publish_status(test_result, final=final)
+        
+        await loop.run_in_executor(db_writer, run_with_retry, app, write_status)
+    
+    session_capture = {'captured': False, 'invalidated': False}
+    # Havuzdan tarayıcı kiralayan agent'ların kiraları (oturum durumu kiralanan context'ten okunur)
+    agent_leases = {}
+    
+    def session_hook(uses_snapshot, expiry, step_timer):
+        """Adım sonu hook'u: kayıtlı oturum düştüyse agent'ı durdurur, başarılı girişi kaydeder, adımı süreleriyle loglar"""
+        async def check_session(step_agent, history, items):
+            if uses_snapshot:
+                url = getattr(items[-1].state, 'url', None)
+                if looks_like_login_page(url) and not same_page(url, project_url):
+                    expiry['expired'] = True
+                    step_agent.stop()
+                return
+            if not use_snapshots or session_capture['captured']:
+                return
+            if not (history.is_done() and history.is_successful()):
+                return
+            session_capture['captured'] = True
+            try:
+                state = await export_storage_state(step_agent.browser_session, agent_leases.get(id(step_agent)))
+            except Exception as e:
+                print(f"Oturum durumu alınamadı: {e}")
+                return
+            if state:
+                def write_snapshot():
+                    with app.app_context():
+                        save_snapshot(app, project_id, state, test_result_id)
+                await loop.run_in_executor(db_writer, run_with_retry, app, write_snapshot)
+                log_step("🍪 Oturum durumu kaydedildi; sonraki çalışmalar giriş adımlarını atlayacak")
+        
+        async def on_step_end(step_agent):
+            history = getattr(step_agent, 'history', None)
+            items = getattr(history, 'history', None)
+            if not items:
+                return
+            # Hook'taki veritabanı işleri adımın "db" fazına yazılır
+            with step_timer.phase('db'):
+                await check_session(step_agent, history, items)
+            log_step(f"{AGENT_STEP_MARKER} Agent adımı {len(items)}: {getattr(items[-1].state, 'url', None) or '-'}",
+                     timings=step_timer.finish_step())
+        return on_step_end
+    
+    async def drop_snapshot():
+        """Süresi dolmuş oturum kaydını sil (çalışma başına bir kez)"""
+        if session_capture['invalidated']:
+            return
+        session_capture['invalidated'] = True
+        
+        def delete_snapshot():
+            with app.app_context():
+                invalidate_snapshot(project_id)
+        await loop.run_in_executor(db_writer, run_with_retry, app, delete_snapshot)
+        log_step("🔑 Kayıtlı oturumun süresi dolmuş; kayıt silindi, giriş adımlarıyla yeniden deneniyor")
+    
+    stored_agents = set()
+    
+    async def store_artifacts(run_agent, prefix=''):
+        """Agent'ın ekran görüntülerini, geçmişini ve indirdiği dosyaları ek olarak kaydet (agent başına bir kez)"""
+        if artifact_store is None or run_agent is None or id(run_agent) in stored_agents:
+            return
+        stored_agents.add(id(run_agent))
+        try:
+            stored = await loop.run_in_executor(None, artifact_store.store_agent_outputs, run_agent, prefix)
+            if not stored:
+                return
+            
+            def write_artifacts():
+                with app.app_context():
+                    db.session.add_all(Artifact(test_result_id=test_result_id, **item) for item in stored)
+                    db.session.commit()
+            await loop.run_in_executor(db_writer, run_with_retry, app, write_artifacts)
+        except Exception as e:
+            print(f"Ek kaydetme hatası: {e}")
+            return
+        counts = {kind: sum(item['kind'] == kind for item in stored) for kind in Artifact.KINDS}
+        log_step(f"🗂️ {prefix}Ekler kaydedildi: {counts['screenshot']} ekran görüntüsü, "
+                 f"{counts['download']} indirilen dosya")
+    
+    async def run_subtasks(plan, create_agent, format_task):
+        """Alt görevleri ayrı tarayıcılarda, sınırlı eşzamanlılıkla paralel çalıştır"""
+        semaphore = asyncio.Semaphore(max(1, app.config.get('SUBTASK_CONCURRENCY', 4)))
+        max_steps = app.config.get('SUBTASK_MAX_STEPS', 30)
+        prologue = ', '.join(str(number) for number, _ in plan.prologue) or 'yok'
+        log_step(f"🧩 Prompt {len(plan.steps)} alt göreve bölündü (ortak giriş adımları: {prologue})")
+        # Kayıtlı oturum varken alt görevler ortak giriş adımlarını atlar
+        shared = {'storage_state': storage_state}
+        if storage_state is not None and plan.prologue:
+            log_step("🍪 Kayıtlı oturum bulundu, alt görevlerde giriş adımları atlanacak")
+        
+        async def run_subtask(number, text):
+            async with semaphore:
+                step_result = {'number': number, 'title': text[:80], 'status': 'running'}
+                started = time.monotonic()
+                sub_agent = sub_lease = None
+                try:
+                    token.raise_if_cancelled()
+                    session_state = shared['storage_state']
+                    task = format_task(plan.preamble + '\n' + plan.subtask_text(
+                        number, text, include_prologue=session_state is None
+                    ))
+                    if session_state is not None:
+                        task += '\n' + SESSION_EXPIRED_INSTRUCTION
+                    sub_agent, sub_lease = await create_agent(task, max_steps, session_state)
+                    cache_agent_llm(sub_agent)
+                    step_timer = StepTimer(origin).attach(sub_agent)
+                    log_step(f"[Adım {number}] ▶️ Başladı")
+                    expiry = {'expired': False}
+                    result = await run_agent_cancellable(
+                        sub_agent, max_steps, token, check_stop_requested,
+                        app.config.get('STOP_CHECK_INTERVAL', 5),
+                        pooled=sub_lease is not None,
+                        on_step_end=session_hook(session_state is not None, expiry, step_timer),
+                        step_timer=step_timer
+                    )
+                    if session_state is not None and (expiry['expired'] or session_expired(result)):
+                        # Oturum düşmüş: bu ve sonraki alt görevler giriş adımlarıyla çalışır
+                        shared['storage_state'] = None
+                        await drop_snapshot()
+                        await close_agent_browser(sub_agent, pooled=sub_lease is not None)
+                        if sub_lease is not None:
+                            await loop.run_in_executor(None, browser_pool.release, sub_lease)
+                            sub_lease = None
+                        token.raise_if_cancelled()
+                        sub_agent, sub_lease = await create_agent(
+                            format_task(plan.preamble + '\n' + plan.subtask_text(number, text)), max_steps
+                        )
+                        cache_agent_llm(sub_agent)
+                        step_timer = StepTimer(origin).attach(sub_agent)
+                        log_step(f"[Adım {number}] 🔑 Giriş adımlarıyla yeniden başladı")
+                        result = await run_agent_cancellable(
+                            sub_agent, max_steps, token, check_stop_requested,
+                            app.config.get('STOP_CHECK_INTERVAL', 5),
+                            pooled=sub_lease is not None, on_step_end=session_hook(False, expiry, step_timer),
+                            step_timer=step_timer
+                        )
+                    # browser-use geçmişi başarı bilgisini ve son çıktıyı taşır
+                    is_successful = getattr(result, 'is_successful', None)
+                    final_result = getattr(result, 'final_result', None)
+                    succeeded = is_successful() if callable(is_successful) else True
+                    step_result['result'] = str(final_result() if callable(final_result) else result)[:1000]
+                    step_result['status'] = 'failed' if succeeded is False else 'completed'
+                except TestStopped:
+                    step_result['status'] = 'stopped'
+                except Exception as e:
+                    step_result['status'] = 'failed'
+                    step_result['error'] = str(e)[:1000]
+                finally:
+                    if sub_lease is not None:
+                        await loop.run_in_executor(None, browser_pool.release, sub_lease)
+                    await store_artifacts(sub_agent, f'adim-{number}/')
+                step_result['duration'] = round(time.monotonic() - started, 1)
+                log_step(f"[Adım {number}] {step_result['status']} ({step_result['duration']} sn)")
+                return step_result
+        
+        step_results = await asyncio.gather(*(run_subtask(number, text) for number, text in plan.steps))
+        summary, failed = summarize_step_results(step_results)
+        step_results_json = json.dumps(step_results, ensure_ascii=False)
+        
+        if token.cancelled:
+            log_step("⏹️ Test kullanıcı tarafından durduruldu")
+            await save_status('stopped', result_text=summary, step_results=step_results_json)
+        elif failed:
+            log_step(f"❌ Başarısız alt görevler: {', '.join(map(str, failed))}")
+            await save_status('failed', result_text=summary, step_results=step_results_json,
+                              error_message=f"Başarısız adımlar: {', '.join(map(str, failed))}")
+        else:
+            log_step(f"✅ {len(step_results)} alt görevin tamamı başarılı")
+            await save_status('completed', result_text=summary, step_results=step_results_json)
+    
+    try:
+        from browser_use import Agent
+        import os
+        from dotenv import load_dotenv
+        
+        # .env dosyasını yükle
+        load_dotenv()
+        
+        log_step("🚀 Test başlatılıyor...")
+        log_step("⚠️ GERÇEK BROWSER AÇILACAK VE OTOMASYON YAPILACAK!")
+        
+        # Güvenli tür dönüşümü için helper fonksiyon
+        def safe_int(value, default):
+            try:
+                return int(value) if value else default
+            except (ValueError, TypeError):
+                return default
+        
+        # Prompt içeriğini URL ile değiştir ve daha net hale getir
+        def format_task(content):
+            # f-string içinde ters bölü kullanılamadığı için (Python < 3.12) önceden hazırla
+            steps_text = content.replace('Belirtilen URL\'yi ziyaret et: {url}', '').replace('1. adım:', 'Adım 1:').replace('2. adım:', 'Adım 2:')
+            return f"""
+Öncelikle şu web sitesini ziyaret et: {project_url}
+
+Sonra aşağıdaki adımları takip et:
+
+{steps_text}
+"""
+        
+        formatted_prompt = format_task(prompt_content)
+        
+        log_step(f"🌐 Hedef URL: {project_url}")
+        log_step("📋 Formatted prompt ilk 300 karakter:")
+        log_step(formatted_prompt[:300] + "...")
+        
+        # Test sonucunu güncelle
+        await save_status('running', final=False, total_steps=safe_int(os.getenv('MAX_STEPS'), 100))
+        
+        # Konfigürasyon değerleri
+        
+        config = {
+            'max_steps': safe_int(os.getenv('MAX_STEPS'), 100),
+            'headless': os.getenv('HEADLESS', 'False').lower() == 'true',
+            'window_width': safe_int(os.getenv('WINDOW_WIDTH'), 1920),
+            'window_height': safe_int(os.getenv('WINDOW_HEIGHT'), 1080),
+            'implicit_wait': safe_int(os.getenv('IMPLICIT_WAIT'), 5),
+            'explicit_wait': safe_int(os.getenv('EXPLICIT_WAIT'), 10),
+            'llm_provider': os.getenv('LLM_PROVIDER', 'gemini'),
+            'llm_model': os.getenv('LLM_MODEL', 'gemini-flash-latest'),
+            'api_key': os.getenv('OPENAI_API_KEY'),
+            'gemini_api_key': os.getenv('GEMINI_API_KEY'),
+        }
+        
+        log_step(f"🤖 LLM Provider: {config['llm_provider']} ({config['llm_model']})")
+        log_step(f"📊 Max Steps: {config['max_steps']} (Type: {type(config['max_steps'])})")
+        log_step(f"👁️ Headless Mode: {config['headless']}")
+        log_step(f"🖥️ Window Size: {config['window_width']}x{config['window_height']}")
+        
+        # LLM konfigürasyonunu dinamik olarak oluştur
+        def get_llm_config(config):
+            provider = config['llm_provider'].lower()
+            model = config['llm_model']
+            
+            if provider == 'openai':
+                if not config['api_key']:
+                    log_step("⚠️ OPENAI_API_KEY bulunamadı, Browser-Use default kullanılacak")
+                    return None
+                return {
+                    "provider": "openai",
+                    "api_key": config['api_key'],
+                    "model": model
+                }
+            elif provider == 'gemini':
+                if not config['gemini_api_key']:
+                    log_step("⚠️ GEMINI_API_KEY bulunamadı, Browser-Use default Gemini kullanılacak")
+                    return None
+                return {
+                    "provider": "gemini",
+                    "api_key": config['gemini_api_key'],
+                    "model": model
+                }
+            elif provider == 'anthropic':
+                anthropic_key = os.getenv('ANTHROPIC_API_KEY')
+                if not anthropic_key:
+                    log_step("⚠️ ANTHROPIC_API_KEY bulunamadı, Browser-Use default kullanılacak")
+                    return None
+                return {
+                    "provider": "anthropic", 
+                    "api_key": anthropic_key,
+                    "model": model
+                }
+            elif provider == 'scripted':
+                # Benchmark ve yerel denemeler için LLM_SCRIPT senaryosunu oynatan ağsız model
+                return {
+                    "provider": "scripted",
+                    "model": "scripted"
+                }
+            else:
+                log_step(f"⚠️ Bilinmeyen provider '{provider}', Browser-Use default kullanılacak")
+                return None
+        
+        # Browser config - FORCED VISIBLE MODE
+        browser_config = {
+            "headless": False,  # Zorla görünür mod
+            "window_size": (config['window_width'], config['window_height']),
+            "page_load_strategy": "eager",
+            "implicit_wait": config['implicit_wait'],
+            "explicit_wait": config['explicit_wait'],
+            "disable_images": False,
+            "disable_javascript": False,
+            "chrome_options": [
+                "--start-maximized",
+                "--disable-web-security",
+                "--disable-features=VizDisplayCompositor"
+            ]
+        }
+        
+        log_step(f"⚙️ Browser Config: {browser_config}")
+        
+        # LLM konfigürasyonunu al
+        llm_config = get_llm_config(config)
+        
+        log_step("🔧 Browser agent yapılandırılıyor...")
+        
+        # Max steps değerini garantili integer yap
+        max_steps_int = int(config['max_steps']) if isinstance(config['max_steps'], (str, int)) else 100
+        log_step(f"🔢 Final max_steps: {max_steps_int} (Type: {type(max_steps_int)})")
+        
+        async def create_agent(task, max_steps, session_state=None):
+            """Agent oluştur; (agent, havuz kirası) döner"""
+            agent_lease = None
+            browser_kwargs = {}
+            session_kwargs = {'storage_state': session_state} if session_state else {}
+            # Hazır tarayıcı havuzu varsa yeni tarayıcı açmak yerine izole bir context kirala
+            if browser_pool is not None and browser_pool.enabled:
+                from browser_use import BrowserSession
+                agent_lease = await loop.run_in_executor(None, browser_pool.lease)
+                try:
+                    # Kayıtlı oturum varsayılan context'e değil, kiralanan context'e yüklenir
+                    if session_state:
+                        await loop.run_in_executor(None, agent_lease.load_storage_state, session_state)
+                    browser_session = BrowserSession(cdp_url=agent_lease.cdp_url, keep_alive=True)
+                    await attach_session(browser_session, agent_lease)
+                except Exception:
+                    await loop.run_in_executor(None, browser_pool.release, agent_lease)
+                    raise
+                browser_kwargs['browser_session'] = browser_session
+                log_step(f"♻️ Tarayıcı havuzundan izole context alındı: {agent_lease.browser_context_id}")
+            elif session_kwargs:
+                from browser_use import BrowserSession
+                browser_kwargs['browser_session'] = BrowserSession(**session_kwargs)
+            
+            # Dinamik LLM konfigürasyonu ile Agent oluştur
+            if llm_config and llm_config['provider'] == 'scripted':
+                agent_kwargs = {'llm': ScriptedChatModel.from_env()}
+            elif llm_config:
+                agent_kwargs = {'llm_config': llm_config}
+            else:
+                agent_kwargs = {}
+            new_agent = Agent(
+                task=task,
+                max_steps=max_steps,
+                use_vision=True,
+                save_conversation_history=False,
+                browser_config=browser_config,
+                **agent_kwargs,
+                **browser_kwargs
+            )
+            if agent_lease is not None:
+                agent_leases[id(new_agent)] = agent_lease
+            return new_agent, agent_lease
+        
+        if llm_config:
+            log_step(f"✅ Kullanılan LLM: {llm_config['provider']} - {llm_config['model']}")
+        else:
+            log_step("🔧 Browser-Use default LLM kullanılıyor (Gemini Flash Latest)")
+        
+        # Adım yapılı prompt'lar bağımsız alt görevlere bölünüp paralel çalıştırılır
+        plan = split_prompt(prompt_content) if app.config.get('SPLIT_PROMPT_STEPS') else None
+        if plan is not None:
+            await run_subtasks(plan, create_agent, format_task)
+            return
+        
+        # Kayıtlı oturum varsa giriş adımları atlanır (aksiyon izi girişi zaten içerir)
+        uses_snapshot = storage_state is not None and trace is None
+        if uses_snapshot:
+            log_step("🍪 Kayıtlı oturum bulundu, giriş adımları atlanacak")
+            agent_task = format_task(strip_login_steps(prompt_content)) + '\n' + SESSION_EXPIRED_INSTRUCTION
+            agent, lease = await create_agent(agent_task, max_steps_int, storage_state)
+        else:
+            agent, lease = await create_agent(formatted_prompt, max_steps_int)
+        
+        # LLM_CACHE açıksa değişmemiş sayfalarda LLM yanıtları diskten gelir
+        cached_llm = cache_agent_llm(agent)
+        if cached_llm is not None:
+            log_step("💾 LLM yanıt önbelleği aktif")
+        # Agent adımları faz bazında (LLM, DOM, ekran görüntüsü, aksiyon, DB) ölçülür
+        step_timer = StepTimer(origin).attach(agent)
+        
+        log_step("🌐 Browser açılıyor ve test başlatılıyor...")
+        log_step("🤖 Browser-use AI Agent devreye giriyor...")
+        
+        # GERÇEK BROWSER AUTOMATION - Browser açılacak ve otomatik test yapılacak!
+        log_step("🚀 GERÇEK BROWSER AUTOMATION BAŞLIYOR - Browser açılıyor...")
+        log_step(f"⚠️ Bu aşamada tarayıcı penceresi açılacak! Headless: {config['headless']}")
+        log_step(f"🌐 Ziyaret edilecek URL: {project_url}")
+        log_step("📋 Agent task preview:")
+        log_step(formatted_prompt[:200] + "...")
+        
+        # Gerçek browser automation çalıştır
+        # Browser-use async çağrısı
+        log_step("🚀 Agent async çağrısı yapılıyor... BROWSER AÇILIYOR!")
+        
+        log_step("⏱️ Browser açılması bekleniyor...")
+        
+        # Kurulum sırasında durdurulduysa tarayıcıyı hiç açma
+        token.raise_if_cancelled()
+        
+        # Kayıtlı aksiyon izi varsa önce LLM'e sormadan tekrar oynat
+        replay = None
+        replayed_steps = []
+        if trace is not None:
+            trace_id, trace_data = trace
+            log_step(f"🔁 Kayıtlı aksiyon izi bulundu ({len(trace_data['steps'])} adım), LLM'siz tekrar oynatılıyor")
+            try:
+                replay = await replay_trace(agent, trace_data, log_step, token)
+            except TestStopped:
+                await close_agent_browser(agent, pooled=lease is not None)
+                raise
+            if replay.completed:
+                log_step(f"⚡ İz tamamen tekrar oynatıldı ({replay.steps_done} adım), LLM çağrısı yapılmadı")
+                await close_agent_browser(agent, pooled=lease is not None)
+            else:
+                log_step(f"↪️ Tekrar oynatma saptı ({replay.reason}); kontrol LLM agent'a devrediliyor")
+                replayed_steps = trace_data['steps'][:replay.steps_done]
+                if replayed_steps and hasattr(agent, 'add_new_task'):
+                    agent.add_new_task(f"İlk {len(replayed_steps)} adım zaten uygulandı; mevcut sayfadan kalan adımlarla devam et.")
+        
+        if replay is not None and replay.completed:
+            result = replay.result
+        else:
+            # Agent bu event loop üzerinde diğer testlerle birlikte çalışır
+            try:
+                expiry = {'expired': False}
+                result = await run_agent_cancellable(
+                    agent, max_steps_int, token, check_stop_requested,
+                    app.config.get('STOP_CHECK_INTERVAL', 5),
+                    pooled=lease is not None, on_step_end=session_hook(uses_snapshot, expiry, step_timer),
+                    step_timer=step_timer
+                )
+                if uses_snapshot and (expiry['expired'] or session_expired(result)):
+                    # Oturum düşmüş: kaydı sil, temiz tarayıcıda tam prompt ile yeniden çalıştır
+                    await drop_snapshot()
+                    await close_agent_browser(agent, pooled=lease is not None)
+                    if lease is not None:
+                        await loop.run_in_executor(None, browser_pool.release, lease)
+                        lease = None
+                    token.raise_if_cancelled()
+                    agent, lease = await create_agent(formatted_prompt, max_steps_int)
+                    cached_llm = cache_agent_llm(agent)
+                    step_timer = StepTimer(origin).attach(agent)
+                    result = await run_agent_cancellable(
+                        agent, max_steps_int, token, check_stop_requested,
+                        app.config.get('STOP_CHECK_INTERVAL', 5),
+                        pooled=lease is not None, on_step_end=session_hook(False, expiry, step_timer),
+                        step_timer=step_timer
+                    )
+            except TestStopped:
+                raise
+            except Exception as async_error:
+                log_step(f"⚠️ Async hatası: {async_error}")
+                raise
+        
+        log_step("🏁 Agent çağrısı tamamlandı!")
+        if cached_llm is not None:
+            log_step(f"💾 {cached_llm.stats_text()}")
+        
+        log_step("✅ Browser automation tamamlandı!")
+        log_step(f"📊 Test sonucu: {result_summary(result)[:300]}")
+        
+        # Başarılı çalışmanın aksiyon izini sonraki tekrar oynatmalar için sakla
+        def write_trace():
+            with app.app_context():
+                if replay is not None and replay.completed:
+                    mark_replayed(trace_id)
+                    return
+                history = getattr(agent, 'history', None)
+                if history is None or not history.is_successful():
+                    return
+                steps = replayed_steps + extract_trace(history)['steps']
+                save_trace(project_id, prompt_id, project_url, prompt_content,
+                           {'version': 1, 'steps': steps}, test_result_id)
+        
+        try:
+            await loop.run_in_executor(db_writer, run_with_retry, app, write_trace)
+        except Exception as e:
+            print(f"Aksiyon izi kaydetme hatası: {e}")
+        
+        # Sonucu kaydet (tam geçmiş ve ekran görüntüleri TestResult yerine ek olarak saklanır)
+        await store_artifacts(agent)
+        await save_status('completed', result_text=result_summary(result))
+    
+    except TestStopped:
+        log_step("⏹️ Test kullanıcı tarafından durduruldu")
+        await store_artifacts(agent)
+        await save_status('stopped')
+    
+    except Exception as e:
+        log_step(f"❌ Test hatası: {str(e)}")
+        print(f"Detaylı hata: {e}")
+        
+        # Hata durumunu kaydet
+        await store_artifacts(agent)
+        await save_status('failed', error_message=str(e))
+    
+    finally:
+        cancellations.unregister(test_result_id)
+        if lease is not None:
+            await loop.run_in_executor(None, browser_pool.release, lease)
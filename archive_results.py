@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Eski test sonuçlarını sıkıştırılmış arşiv dosyalarına taşır.
+
+RETENTION_DAYS ayarlıysa zamanlayıcı bunu kendisi de yapar; bu betik elle
+veya ilk geçişte toplu arşivleme için kullanılır. --vacuum, boşalan alanı
+geri vermek için veritabanı dosyasını yeniden yazar (büyük dosyada uzun sürer).
+
+Kullanım:
+    python archive_results.py --days 90 --vacuum
+"""
+
+from app import create_app, db
+from app.retention import archive_old_results
+from sqlalchemy import text
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Eski test sonuçlarını arşivle')
+    parser.add_argument('--days', type=int, help='Bu günden eski sonuçlar arşivlenir (varsayılan RETENTION_DAYS)')
+    parser.add_argument('--vacuum', action='store_true', help='Arşivlemeden sonra SQLite VACUUM çalıştır')
+    args = parser.parse_args()
+
+    app = create_app(start_workers=False)
+    days = args.days if args.days is not None else app.config['RETENTION_DAYS']
+    if not days:
+        parser.error('--days verilmeli veya RETENTION_DAYS ayarlanmalı')
+
+    archived = archive_old_results(app, days)
+    print(f'✓ {days} günden eski {archived} test sonucu {app.config["ARCHIVE_DIR"]} altına arşivlendi')
+
+    if args.vacuum:
+        with app.app_context():
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                connection.execute(text('VACUUM'))
+                # WAL modunda küçülen dosya ancak checkpoint ile ana dosyaya yansır
+                connection.execute(text('PRAGMA wal_checkpoint(TRUNCATE)'))
+        print('✓ Veritabanı dosyası küçültüldü (VACUUM)')
+
+
+if __name__ == '__main__':
+    main()
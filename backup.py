@@ -2,6 +2,7 @@ import time
 import os
 from browser_use import Agent, ChatOpenAI
 from dotenv import load_dotenv
+from app.llm_cache import cache_agent_llm
 
 # .env dosyasından konfigürasyonları yükle
 load_dotenv()
@@ -84,11 +85,17 @@ agent = Agent(
     },
 )
 
+# LLM_CACHE=True ise değişmemiş sayfalarda LLM yanıtları diskten gelir
+cached_llm = cache_agent_llm(agent)
+
 # Sürekli döngü ile siteyi kontrol et
 while True:
     try:
         result = agent.run_sync()
         print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Site durumu: {result}")
+        if cached_llm is not None:
+            print(cached_llm.stats_text())
+            cached_llm.reset_stats()
     except Exception as e:
         print(f"Hata oluştu: {e}")
     print(f"Test tamamlandı. {config['test_interval']} dakika sonra tekrar başlatılacak...")
@@ -0,0 +1 @@
+"""Test runner'ı için ağsız orkestrasyon benchmark'ı (bkz. run_benchmark.py)."""
@@ -0,0 +1,104 @@
+"""Benchmark için yerel, menü tabanlı örnek site.
+
+Hedef sitemiz gibi üst menüden açılan alt menülerle gezilen birkaç sayfa,
+bir giriş formu ve fiyat tablosu içerir. Standart kütüphanedeki HTTP sunucusu
+ile ayrı bir thread'de çalışır; ``delay`` her yanıtı geciktirerek yavaş sayfa
+yüklemesini taklit eder.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+import threading
+import time
+
+MENU = [
+    ('Ürünler', [('Akaryakıt', '/urunler/akaryakit'), ('Madeni Yağlar', '/urunler/madeni-yaglar')]),
+    ('Kampanyalar', [('Güncel Kampanyalar', '/kampanyalar'), ('Sadakat Programı', '/kampanyalar/sadakat')]),
+    ('Hesabım', [('Giriş Yap', '/giris')]),
+]
+
+PAGES = {
+    '/': ('Ana Sayfa', '<p>Hoş geldiniz. Menüden bir bölüm seçin.</p>'),
+    '/urunler/akaryakit': ('Akaryakıt', '''
+        <table>
+            <tr><th>Ürün</th><th>Fiyat</th></tr>
+            <tr><td>Benzin</td><td>43,50 TL</td></tr>
+            <tr><td>Motorin</td><td>44,10 TL</td></tr>
+            <tr><td>Otogaz</td><td>22,30 TL</td></tr>
+        </table>'''),
+    '/urunler/madeni-yaglar': ('Madeni Yağlar', '<ul><li>Motor yağı 5W-30</li><li>Şanzıman yağı</li></ul>'),
+    '/kampanyalar': ('Güncel Kampanyalar', '<p>Hafta sonu akaryakıtta %5 indirim.</p>'),
+    '/kampanyalar/sadakat': ('Sadakat Programı', '<p>Her alışverişte puan kazanın.</p>'),
+    '/giris': ('Giriş Yap', '''
+        <form method="post" action="/giris">
+            <label for="email">E-posta</label> <input id="email" name="email" placeholder="E-posta">
+            <label for="password">Şifre</label> <input id="password" name="password" type="password" placeholder="Şifre">
+            <button type="submit">Giriş</button>
+        </form>'''),
+}
+
+
+def render(title, body):
+    menu = ''.join(
+        f'<details><summary>{name}</summary><ul>'
+        + ''.join(f'<li><a href="{href}">{label}</a></li>' for label, href in items)
+        + '</ul></details>'
+        for name, items in MENU
+    )
+    return f'''<!DOCTYPE html>
+<html lang="tr"><head><meta charset="utf-8"><title>{title} - Benchmark Sitesi</title>
+<style>nav {{display: flex; gap: 1rem;}} details ul {{position: absolute; background: #fff;}}</style>
+</head><body>
+<nav><a href="/">Ana Sayfa</a>{menu}</nav>
+<main><h1>{title}</h1>{body}</main>
+</body></html>'''.encode('utf-8')
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def do_GET(self):
+        page = PAGES.get(self.path.split('?', 1)[0].rstrip('/') or '/')
+        if page is None:
+            self._send(404, render('Sayfa bulunamadı', '<p>Aradığınız sayfa yok.</p>'))
+        else:
+            self._send(200, render(*page))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        email = form.get('email', [''])[0]
+        if email:
+            self._send(200, render('Hesabım', f'<p>Hoş geldiniz, {email}.</p>'))
+        else:
+            self._send(200, render('Giriş Yap', '<p>E-posta gerekli.</p>' + PAGES['/giris'][1]))
+
+    def _send(self, status, body):
+        if self.delay:
+            time.sleep(self.delay)
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_site(host='127.0.0.1', port=0, delay=0.0):
+    """Siteyi arka plan thread'inde başlat; (sunucu, kök URL) döner"""
+    handler = type('Handler', (FixtureHandler,), {'delay': delay})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fixture-site', daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}/'
+
+
+if __name__ == '__main__':
+    server, url = start_fixture_site(port=8765)
+    print(f'Örnek site: {url} (Ctrl+C ile kapat)')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Test runner'ının ağsız orkestrasyon benchmark'ı.
+
+Yerel örnek siteyi (fixture_site.py) başlatır, LLM_PROVIDER=scripted ile
+deterministik bir senaryo oynatan modeli seçer ve geçici bir veritabanıyla
+uygulamayı kurar. Proje, prompt ve N test gerçek Flask route'ları üzerinden
+oluşturulur; testleri uygulamanın kendi runner'ı TEST_WORKERS paralellikle
+çalıştırır. Ölçümler (saniye/dakika başına çalışma, uçtan uca ve kuyruk
+gecikmesi yüzdelikleri, ilk agent adımına kadar geçen süre, en yüksek RSS,
+SQL yazma sayıları) JSON olarak yazılır; --compare ile önceki bir sonuçla
+karşılaştırılır.
+
+Gerçek browser-use ve yerel Chromium gerekir, LLM veya internet gerekmez.
+
+Kullanım (depo kökünden):
+    python -m benchmark.run_benchmark --runs 20 --concurrency 4 --output bench.json
+    python -m benchmark.run_benchmark --runs 20 --concurrency 4 --compare bench.json
+"""
+
+from benchmark.fixture_site import start_fixture_site
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Örnek sitedeki menülerde gezen senaryo; prompt aynı adımları anlatır
+SCRIPT = [
+    {'open': '{url}'},
+    {'click': 'Ürünler'},
+    {'click': 'Akaryakıt'},
+    {'click': 'Kampanyalar'},
+    {'click': 'Güncel Kampanyalar'},
+    {'done': 'Akaryakıt fiyatları ve güncel kampanyalar görüntülendi'},
+]
+
+PROMPT = """1. adım: Ürünler menüsünü aç ve Akaryakıt sayfasına git, fiyat tablosunu kontrol et.
+2. adım: Kampanyalar menüsünü aç ve Güncel Kampanyalar sayfasına git."""
+
+# Sonuca yazılan uygulama ayarları (karşılaştırılan iki ölçümün aynı koşulda alındığını görmek için)
+RECORDED_CONFIG = ('TEST_WORKERS', 'EXECUTION_MODE', 'BROWSER_POOL_SIZE', 'ACTION_REPLAY', 'SESSION_SNAPSHOTS',
+                   'SPLIT_PROMPT_STEPS')
+
+
+class StatementCounter:
+    """Süreçteki tüm SQL cümlelerini türüne göre ve commit'leri say"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.commits = 0
+
+    def install(self):
+        @event.listens_for(Engine, 'before_cursor_execute')
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            kind = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else 'other'
+            rows = len(parameters) if executemany and parameters else 1
+            with self.lock:
+                self.counts[kind] = self.counts.get(kind, 0) + rows
+
+        @event.listens_for(Engine, 'commit')
+        def count_commit(conn):
+            with self.lock:
+                self.commits += 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts), self.commits
+
+
+def percentiles(values):
+    """En yakın sıra yöntemiyle p50/p95/p99 ve en büyük değer (saniye)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+    return {'p50': round(rank(50), 3), 'p95': round(rank(95), 3), 'p99': round(rank(99), 3),
+            'max': round(ordered[-1], 3), 'mean': round(sum(ordered) / len(ordered), 3)}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb():
+    """Bu sürecin ve beklenmiş alt süreçlerin (tarayıcı, worker) en yüksek RSS'i (MB)"""
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        'children': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def configure_environment(args, workdir, site_url):
+    """create_app'ten önce geçici veritabanı, senaryolu LLM ve runner ayarlarını ortama yaz"""
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'benchmark.db')}",
+        'ARTIFACT_DIR': os.path.join(workdir, 'artifacts'),
+        'ARCHIVE_DIR': os.path.join(workdir, 'archive'),
+        'LLM_PROVIDER': 'scripted',
+        'LLM_SCRIPT': json.dumps(SCRIPT, ensure_ascii=False),
+        'SCRIPTED_LLM_DELAY': str(args.llm_delay),
+        'LLM_CACHE': 'False',
+        'HEADLESS': 'True',
+        'TEST_WORKERS': str(args.concurrency),
+        'WEB_RUNS_TESTS': 'True',
+        'SCHEDULER_ENABLED': 'False',
+        'URL': site_url,
+    })
+
+
+def run_benchmark(args):
+    workdir = tempfile.mkdtemp(prefix='browser-test-benchmark-')
+    server, site_url = start_fixture_site(delay=args.page_delay)
+    configure_environment(args, workdir, site_url)
+
+    from app import create_app, db
+    from app.models import Project, TestPrompt, TestResult, TestStep, User
+    from app.tasks import AGENT_STEP_MARKER
+
+    counter = StatementCounter()
+    counter.install()
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    client = app.test_client()
+    with app.app_context():
+        user_id = User.query.filter_by(username='admin').first().id
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+    # Kurulum ve testler uygulamanın kendi route'larından geçer
+    client.post('/projects/project/new', data={'name': 'Benchmark', 'url': site_url, 'description': 'benchmark'})
+    with app.app_context():
+        project_id = Project.query.filter_by(name='Benchmark').order_by(Project.id.desc()).first().id
+    client.post(f'/tests/project/{project_id}/prompt/new', data={'name': 'Menü gezintisi', 'content': PROMPT})
+    with app.app_context():
+        prompt_id = TestPrompt.query.filter_by(project_id=project_id).first().id
+
+    statements_before, commits_before = counter.snapshot()
+    started = time.monotonic()
+    for _ in range(args.runs):
+        response = client.post(f'/tests/prompt/{prompt_id}/run', data={'project_url': site_url})
+        if response.status_code != 302:
+            raise RuntimeError(f'Test gönderilemedi: HTTP {response.status_code}')
+
+    # Sonuç sayfasını izleyen kullanıcıları taklit eden okuma yükü
+    stop_polling = threading.Event()
+    poller = threading.Thread(target=poll_results, args=(app, user_id, args.poll_interval, stop_polling), daemon=True)
+    if args.poll_interval:
+        poller.start()
+
+    with app.app_context():
+        while True:
+            unfinished = TestResult.query.filter(
+                TestResult.project_id == project_id,
+                TestResult.status.in_(('pending', 'running'))
+            ).count()
+            db.session.rollback()
+            if not unfinished or time.monotonic() - started > args.timeout:
+                break
+            time.sleep(0.2)
+    elapsed = time.monotonic() - started
+    stop_polling.set()
+    statements_after, commits_after = counter.snapshot()
+
+    with app.app_context():
+        results = TestResult.query.filter_by(project_id=project_id).all()
+        first_steps = dict(db.session.query(TestStep.test_result_id, db.func.min(TestStep.created_at)).filter(
+            TestStep.test_result_id.in_([result.id for result in results]),
+            TestStep.message.like(f'{AGENT_STEP_MARKER}%')
+        ).group_by(TestStep.test_result_id).all())
+        config = {key: app.config.get(key) for key in RECORDED_CONFIG}
+
+    server.shutdown()
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    finished = [result for result in results if result.completed_at]
+    # Başarısız veya durdurulan çalışmalar hızlı biter; ölçümlere yalnızca başarılı çalışmalar girer
+    completed = [result for result in finished if result.status == 'completed']
+    statements = {kind: statements_after.get(kind, 0) - statements_before.get(kind, 0)
+                  for kind in statements_after if statements_after[kind] != statements_before.get(kind, 0)}
+    writes = sum(statements.get(kind, 0) for kind in ('insert', 'update', 'delete'))
+    statuses = {}
+    for result in results:
+        statuses[result.status] = statuses.get(result.status, 0) + 1
+    span = (max(r.completed_at for r in completed) - min(r.created_at for r in results)).total_seconds() if completed else None
+
+    return {
+        'benchmark': 'orchestration',
+        'format': 2,
+        'commit': git_commit(),
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'params': {
+            'runs': args.runs,
+            'concurrency': args.concurrency,
+            'llm_delay': args.llm_delay,
+            'page_delay': args.page_delay,
+            'poll_interval': args.poll_interval,
+            'script_steps': len(SCRIPT),
+            'config': config,
+        },
+        'metrics': {
+            'statuses': statuses,
+            'completed_runs': len(completed),
+            'failed_runs': len(finished) - len(completed),
+            'timed_out': len(finished) < len(results),
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput_runs_per_minute': round(len(completed) / span * 60, 2) if span else None,
+            'end_to_end_seconds': percentiles([(r.completed_at - r.created_at).total_seconds() for r in completed]),
+            'queue_latency_seconds': percentiles([(r.started_at - r.created_at).total_seconds()
+                                                  for r in completed if r.started_at]),
+            'time_to_first_step_seconds': percentiles([(first_steps[r.id] - r.created_at).total_seconds()
+                                                       for r in completed if r.id in first_steps]),
+            'peak_rss_mb': peak_rss_mb(),
+            'sql_statements': statements,
+            'sql_writes': writes,
+            'sql_writes_per_run': round(writes / len(results), 1) if results else None,
+            'sql_commits': commits_after - commits_before,
+        },
+    }
+
+
+def poll_results(app, user_id, interval, stop):
+    """Bitmemiş testlerin sonuç API'sini interval saniyede bir oku (canlı sonuç sayfası gibi)"""
+    from app.models import TestResult
+    from app import db
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    while not stop.wait(interval):
+        with app.app_context():
+            active = [row.id for row in db.session.query(TestResult.id).filter(
+                TestResult.status.in_(('pending', 'running'))
+            )]
+        for test_result_id in active:
+            client.get(f'/tests/api/result/{test_result_id}')
+
+
+# Karşılaştırmada gösterilen ölçümler: (başlık, yol, büyük değer iyi mi)
+COMPARED_METRICS = [
+    ('Başarılı çalışma', ('completed_runs',), True),
+    ('Çalışma/dakika', ('throughput_runs_per_minute',), True),
+    ('Uçtan uca p50 (sn)', ('end_to_end_seconds', 'p50'), False),
+    ('Uçtan uca p95 (sn)', ('end_to_end_seconds', 'p95'), False),
+    ('Uçtan uca p99 (sn)', ('end_to_end_seconds', 'p99'), False),
+    ('Kuyruk p95 (sn)', ('queue_latency_seconds', 'p95'), False),
+    ('İlk adım p50 (sn)', ('time_to_first_step_seconds', 'p50'), False),
+    ('İlk adım p95 (sn)', ('time_to_first_step_seconds', 'p95'), False),
+    ('En yüksek RSS (MB)', ('peak_rss_mb', 'self'), False),
+    ('Alt süreç RSS (MB)', ('peak_rss_mb', 'children'), False),
+    ('SQL yazma/çalışma', ('sql_writes_per_run',), False),
+    ('Commit', ('sql_commits',), False),
+]
+
+
+def compare(baseline, current):
+    """İki sonucu tablo olarak yazdır"""
+    if baseline.get('params', {}).get('runs') != current['params']['runs'] or \
+            baseline.get('params', {}).get('concurrency') != current['params']['concurrency']:
+        print('⚠️ Karşılaştırılan ölçümler farklı runs/concurrency ile alınmış')
+    print(f"{'Ölçüm':<22}{baseline.get('commit') or 'önceki':>12}{current.get('commit') or 'şimdiki':>12}{'Fark':>10}")
+    for title, path, higher_is_better in COMPARED_METRICS:
+        old, new = _lookup(baseline['metrics'], path), _lookup(current['metrics'], path)
+        if old is None or new is None:
+            continue
+        change = f'{(new - old) / old * 100:+.1f}%' if old else '-'
+        better = (new > old) == higher_is_better if new != old else None
+        mark = '' if better is None else (' ✓' if better else ' ✗')
+        print(f'{title:<22}{old:>12}{new:>12}{change:>10}{mark}')
+
+
+def _lookup(metrics, path):
+    value = metrics
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Test runner orkestrasyon benchmark\'ı (ağsız)')
+    parser.add_argument('--runs', type=int, default=20, help='Gönderilecek test sayısı')
+    parser.add_argument('--concurrency', type=int, default=4, help='TEST_WORKERS (aynı anda çalışan test)')
+    parser.add_argument('--llm-delay', type=float, default=0.0, help='Senaryolu LLM yanıt gecikmesi (saniye)')
+    parser.add_argument('--page-delay', type=float, default=0.0, help='Örnek site yanıt gecikmesi (saniye)')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help='Sonuç API\'sini okuyan izleyicinin aralığı (saniye, 0 = kapalı)')
+    parser.add_argument('--timeout', type=float, default=900, help='Tüm testler için en fazla bekleme (saniye)')
+    parser.add_argument('--output', help='Sonucun yazılacağı JSON dosyası')
+    parser.add_argument('--compare', help='Karşılaştırılacak önceki sonuç (JSON)')
+    parser.add_argument('--keep', action='store_true', help='Geçici veritabanı ve ekleri silme')
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), result)
+    metrics = result['metrics']
+    if metrics['timed_out'] or metrics['completed_runs'] < args.runs:
+        # Başarısız çalışmalı ölçüm karşılaştırmada kullanılmamalı
+        print(f"❌ {args.runs} çalışmadan {metrics['completed_runs']} tanesi başarılı "
+              f"({metrics['failed_runs']} başarısız/durduruldu{', zaman aşımı' if metrics['timed_out'] else ''})")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
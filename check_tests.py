@@ -1,10 +1,11 @@
 from app import create_app, db
 from app.models import TestResult
+from sqlalchemy.orm import joinedload
 
-app = create_app()
+app = create_app(start_workers=False)
 
 with app.app_context():
-    tests = TestResult.query.all()
+    tests = TestResult.query.options(joinedload(TestResult.project)).all()
     for test in tests:
         print(f"Test ID: {test.id}")
         print(f"Status: {test.status}")
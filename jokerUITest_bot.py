@@ -2,6 +2,7 @@ import time
 import os
 from browser_use import Agent
 from dotenv import load_dotenv
+from app.llm_cache import cache_agent_llm
 
 # .env dosyasından konfigürasyonları yükle
 load_dotenv()
@@ -134,12 +135,18 @@ else:
         browser_config=browser_config
     )
 
+# LLM_CACHE=True ise değişmemiş sayfalarda LLM yanıtları diskten gelir
+cached_llm = cache_agent_llm(agent)
+
 # Sürekli döngü ile siteyi kontrol et
 while True:
     try:
         # AI ajanını çalıştır ve sonucu al
         result = agent.run_sync()  # ❌ artık parametre yok
         print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Site durumu: {result}")
+        if cached_llm is not None:
+            print(cached_llm.stats_text())
+            cached_llm.reset_stats()
     except Exception as e:
         print(f"Hata oluştu: {e}")
     
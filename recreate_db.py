@@ -3,7 +3,7 @@ from app.models import User, Project, TestPrompt, TestResult
 import os
 
 # Flask uygulamasını oluştur
-app = create_app()
+app = create_app(start_workers=False)
 
 with app.app_context():
     # Mevcut veritabanını sil ve yeniden oluştur
@@ -1,6 +1,9 @@
 from app import create_app
+import os
 
-app = create_app()
+# Kuyruk worker'ları create_app içinde başlar (gunicorn/waitress "run:app" ile de);
+# debug reloader'ın izleyici sürecinde değil, sadece asıl sunucu sürecinde başlatılır
+app = create_app(start_workers=__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true')
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Projenin prompt'larını suite olarak kuyruğa alır (ör. cron ile gece regresyonu).
+
+Testleri bu betik değil, çalışan web süreci veya worker.py süreçleri
+çalıştırır. --wait verilirse suite bitene kadar beklenir ve başarısız test
+varsa çıkış kodu 1 olur.
+
+Kullanım:
+    python run_suite.py --project 3 --tag regresyon --parallel 5 --wait
+"""
+
+from app import create_app, db
+from app.models import Project, TestSuiteRun
+from app.suites import start_suite
+import argparse
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Projenin prompt\'larını suite olarak çalıştır')
+    parser.add_argument('--project', type=int, required=True, help='Proje id\'si')
+    parser.add_argument('--tag', help='Yalnızca bu etiketi taşıyan prompt\'lar')
+    parser.add_argument('--parallel', type=int, help='Suite\'ten aynı anda çalışacak test sayısı (varsayılan SUITE_MAX_PARALLEL)')
+    parser.add_argument('--url', help='Proje URL\'si yerine test edilecek adres')
+    parser.add_argument('--wait', action='store_true', help='Suite bitene kadar bekle')
+    args = parser.parse_args()
+
+    app = create_app(start_workers=False)
+    with app.app_context():
+        project = db.session.get(Project, args.project)
+        if project is None:
+            parser.error(f'Proje bulunamadı: {args.project}')
+        max_parallel = args.parallel if args.parallel is not None else app.config['SUITE_MAX_PARALLEL']
+        suite, test_result_ids = start_suite(project, project.user_id, args.tag, max_parallel, args.url)
+        if suite is None:
+            parser.error('Çalıştırılacak prompt bulunamadı')
+        suite_run_id = suite.id
+    print(f'✓ Suite #{suite_run_id}: {len(test_result_ids)} test kuyruğa alındı')
+
+    if not args.wait:
+        return
+    while True:
+        with app.app_context():
+            suite = db.session.get(TestSuiteRun, suite_run_id)
+            if suite.status != 'running':
+                print(f'{suite.passed}/{suite.total} başarılı, {suite.failed} başarısız, {suite.stopped} durduruldu '
+                      f'({suite.duration:.0f} sn, sırayla {suite.serial_duration:.0f} sn)')
+                sys.exit(0 if suite.status == 'completed' else 1)
+        time.sleep(10)
+
+
+if __name__ == '__main__':
+    main()
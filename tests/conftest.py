@@ -0,0 +1,34 @@
+"""Testler için ortak fixture'lar: geçici veritabanlı uygulama ve giriş yapmış istemci."""
+
+from app import create_app, db
+from app.models import User
+import pytest
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('ARTIFACT_DIR', str(tmp_path / 'artifacts'))
+    monkeypatch.setenv('ARCHIVE_DIR', str(tmp_path / 'archive'))
+    monkeypatch.setenv('SCHEDULER_ENABLED', 'False')
+    monkeypatch.setenv('QUERY_COUNT_WARN', '0')
+    app = create_app(start_workers=False)
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        return User.query.filter_by(username='admin').first().id
+
+
+@pytest.fixture
+def client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    return client
@@ -0,0 +1,22 @@
+"""Ek deposunda referansı kalmayan içeriğin silinmesi, eşzamanlı tekilleştirmeyle yarışmamalı."""
+
+import os
+import time
+
+
+def test_release_keeps_recently_reused_content(app):
+    store = app.extensions['artifact_store']
+    with app.app_context():
+        sha256, compressed = store.put(b'ekran', 'image/png')
+        path = store.path_for(sha256, compressed)
+        old = time.time() - 2 * store.release_grace
+        os.utime(path, (old, old))
+
+        # Başka bir çalışma aynı içeriğe tekilleştirdi, Artifact kaydı henüz yazılmadı
+        store.put(b'ekran', 'image/png')
+        assert store.release({sha256}) == 0
+        assert os.path.exists(path)
+
+        os.utime(path, (old, old))
+        assert store.release({sha256}) == 1
+        assert not os.path.exists(path)
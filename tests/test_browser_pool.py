@@ -0,0 +1,147 @@
+"""Havuzdan kiralanan context'ler birbirinden izole olmalı; süreç yenileme kiralamaları bekletmemeli."""
+
+from app import browser_pool
+from app.browser_pool import BrowserProcess, attach_session, find_chrome_executable
+import asyncio
+import itertools
+import json
+import pytest
+import threading
+
+ORIGIN = 'https://example.com'
+COOKIE = {'name': 'sid', 'value': 'gizli', 'domain': 'example.com', 'path': '/', 'expires': -1,
+          'httpOnly': True, 'secure': True, 'sameSite': 'Lax'}
+
+
+class FakeChrome:
+    """Context başına ayrı cookie ve localStorage tutan CDP taklidi"""
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.contexts = {}
+        self.targets = {}
+
+    def call(self, ws_url, method, params=None, timeout=10, target_id=None):
+        params = params or {}
+        context = self.contexts[self.targets[target_id]] if target_id else self.contexts.get(params.get('browserContextId'))
+        if method == 'Target.createBrowserContext':
+            context_id = f'ctx-{next(self.ids)}'
+            self.contexts[context_id] = {'cookies': [], 'local_storage': {}}
+            return {'browserContextId': context_id}
+        if method == 'Target.createTarget':
+            target = f'target-{next(self.ids)}'
+            self.targets[target] = params['browserContextId']
+            return {'targetId': target}
+        if method == 'Target.disposeBrowserContext':
+            del self.contexts[params['browserContextId']]
+            return {}
+        if method == 'Storage.setCookies':
+            context['cookies'].extend(dict(cookie, session='expires' not in cookie) for cookie in params['cookies'])
+            return {}
+        if method == 'Storage.getCookies':
+            return {'cookies': list(context['cookies'])}
+        if method == 'DOMStorage.setDOMStorageItem':
+            context['local_storage'][params['key']] = params['value']
+            return {}
+        if method == 'Runtime.evaluate':
+            value = json.dumps({'origin': ORIGIN, 'items': list(context['local_storage'].items())})
+            return {'result': {'value': value}}
+        raise AssertionError(f'beklenmeyen CDP komutu: {method}')
+
+
+def fake_process():
+    process = BrowserProcess('chromium', headless=True)
+    process.ws_url = 'ws://127.0.0.1:9222/devtools/browser/fake'
+    return process
+
+
+@pytest.fixture
+def pool(app, monkeypatch):
+    chrome = FakeChrome()
+    monkeypatch.setattr(browser_pool, 'cdp_call', chrome.call)
+    pool = app.extensions['browser_pool']
+    pool.size = 1
+    pool.contexts_per_process = 2
+    pool.executable = 'chromium'
+    pool.health_interval = 3600
+    pool.lease_timeout = 1
+    monkeypatch.setattr(pool, '_launch', fake_process)
+    yield pool
+    pool.shutdown()
+
+
+def test_leases_get_separate_storage(pool):
+    first, second = pool.lease(), pool.lease()
+    assert first.process is second.process
+    assert first.browser_context_id != second.browser_context_id
+
+    first.load_storage_state({'cookies': [COOKIE],
+                              'origins': [{'origin': ORIGIN, 'localStorage': [{'name': 'token', 'value': 'abc'}]}]})
+
+    assert second.storage_state() == {'cookies': [], 'origins': []}
+    state = first.storage_state()
+    assert state['cookies'] == [COOKIE]
+    assert state['origins'] == [{'origin': ORIGIN, 'localStorage': [{'name': 'token', 'value': 'abc'}]}]
+
+    pool.release(first)
+    pool.release(second)
+
+
+def test_attach_session_focuses_leased_target(pool):
+    class Session:
+        started = False
+        focused = None
+
+        async def start(self):
+            self.started = True
+
+        async def get_or_create_cdp_session(self, target_id=None, focus=True):
+            self.focused = (target_id, focus)
+
+    lease = pool.lease()
+    session = Session()
+    asyncio.run(attach_session(session, lease))
+    assert session.started and session.focused == (lease.target_id, True)
+    pool.release(lease)
+
+
+def test_recycle_launches_outside_lock(pool, monkeypatch):
+    lease = pool.lease()
+    lock_free = []
+
+    def try_lock():
+        acquired = pool._condition.acquire(timeout=1)
+        if acquired:
+            pool._condition.release()
+        lock_free.append(acquired)
+
+    def launch():
+        # Chromium başlarken başka bir thread kiralama kilidini alabilmeli
+        probe = threading.Thread(target=try_lock)
+        probe.start()
+        probe.join()
+        return fake_process()
+
+    monkeypatch.setattr(pool, '_launch', launch)
+    lease.process.retiring = True
+    pool.release(lease)
+    assert lock_free == [True]
+    assert len(pool._processes) == 1 and not pool._processes[0].retiring
+
+
+def test_real_chromium_contexts_are_isolated(app):
+    pytest.importorskip('websockets')
+    executable = find_chrome_executable()
+    if executable is None:
+        pytest.skip('Chromium bulunamadı')
+    pool = app.extensions['browser_pool']
+    pool.size, pool.executable, pool.headless, pool.health_interval = 1, executable, True, 3600
+    try:
+        first, second = pool.lease(), pool.lease()
+        first.load_storage_state({'cookies': [COOKIE], 'origins': []})
+        assert [cookie['name'] for cookie in first.storage_state()['cookies']] == ['sid']
+        assert second.storage_state()['cookies'] == []
+        pool.release(first)
+        pool.release(second)
+    finally:
+        pool.shutdown()
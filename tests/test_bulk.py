@@ -0,0 +1,81 @@
+"""Çalışan testi olan projeler silinmemeli; yarıda kalan toplu işler yeniden başlatmada sürdürülmeli."""
+
+from app import db, models
+import json
+
+
+def add_project(app, user_id, statuses):
+    """Verilen durumlarda birer test sonucu olan proje ekle; proje id'si döner"""
+    with app.app_context():
+        project = models.Project(name='Proje', url='https://example.com', user_id=user_id)
+        db.session.add(project)
+        db.session.flush()
+        prompt = models.TestPrompt(name='Prompt', content='Ana sayfayı aç', project_id=project.id)
+        db.session.add(prompt)
+        db.session.flush()
+        for status in statuses:
+            db.session.add(models.TestResult(project_id=project.id, prompt_id=prompt.id, user_id=user_id,
+                                             status=status))
+        db.session.commit()
+        return project.id
+
+
+def result_statuses(app, project_id):
+    with app.app_context():
+        return sorted(row.status for row in models.TestResult.query.filter_by(project_id=project_id))
+
+
+def test_delete_project_refuses_while_tests_run(app, client, user_id):
+    project_id = add_project(app, user_id, ['completed', 'running'])
+
+    client.post(f'/projects/project/{project_id}/delete')
+
+    with app.app_context():
+        assert db.session.get(models.Project, project_id) is not None
+    assert result_statuses(app, project_id) == ['completed', 'running']
+
+    with app.app_context():
+        models.TestResult.query.filter_by(status='running').update({'status': 'completed'})
+        db.session.commit()
+    client.post(f'/projects/project/{project_id}/delete')
+    with app.app_context():
+        assert db.session.get(models.Project, project_id) is None
+    assert result_statuses(app, project_id) == []
+
+
+def test_delete_project_job_fails_while_tests_run(app, user_id):
+    project_id = add_project(app, user_id, ['completed', 'running'])
+    runner = app.extensions['bulk_jobs']
+    with app.app_context():
+        job = models.BulkJob(user_id=user_id, action='delete_project', params=json.dumps({'project_id': project_id}))
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+    runner._run(job_id)
+
+    with app.app_context():
+        job = db.session.get(models.BulkJob, job_id)
+        assert job.status == 'failed' and job.message
+        assert db.session.get(models.Project, project_id) is not None
+    assert result_statuses(app, project_id) == ['completed', 'running']
+
+
+def test_start_resumes_interrupted_jobs(app, user_id):
+    project_id = add_project(app, user_id, ['completed', 'failed', 'running'])
+    runner = app.extensions['bulk_jobs']
+    with app.app_context():
+        # Süreç bu iş çalışırken kapanmış
+        job = models.BulkJob(user_id=user_id, action='delete_results', status='running',
+                             params=json.dumps({'project_id': project_id}))
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+    runner.start()
+    runner._executor.shutdown(wait=True)
+
+    with app.app_context():
+        job = db.session.get(models.BulkJob, job_id)
+        assert (job.status, job.total, job.processed) == ('completed', 2, 2)
+    assert result_statuses(app, project_id) == ['running']
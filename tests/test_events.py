@@ -0,0 +1,79 @@
+"""Başka süreçteki testlerin akışı izleyici sayısından bağımsız tek yoklamayla beslenmeli; boşta kanallar bırakılmalı."""
+
+from app import db, models
+from app.events import EventBus, StreamPoller
+from app.querycount import assert_max_queries
+from datetime import datetime
+
+
+def add_result(app, user_id, steps):
+    with app.app_context():
+        project = models.Project(name='Proje', url='https://example.com', user_id=user_id)
+        db.session.add(project)
+        db.session.flush()
+        prompt = models.TestPrompt(name='Prompt', content='Ana sayfayı aç', project_id=project.id)
+        db.session.add(prompt)
+        db.session.flush()
+        result = models.TestResult(project_id=project.id, prompt_id=prompt.id, user_id=user_id, status='running')
+        db.session.add(result)
+        db.session.flush()
+        for seq in range(1, steps + 1):
+            add_step(result.id, seq)
+        db.session.commit()
+        return result.id
+
+
+def add_step(test_result_id, seq):
+    db.session.add(models.TestStep(test_result_id=test_result_id, seq=seq, timestamp='12:00:00',
+                                   message=f'adım {seq}', created_at=datetime.utcnow()))
+
+
+def test_one_poll_feeds_every_viewer(app, user_id):
+    test_result_id = add_result(app, user_id, steps=2)
+    bus = EventBus()
+    poller = StreamPoller(app, event_bus=bus)
+    poller.interval = 0
+
+    # Aynı testi izleyen üç akış; ilk okumaları 2. adıma kadar
+    positions = [bus.subscribe(test_result_id) for _ in range(3)]
+    bus.seen(test_result_id, 2, 'running')
+
+    with app.app_context():
+        add_step(test_result_id, 3)
+        db.session.commit()
+    with assert_max_queries(2):
+        poller.poll()
+
+    for position in positions:
+        _, events, missed = bus.wait(test_result_id, position, 0)
+        assert not missed
+        assert [[log['seq'] for log in data['new_logs']] for _, data in events] == [[3]]
+
+    # Değişiklik yoksa yayın yapılmaz; bitince akış kapanır
+    poller.poll()
+    assert bus.wait(test_result_id, positions[0], 0)[0] == positions[0] + 1
+    with app.app_context():
+        models.TestResult.query.filter_by(id=test_result_id).update({'status': 'completed'})
+        db.session.commit()
+    poller.poll()
+    _, events, _ = bus.wait(test_result_id, positions[0] + 1, 0)
+    assert events[-1][1]['status'] == 'completed'
+    assert bus.stale_channels(0) == {}
+
+
+def test_local_publisher_is_not_polled(app):
+    bus = EventBus()
+    bus.subscribe(1)
+    bus.seen(1, 0, 'running')
+    bus.publish(1, {'status': 'running', 'current_step': 1, 'total_steps': 0, 'new_logs': []})
+    assert bus.stale_channels(60) == {}
+    assert bus.stale_channels(0) == {1: (0, 'running')}
+
+
+def test_idle_channels_expire():
+    bus = EventBus(idle_timeout=0)
+    # Yayıncısı final olayını göndermeden durdu, abonesi de yok
+    bus.publish(1, {'status': 'running', 'current_step': 1, 'total_steps': 0, 'new_logs': []})
+    bus.subscribe(2)
+    bus.expire_idle()
+    assert set(bus._channels) == {2}
@@ -0,0 +1,63 @@
+"""Geçmiş sayfasının (created_at, id) imleciyle sayfalaması aynı zamanlı kayıtları atlamamalı veya tekrarlamamalı."""
+
+from app import db, models, routes
+from datetime import datetime, timedelta
+from html import unescape
+import re
+
+RESULT_ID = re.compile(r'name="result_ids" value="(\d+)"')
+NEXT_PAGE = re.compile(r'href="([^"]*cursor=[^"]*)"')
+
+
+def add_results(app, user_id, created_ats):
+    with app.app_context():
+        project = models.Project(name='Proje', url='https://example.com', user_id=user_id)
+        db.session.add(project)
+        db.session.flush()
+        prompt = models.TestPrompt(name='Prompt', content='Ana sayfayı aç', project_id=project.id)
+        db.session.add(prompt)
+        db.session.flush()
+        db.session.add_all(models.TestResult(project_id=project.id, prompt_id=prompt.id, user_id=user_id,
+                                             status='completed', created_at=created_at)
+                           for created_at in created_ats)
+        db.session.commit()
+        rows = models.TestResult.query.order_by(models.TestResult.created_at.desc(), models.TestResult.id.desc())
+        return [row.id for row in rows]
+
+
+def walk_history(client, url):
+    """Tüm sayfaları gez; sayfa başına gösterilen sonuç id'leri"""
+    pages = []
+    while url:
+        body = client.get(url).get_data(as_text=True)
+        pages.append([int(result_id) for result_id in RESULT_ID.findall(body)])
+        next_page = NEXT_PAGE.search(body)
+        url = unescape(next_page.group(1)) if next_page else None
+    return pages
+
+
+def test_cursor_pages_through_equal_created_at(app, client, user_id, monkeypatch):
+    monkeypatch.setattr(routes, 'HISTORY_PAGE_SIZE', 3)
+    moment = datetime(2026, 5, 1, 12, 0, 0, 123456)
+    # Aynı anda oluşturulan 7 sonuç (suite gibi) ve öncesi/sonrası
+    expected = add_results(app, user_id, [moment - timedelta(seconds=1)] + [moment] * 7
+                           + [moment + timedelta(seconds=1)])
+
+    pages = walk_history(client, '/tests/history')
+
+    assert [len(page) for page in pages] == [3, 3, 3]
+    assert [result_id for page in pages for result_id in page] == expected
+
+
+def test_cursor_keeps_filters_and_ignores_garbage(app, client, user_id, monkeypatch):
+    monkeypatch.setattr(routes, 'HISTORY_PAGE_SIZE', 2)
+    expected = add_results(app, user_id, [datetime(2026, 5, 1)] * 5)
+    with app.app_context():
+        models.TestResult.query.filter_by(id=expected[1]).update({'status': 'failed'})
+        db.session.commit()
+
+    pages = walk_history(client, '/tests/history?status=completed')
+    assert [result_id for page in pages for result_id in page] == [result_id for result_id in expected
+                                                                   if result_id != expected[1]]
+    # Geçersiz imleç ilk sayfayı gösterir
+    assert walk_history(client, '/tests/history?cursor=bozuk_x')[0] == expected[:2]
@@ -0,0 +1,44 @@
+"""Listeleme sayfalarının sorgu sayısı satır sayısından bağımsız olmalı (N+1 regresyonu)."""
+
+from app import db, models
+from app.querycount import assert_max_queries, count_queries
+import pytest
+
+PAGES = ['/dashboard', '/tests/run', '/tests/history', '/projects/projects']
+
+
+def add_projects(app, user_id, count, prompts=3, results=4):
+    """Her biri prompt'ları ve test sonuçları olan count proje ekle"""
+    with app.app_context():
+        for index in range(count):
+            project = models.Project(name=f'Proje {index}', url='https://example.com', user_id=user_id)
+            db.session.add(project)
+            db.session.flush()
+            for prompt_index in range(prompts):
+                prompt = models.TestPrompt(name=f'Prompt {prompt_index}', content='Ana sayfayı aç', project_id=project.id)
+                db.session.add(prompt)
+                db.session.flush()
+                db.session.add_all(models.TestResult(
+                    project_id=project.id, prompt_id=prompt.id, user_id=user_id,
+                    status='completed', project_url=project.url
+                ) for _ in range(results))
+        db.session.commit()
+
+
+def page_query_count(client, path):
+    with count_queries() as counter:
+        response = client.get(path)
+    assert response.status_code == 200
+    return counter.count
+
+
+@pytest.mark.parametrize('path', PAGES)
+def test_page_query_count_is_constant(app, client, user_id, path):
+    add_projects(app, user_id, 2)
+    # İlk istek oturum kullanıcısını önbelleğe alır; ölçüm sonraki istekten başlar
+    client.get(path)
+    baseline = page_query_count(client, path)
+
+    add_projects(app, user_id, 10)
+    with assert_max_queries(baseline):
+        assert client.get(path).status_code == 200
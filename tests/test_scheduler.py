@@ -0,0 +1,109 @@
+"""Cron ayrıştırma, sıradaki zaman hesabı, kaçırılan çalışmalar ve çakışma atlaması."""
+
+from app import db, models
+from app.scheduler import CronExpression, _parse_field, next_slot, plan_schedule
+from datetime import datetime, timedelta
+import pytest
+
+
+def test_parse_field_lists_ranges_and_steps():
+    assert _parse_field('*', 0, 5) == {0, 1, 2, 3, 4, 5}
+    assert _parse_field('*/15', 0, 59) == {0, 15, 30, 45}
+    assert _parse_field('1-5', 0, 7) == {1, 2, 3, 4, 5}
+    assert _parse_field('10-20/5,1', 0, 59) == {1, 10, 15, 20}
+
+
+@pytest.mark.parametrize('expression', ['* * * *', '60 * * * *', '* 24 * * *', '* * 0 * *', '5-1 * * * *',
+                                        '*/0 * * * *', 'x * * * *'])
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_sunday_is_zero_or_seven():
+    assert CronExpression('0 9 * * 7').weekdays == {0}
+    # 2026-10-18 Pazar
+    assert CronExpression('0 9 * * 0').next_after(datetime(2026, 10, 17, 12)) == datetime(2026, 10, 18, 9)
+
+
+@pytest.mark.parametrize('expression, after, expected', [
+    # Ay ve yıl sonu
+    ('30 23 * * *', datetime(2026, 1, 31, 23, 45), datetime(2026, 2, 1, 23, 30)),
+    ('0 0 1 * *', datetime(2026, 12, 15), datetime(2027, 1, 1)),
+    ('0 12 31 * *', datetime(2026, 4, 1), datetime(2026, 5, 31, 12)),
+    # Şubat 29 yalnızca artık yılda
+    ('0 0 29 2 *', datetime(2026, 3, 1), datetime(2028, 2, 29)),
+    # Takvim UTC'dir: yaz saati geçişlerinde saat atlanmaz veya tekrarlanmaz
+    ('0 2 * * *', datetime(2026, 3, 29, 1, 30), datetime(2026, 3, 29, 2)),
+    ('30 1 * * *', datetime(2026, 10, 25, 1, 30), datetime(2026, 10, 26, 1, 30)),
+    # Gün ve haftanın günü birlikte kısıtlıysa biri yeterli (2026-11-02 Pazartesi)
+    ('0 8 15 * 1', datetime(2026, 11, 1), datetime(2026, 11, 2, 8)),
+    # Saniyeler atılır, aynı dakika tekrar dönmez
+    ('*/5 * * * *', datetime(2026, 5, 1, 10, 5, 30), datetime(2026, 5, 1, 10, 10)),
+])
+def test_next_after(expression, after, expected):
+    assert CronExpression(expression).next_after(after) == expected
+
+
+def test_next_slot_with_interval():
+    schedule = models.TestSchedule(interval_minutes=90)
+    assert next_slot(schedule, datetime(2026, 1, 31, 23)) == datetime(2026, 2, 1, 0, 30)
+
+
+def add_schedule(app, user_id, start, **fields):
+    with app.app_context():
+        project = models.Project(name='Proje', url='https://example.com', user_id=user_id)
+        db.session.add(project)
+        db.session.flush()
+        prompt = models.TestPrompt(name='Prompt', content='Ana sayfayı aç', project_id=project.id)
+        db.session.add(prompt)
+        db.session.flush()
+        schedule = models.TestSchedule(prompt_id=prompt.id, user_id=user_id, jitter_seconds=0, **fields)
+        plan_schedule(schedule, start)
+        db.session.add(schedule)
+        db.session.commit()
+        return schedule.id
+
+
+def schedule_state(app, schedule_id):
+    with app.app_context():
+        schedule = db.session.get(models.TestSchedule, schedule_id)
+        runs = models.TestResult.query.filter_by(schedule_id=schedule_id).count()
+        return schedule.next_slot_at, schedule.skipped_runs, runs
+
+
+@pytest.mark.parametrize('catchup, runs', [('once', 1), ('skip', 0)])
+def test_missed_window_fires_at_most_once(app, user_id, catchup, runs):
+    scheduler = app.extensions['test_scheduler']
+    start = datetime(2026, 6, 1, 12)
+    schedule_id = add_schedule(app, user_id, start, interval_minutes=10, catchup=catchup)
+
+    # Süreç 12:10, 12:20, ..., 13:00 zamanlarını kaçırdı
+    now = start + timedelta(minutes=65)
+    assert len(scheduler.tick(now)) == runs
+    next_slot_at, skipped, created = schedule_state(app, schedule_id)
+    assert next_slot_at == datetime(2026, 6, 1, 13, 10)
+    assert skipped == 6 - runs
+    assert created == runs
+
+    # Aynı tur tekrar işlenirse yeni çalışma oluşmaz
+    assert scheduler.tick(now) == []
+    assert schedule_state(app, schedule_id)[2] == runs
+
+
+def test_on_time_slot_fires_and_overlap_is_skipped(app, user_id):
+    scheduler = app.extensions['test_scheduler']
+    start = datetime(2026, 6, 1, 12)
+    schedule_id = add_schedule(app, user_id, start, cron_expression='*/10 * * * *', catchup='skip')
+
+    first = scheduler.tick(start + timedelta(minutes=10, seconds=5))
+    assert len(first) == 1
+
+    # Önceki çalışma hâlâ kuyrukta: bu zaman atlanır ama takvim ilerler
+    assert scheduler.tick(start + timedelta(minutes=20, seconds=5)) == []
+    assert schedule_state(app, schedule_id) == (datetime(2026, 6, 1, 12, 30), 1, 1)
+
+    with app.app_context():
+        models.TestResult.query.filter_by(id=first[0]).update({'status': 'completed'})
+        db.session.commit()
+    assert len(scheduler.tick(start + timedelta(minutes=30, seconds=5))) == 1
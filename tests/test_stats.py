@@ -0,0 +1,83 @@
+"""Dashboard sayaçları her durum değişikliğinden sonra kayıtlardan yeniden hesaplananla aynı olmalı."""
+
+from app import db, models
+from app.runner import mark_failed
+from app.stats import dashboard_counts, rebuild_stats
+from datetime import datetime, timedelta
+
+
+def counters(app):
+    """Sıfır olmayan sayaçlar: {'users': {...}, 'daily': {...}}"""
+    with app.app_context():
+        users = {row.user_id: (row.total_projects or 0, row.running_tests or 0) for row in models.UserStats.query}
+        daily = {}
+        for row in models.DailyTestStats.query:
+            values = (row.completed or 0, row.failed or 0, row.stopped or 0)
+            if any(values):
+                daily[(row.user_id, row.day)] = values
+        return {'users': users, 'daily': daily}
+
+
+def assert_counters_match_records(app):
+    live = counters(app)
+    with app.app_context():
+        rebuild_stats()
+    assert live == counters(app)
+
+
+def result_ids(app, **filters):
+    with app.app_context():
+        return [row.id for row in models.TestResult.query.filter_by(**filters).order_by(models.TestResult.id)]
+
+
+def test_counters_follow_run_stop_and_deletes(app, client, user_id):
+    app.config['WEB_RUNS_TESTS'] = False
+    runner = app.extensions['test_runner']
+
+    for name in ('Birinci', 'İkinci'):
+        client.post('/projects/project/new', data={'name': name, 'url': 'https://example.com'})
+    with app.app_context():
+        projects = [project.id for project in models.Project.query.order_by(models.Project.id)]
+        for project_id in projects:
+            db.session.add(models.TestPrompt(name='Prompt', content='Ana sayfayı aç', project_id=project_id))
+        db.session.commit()
+        prompts = [prompt.id for prompt in models.TestPrompt.query.order_by(models.TestPrompt.id)]
+    assert_counters_match_records(app)
+
+    # Kuyruğa alma, çalıştırma, başarısız bitme
+    for prompt_id in prompts * 3:
+        client.post(f'/tests/prompt/{prompt_id}/run', data={'project_url': 'https://example.com'})
+    assert len(result_ids(app, status='pending')) == 6
+    first, second = runner._claim_next(), runner._claim_next()
+    with app.app_context():
+        assert dashboard_counts(user_id)['running_tests'] == 2
+    assert_counters_match_records(app)
+    mark_failed(app, first, 'hata')
+    assert_counters_match_records(app)
+
+    # Kuyruktaki testi durdurma; çalışan testin durdurulup kirasının düşmesi
+    queued = result_ids(app, status='pending')[0]
+    client.post(f'/tests/api/result/{queued}/stop')
+    client.post(f'/tests/api/result/{second}/stop')
+    with app.app_context():
+        models.TestResult.query.filter_by(id=second).update(
+            {'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db.session.commit()
+        runner._requeue_expired()
+    assert result_ids(app, status='stopped') == sorted([second, queued])
+    assert_counters_match_records(app)
+
+    # Toplu silme (çalışan test hariç) ve proje silme
+    running = runner._claim_next()
+    client.post('/tests/results/delete', data={'result_ids': [first, second, running]})
+    assert result_ids(app, status='running') == [running]
+    assert not {first, second} & set(result_ids(app))
+    assert_counters_match_records(app)
+
+    mark_failed(app, running, 'hata')
+    client.post(f'/projects/project/{projects[0]}/delete')
+    with app.app_context():
+        assert db.session.get(models.Project, projects[0]) is None
+        assert dashboard_counts(user_id)['total_projects'] == 1
+    assert_counters_match_records(app)
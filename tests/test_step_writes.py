@@ -0,0 +1,50 @@
+"""Toplu log yazmasında bir testin hatalı satırı diğer testlerin adımlarını düşürmemeli."""
+
+from app import db, models
+from app.tasks import db_writer, queue_step
+from datetime import datetime
+
+
+def add_results(app, user_id, count):
+    with app.app_context():
+        project = models.Project(name='Proje', url='https://example.com', user_id=user_id)
+        db.session.add(project)
+        db.session.flush()
+        prompt = models.TestPrompt(name='Prompt', content='Ana sayfayı aç', project_id=project.id)
+        db.session.add(prompt)
+        db.session.flush()
+        results = [models.TestResult(project_id=project.id, prompt_id=prompt.id, user_id=user_id, status='running')
+                   for _ in range(count)]
+        db.session.add_all(results)
+        db.session.commit()
+        return [result.id for result in results]
+
+
+def step(test_result_id, seq, message):
+    return {'test_result_id': test_result_id, 'seq': seq, 'timestamp': '12:00:00', 'message': message,
+            'timings': None, 'created_at': datetime.utcnow()}
+
+
+def logged(app, test_result_id):
+    with app.app_context():
+        return [(row.seq, row.message) for row in
+                models.TestStep.query.filter_by(test_result_id=test_result_id).order_by(models.TestStep.seq)]
+
+
+def test_conflicting_step_does_not_drop_other_steps(app, user_id, capsys):
+    taken_over, other = add_results(app, user_id, 2)
+    with app.app_context():
+        db.session.add(models.TestStep(**step(taken_over, 1, 'yeni worker')))
+        db.session.commit()
+
+    # Eski kira sahibi bayat max(seq) ile aynı sıra numarasını tekrar yazıyor
+    for item in (step(taken_over, 1, 'eski worker'), step(taken_over, 2, 'ikinci'),
+                 step(other, 1, 'diğer test'), step(other, 2, 'diğer test 2')):
+        queue_step(app, item)
+    db_writer.submit(lambda: None).result()
+
+    assert logged(app, other) == [(1, 'diğer test'), (2, 'diğer test 2')]
+    assert logged(app, taken_over) == [(1, 'yeni worker'), (2, 'ikinci')]
+    assert f"test {taken_over}, seq 1" in capsys.readouterr().out
+    with app.app_context():
+        assert db.session.get(models.TestResult, other).current_step == 2
@@ -0,0 +1,61 @@
+"""Suite'in max_parallel sınırı runner'ın claim UPDATE'inde uygulanmalı."""
+
+from app import db, models, runner as runner_module
+from app.suites import saturated_suites, start_suite
+
+
+def add_suites(app, user_id, count, prompts=3, max_parallel=1):
+    """Her biri prompts testli count suite kuyruğa al; suite başına test id'leri döner"""
+    with app.app_context():
+        suites = []
+        for index in range(count):
+            project = models.Project(name=f'Proje {index}', url='https://example.com', user_id=user_id)
+            db.session.add(project)
+            db.session.flush()
+            db.session.add_all(models.TestPrompt(name=f'Prompt {number}', content='Ana sayfayı aç',
+                                                 project_id=project.id) for number in range(prompts))
+            db.session.flush()
+            _, test_result_ids = start_suite(project, user_id, max_parallel=max_parallel)
+            suites.append(test_result_ids)
+        return suites
+
+
+def finish(app, test_result_id):
+    with app.app_context():
+        models.TestResult.query.filter_by(id=test_result_id).update({'status': 'completed'})
+        db.session.commit()
+
+
+def test_claims_one_test_per_suite_until_it_finishes(app, user_id):
+    runner = app.extensions['test_runner']
+    first, second = add_suites(app, user_id, 2)
+
+    assert runner._claim_next() == first[0]
+    assert runner._claim_next() == second[0]
+    assert runner._claim_next() is None
+
+    finish(app, first[0])
+    assert runner._claim_next() == first[1]
+    assert runner._claim_next() is None
+
+
+def test_claim_update_rechecks_capacity(app, user_id, monkeypatch):
+    runner = app.extensions['test_runner']
+    (suite,) = add_suites(app, user_id, 1)
+    assert runner._claim_next() == suite[0]
+
+    # Başka bir worker aday seçimini sınır dolmadan önce yapmış gibi: ön eleme ilk turda boş döner
+    calls = []
+
+    def stale_saturated_suites():
+        calls.append(1)
+        if len(calls) == 1:
+            return db.select(models.TestResult.suite_run_id).where(db.false())
+        return saturated_suites()
+
+    monkeypatch.setattr(runner_module, 'saturated_suites', stale_saturated_suites)
+    assert runner._claim_next() is None
+    assert len(calls) == 2
+    with app.app_context():
+        running = models.TestResult.query.filter_by(status='running').count()
+    assert running == 1
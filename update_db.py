@@ -1,22 +1,95 @@
 #!/usr/bin/env python3
 
 from app import create_app, db
+from app.models import TestResult, TestStep
+from app.stats import rebuild_stats
 from sqlalchemy import text
+import json
 
-app = create_app()
+app = create_app(start_workers=False)
+
+# Sonradan eklenen sütunlar (tablo, sütun tanımı)
+NEW_COLUMNS = [
+    ('test_result', 'running_details TEXT'),
+    ('test_result', 'stop_requested BOOLEAN DEFAULT 0'),
+    ('test_result', 'current_step INTEGER DEFAULT 0'),
+    ('test_result', 'total_steps INTEGER DEFAULT 0'),
+    ('test_result', 'started_at DATETIME'),
+    ('test_result', 'worker_id VARCHAR(100)'),
+    ('test_result', 'lease_expires_at DATETIME'),
+    ('test_result', 'step_results TEXT'),
+    ('test_result', 'schedule_id INTEGER'),
+    ('test_result', 'archived_at DATETIME'),
+    ('test_result', 'archive_path VARCHAR(255)'),
+    ('test_result', 'archive_offset INTEGER'),
+    ('test_result', 'suite_run_id INTEGER'),
+    ('test_prompt', 'tags VARCHAR(200)'),
+    ('test_step', 'timings TEXT'),
+]
+
+# Sonradan eklenen indeksler (modeldeki __table_args__ ile aynı)
+NEW_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_test_result_user_created ON test_result (user_id, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS ix_test_result_user_status_created ON test_result (user_id, status, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS ix_test_result_project_created ON test_result (project_id, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS ix_test_result_prompt_created ON test_result (prompt_id, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS ix_test_result_status_id ON test_result (status, id)',
+    'CREATE INDEX IF NOT EXISTS ix_test_result_suite ON test_result (suite_run_id, status)',
+]
 
 with app.app_context():
-    try:
-        # Yeni sütunları ekle
-        db.session.execute(text('ALTER TABLE test_result ADD COLUMN running_details TEXT'))
-        db.session.execute(text('ALTER TABLE test_result ADD COLUMN stop_requested BOOLEAN DEFAULT 0'))
-        db.session.execute(text('ALTER TABLE test_result ADD COLUMN current_step INTEGER DEFAULT 0'))
-        db.session.execute(text('ALTER TABLE test_result ADD COLUMN total_steps INTEGER DEFAULT 0'))
+    for table, column_def in NEW_COLUMNS:
+        column_name = column_def.split()[0]
+        try:
+            db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {column_def}'))
+            db.session.commit()
+            print(f'✓ Sütun eklendi: {table}.{column_name}')
+        except Exception as e:
+            db.session.rollback()
+            if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
+                print(f'→ Sütun zaten mevcut: {table}.{column_name}')
+            else:
+                print(f'Error updating database: {e}')
+    
+    for statement in NEW_INDEXES:
+        db.session.execute(text(statement))
+        db.session.commit()
+        print(f'✓ İndeks hazır: {statement.split()[5]}')
+    
+    # Eski running_details JSON loglarını test_step tablosuna taşı
+    # (test_step tablosu create_app içindeki db.create_all ile oluşturulur)
+    legacy_results = TestResult.query.filter(
+        TestResult.running_details.isnot(None),
+        TestResult.running_details != ''
+    ).all()
+    for test_result in legacy_results:
+        try:
+            logs = json.loads(test_result.running_details)
+        except json.JSONDecodeError:
+            logs = []
+        
+        if test_result.steps.count() == 0:
+            for seq, log in enumerate(logs, start=1):
+                db.session.add(TestStep(
+                    test_result_id=test_result.id,
+                    seq=seq,
+                    timestamp=log.get('timestamp'),
+                    message=log.get('message', '')
+                ))
+        test_result.running_details = None
         db.session.commit()
-        print('Database updated successfully!')
-    except Exception as e:
-        if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
-            print('Columns already exist, skipping...')
-        else:
-            print(f'Error updating database: {e}')
-            db.session.rollback()
\ No newline at end of file
+        print(f'✓ Test #{test_result.id}: {len(logs)} log adımı taşındı')
+    
+    # execution_time eskiden hiç yazılmıyordu; bitmiş testler için başlangıç/bitiş zamanından doldur
+    filled = db.session.execute(text('''
+        UPDATE test_result SET execution_time = (julianday(completed_at) - julianday(started_at)) * 86400
+        WHERE execution_time IS NULL AND started_at IS NOT NULL AND completed_at IS NOT NULL
+    ''')).rowcount
+    db.session.commit()
+    print(f'✓ {filled} test sonucunun execution_time değeri dolduruldu')
+    
+    # Dashboard sayaçlarını mevcut kayıtlardan yeniden hesapla
+    users, days = rebuild_stats()
+    print(f'✓ Dashboard sayaçları hesaplandı: {users} kullanıcı, {days} gün')
+    
+    print('Database updated successfully!')
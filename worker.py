@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Web arayüzünden bağımsız test worker'ı.
+
+Aynı veritabanına (DATABASE_URL) bağlanır, pending testleri kira (lease)
+ile sahiplenip çalıştırır. Birden fazla makinede veya aynı makinede birden
+fazla kopya halinde çalıştırılabilir.
+
+Kullanım:
+    python worker.py --concurrency 4 --worker-id makine-1
+"""
+
+from app import create_app
+import argparse
+import os
+import signal
+import threading
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Browser test worker')
+    parser.add_argument('--concurrency', type=int, help='Aynı anda çalışacak test sayısı (varsayılan TEST_WORKERS)')
+    parser.add_argument('--worker-id', help='Worker adı (varsayılan host:pid)')
+    args = parser.parse_args()
+
+    if args.concurrency:
+        os.environ['TEST_WORKERS'] = str(args.concurrency)
+    if args.worker_id:
+        os.environ['WORKER_ID'] = args.worker_id
+
+    # Worker, WEB_RUNS_TESTS ayarından bağımsız olarak servisleri aşağıda kendisi başlatır
+    app = create_app(start_workers=False)
+    runner = app.extensions['test_runner']
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    app.extensions['browser_pool'].start()
+    runner.start()
+    app.extensions['test_scheduler'].start()
+    print(f"Worker çalışıyor: {runner.worker_id} (durdurmak için Ctrl+C)")
+
+    stop_event.wait()
+    app.extensions['test_scheduler'].stop()
+    # Yarım kalan testler beklemeden diğer worker'lara bırakılır; kill -9 gibi
+    # durumlarda ise kira süresi dolunca kuyruğa döner
+    requeued = runner.requeue_owned()
+    print(f"Worker kapatılıyor: {runner.worker_id} ({requeued} test kuyruğa bırakıldı)")
+    app.extensions['browser_pool'].shutdown()
+
+
+if __name__ == '__main__':
+    main()